@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from typing import List, Any
 import secrets
@@ -18,9 +19,11 @@ from repositories.role_repository import role_repository
 from repositories.permission_repository import permission_repository
 from core.security import get_password_hash
 from repositories.audit_log_repository import audit_log_repository
+from repositories.ticket_repository import ticket_repository
+from services.ticket_cache import ticket_list_cache
 import socket
 
-from api.routers.fortisiem import parse_raw_log_content
+from services.siem_ingest_service import parse_raw_log_content
 
 router = APIRouter()
 
@@ -39,6 +42,16 @@ def get_fortisiem_status(current_user: DBUser = Depends(deps.get_current_active_
         return {"status": "offline", "details": f"Connection to FortiSIEM at {fortisiem_ip}:{fortisiem_port} failed: {e}"}
 
 
+@router.get("/ticket-list-cache")
+def get_ticket_list_cache_stats(
+    current_user: DBUser = Depends(deps.get_current_active_admin),
+):
+    """
+    Hit/miss counters, size and generation of the ticket list result cache.
+    """
+    return ticket_list_cache.get_stats()
+
+
 # Existing Admin User Management
 @router.put("/users/{user_id}", response_model=User)
 def admin_update_user(
@@ -350,22 +363,28 @@ def update_ticket_summaries(
 ):
     """
     Update summaries and descriptions for all tickets based on their raw_logs.
+    Only the compressed raw log store is read; tickets are updated in bulk.
     """
-    all_tickets = db.query(Ticket).yield_per(100)
-    updated_count = 0
-    for ticket in all_tickets:
-        if ticket.raw_logs:
-            try:
-                incident_data = parse_raw_log_content(ticket.raw_logs)
-                parsed_title = incident_data.get("rule_name")
-                if parsed_title and parsed_title != "N/A" and parsed_title.strip() != "":
-                    ticket.resumen = parsed_title
-                    ticket.descripcion = incident_data["detailed_description"]
-                    ticket.severidad = incident_data["severity_name"]
-                    updated_count += 1
-                else:
-                    print(f"Skipping ticket {ticket.id} due to unsuccessful parsing of raw_log.")
-            except Exception as e:
-                print(f"Could not update ticket {ticket.id}: {e}")
+    updates = []
+    for ticket_id, raw_logs in ticket_repository.iter_raw_logs(db):
+        try:
+            incident_data = parse_raw_log_content(raw_logs)
+            parsed_title = incident_data.get("rule_name")
+            if parsed_title and parsed_title != "N/A" and parsed_title.strip() != "":
+                updates.append(
+                    {
+                        "id": ticket_id,
+                        "resumen": parsed_title,
+                        "descripcion": incident_data["detailed_description"],
+                        "severidad": incident_data["severity_name"],
+                    }
+                )
+            else:
+                print(f"Skipping ticket {ticket_id} due to unsuccessful parsing of raw_log.")
+        except Exception as e:
+            print(f"Could not update ticket {ticket_id}: {e}")
+    if updates:
+        db.execute(update(Ticket), updates)
     db.commit()
-    return {"message": f"Successfully updated {updated_count} tickets."}
\ No newline at end of file
+    ticket_list_cache.invalidate()
+    return {"message": f"Successfully updated {len(updates)} tickets."}
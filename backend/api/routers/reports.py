@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 from api import deps
 from db.models import User
 from schemas.report import WeeklyEvolutionData, MonthlyEvolutionData
+from schemas.alert import AlertInDB
 from services.report_service import report_service
+from repositories.alert_repository import alert_repository
 
 router = APIRouter()
 
@@ -118,3 +120,26 @@ def get_top_recurring(
     Get the top recurring alerts/tickets.
     """
     return report_service.get_top_recurring(db)
+
+
+@router.get("/alerts/pivot", response_model=List[AlertInDB])
+def pivot_alerts(
+    ip: Optional[str] = None,
+    host_name: Optional[str] = None,
+    usuario: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> List[AlertInDB]:
+    """
+    Get the alerts that match an exact IP (source or destination), host name or user.
+    """
+    if not (ip or host_name or usuario):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debe indicar al menos uno de: ip, host_name, usuario.",
+        )
+    return alert_repository.get_by_indicator(
+        db, ip=ip, host_name=host_name, usuario=usuario, skip=skip, limit=limit
+    )
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, status
+
+from core.config import SYSLOG_ENABLED
+from services.syslog_service import syslog_listener
+
+router = APIRouter()
+
+
+@router.get("/stats", status_code=status.HTTP_200_OK)
+def get_syslog_stats():
+    """
+    Devuelve los contadores del receptor syslog: mensajes recibidos, descartados,
+    parseados, con error y lotes escritos.
+    """
+    stats = syslog_listener.get_stats()
+    stats["enabled"] = SYSLOG_ENABLED
+    return stats
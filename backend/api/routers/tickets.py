@@ -6,10 +6,15 @@ from fastapi import (
     File,
     UploadFile,
     Form,
+    Query,
     Request,
 )
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi.responses import (
+    JSONResponse,
+    ORJSONResponse,
+    Response,
+    StreamingResponse,
+)
 from sqlalchemy.orm import Session
 from typing import Any, Optional, List
 from datetime import datetime
@@ -18,12 +23,22 @@ from api import deps
 from db.models import User, Notification
 from schemas.ticket import (
     PaginatedTicketResponse,
+    TicketBulkUpdate,
+    TicketBulkUpdateResult,
     TicketInDB,
     TicketCreate,
     TicketUpdate,
 )
 from schemas.ticket_comment import TicketCommentCreate, TicketComment
+from schemas.evidence_upload import (
+    EvidenceItem,
+    EvidenceUpload,
+    EvidenceUploadComplete,
+    EvidenceUploadCreate,
+)
 from services.ticket_service import ticket_service
+from services.evidence_upload_service import evidence_upload_service
+from services.ticket_serializer import ticket_serializer
 from repositories.ticket_comment_repository import ticket_comment_repository
 
 import json
@@ -32,6 +47,25 @@ from api.routers.websockets import manager
 router = APIRouter()
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    """
+    Weak comparison of `etag` against the If-None-Match header (RFC 9110).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag == "*" or tag.removeprefix("W/") == opaque
+        for tag in (tag.strip() for tag in header.split(","))
+    )
+
+
+def _etag_headers(etag: str) -> dict:
+    # Clients may keep the response but must revalidate it on every use
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
 async def create_notification(
     db: Session, user_id: int, message: str, link: Optional[str] = None
 ):
@@ -135,6 +169,7 @@ async def create_ticket(
     description="Retrieves a paginated list of tickets, with extensive filtering, sorting, and search capabilities. Users can filter by status, severity, category, assigned user, reporter, and search across multiple ticket fields.",
 )
 def read_tickets(
+    request: Request,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -149,32 +184,122 @@ def read_tickets(
     sort_order: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    count_mode: str = "exact",
+    search_mode: str = "fulltext",
+    fields: Optional[str] = None,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Retrieve tickets.
+
+    Pass the `next_cursor` of a response as `cursor` to fetch the following page
+    by keyset instead of `skip`; the sort parameters must stay the same.
+    `count_mode` is "exact" (default), "estimate" or "none"; with "none"
+    total_count is null and only `has_more` tells whether more pages exist.
+    `search_mode=substring` matches fragments of IPs, hostnames, hashes, ticket
+    UIDs and rule names instead of whole words.
+    `fields` is a comma-separated list of ticket fields to return; it defaults to
+    "summary" (short columns only) and "all" returns every list field.
     """
-    assigned_to_me_id = current_user.id if assigned_to_me else None
-    created_by_me_id = current_user.id if created_by_me else None
+    filters = {
+        "status": status,
+        "assigned_to_me_id": current_user.id if assigned_to_me else None,
+        "severity": severity,
+        "created_by_me_id": current_user.id if created_by_me else None,
+        "category": category,
+        "search": search,
+        "search_mode": search_mode,
+        "reportado_por_id": reportado_por_id,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    params = {
+        "skip": skip,
+        "limit": limit,
+        "sort_by": sort_by,
+        "sort_order": sort_order,
+        "cursor": cursor,
+        "count_mode": count_mode,
+        "fields": fields,
+    }
+    # Si la lista no cambió desde el ETag del cliente, 304 sin consultar la página
+    etag = ticket_service.get_tickets_etag(params, **filters)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=_etag_headers(etag))
+
+    tickets, total_count, next_cursor = ticket_service.get_paginated_tickets(
+        db, **params, **filters
+    )
+    # Ticket dicts only hold JSON types already; no jsonable_encoder pass needed
+    return ORJSONResponse(
+        content={
+            "total_count": total_count,
+            "tickets": tickets,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        },
+        headers=_etag_headers(etag),
+    )
+
+
+_EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
 
-    tickets, total_count = ticket_service.get_paginated_tickets(
+
+@router.get(
+    "/export",
+    summary="Export tickets as CSV or NDJSON",
+    description="Streams every ticket matching the same filters as the ticket list, in id order, as CSV or NDJSON (optionally gzip-compressed). Tickets are read in batches from a server-side cursor, so exports of any size use constant memory.",
+)
+def export_tickets(
+    db: Session = Depends(deps.get_db),
+    export_format: str = Query("csv", alias="format"),
+    compress: bool = False,
+    fields: Optional[str] = None,
+    status: Optional[str] = None,
+    assigned_to_me: Optional[bool] = False,
+    severity: Optional[str] = None,
+    created_by_me: Optional[bool] = False,
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    search_mode: str = "fulltext",
+    reportado_por_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Export tickets.
+
+    `format` is "csv" (default, with a header row) or "ndjson"; `compress=true`
+    gzips the stream. `fields` works as in the ticket list but defaults to "all".
+    """
+    chunks = ticket_service.export_tickets(
         db,
-        skip=skip,
-        limit=limit,
+        export_format=export_format,
+        fields=fields,
+        compress=compress,
         status=status,
-        assigned_to_me_id=assigned_to_me_id,
+        assigned_to_me_id=current_user.id if assigned_to_me else None,
         severity=severity,
-        created_by_me_id=created_by_me_id,
+        created_by_me_id=current_user.id if created_by_me else None,
         category=category,
         search=search,
+        search_mode=search_mode,
         reportado_por_id=reportado_por_id,
-        sort_by=sort_by,
-        sort_order=sort_order,
         start_date=start_date,
         end_date=end_date,
     )
-    return JSONResponse(
-        content=jsonable_encoder({"total_count": total_count, "tickets": tickets})
+    filename = f"tickets-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+    media_type = _EXPORT_MEDIA_TYPES[export_format]
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    # El stream se genera en el threadpool; la sesión sigue abierta hasta que termina
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
@@ -209,10 +334,40 @@ def get_ticket_categories():
 )
 def read_ticket(
     ticket_id: int,
+    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
-    ticket = ticket_service.get_ticket(
+    # 304 sin cargar evidencia ni serializar si el ticket no cambió
+    etag = ticket_service.get_ticket_etag(db, ticket_id=ticket_id)
+    if etag and _etag_matches(request, etag):
+        return Response(status_code=304, headers=_etag_headers(etag))
+
+    ticket = ticket_service.get_ticket(db, ticket_id=ticket_id)
+    if not ticket:
+        raise HTTPException(
+            status_code=404,
+            detail="Ticket not found",
+        )
+    # Same body as response_model=TicketInDB, without the revalidation round trip
+    return ORJSONResponse(
+        content=ticket_serializer.ticket_detail(ticket),
+        headers=_etag_headers(etag) if etag else None,
+    )
+
+
+@router.post(
+    "/{ticket_id}/acknowledge",
+    response_model=TicketInDB,
+    summary="Acknowledge a ticket as seen by its assignee",
+    description="Moves a 'Nuevo' ticket assigned to the current user to 'Abierto' and records it in the audit log. For any other ticket or user it changes nothing. Returns the ticket details.",
+)
+def acknowledge_ticket(
+    ticket_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    ticket = ticket_service.acknowledge_ticket(
         db, ticket_id=ticket_id, current_user_id=current_user.id
     )
     if not ticket:
@@ -220,7 +375,141 @@ def read_ticket(
             status_code=404,
             detail="Ticket not found",
         )
-    return ticket
+    return ORJSONResponse(content=ticket_serializer.ticket_detail(ticket))
+
+
+@router.get(
+    "/{ticket_id}/raw-logs",
+    summary="Get the raw logs of a ticket",
+    description="Retrieves the decompressed raw SIEM logs stored for a specific ticket. Ticket lists only report whether raw logs exist (has_raw_logs).",
+)
+def read_ticket_raw_logs(
+    ticket_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    raw_logs = ticket_service.get_ticket_raw_logs(db, ticket_id=ticket_id)
+    if not raw_logs:
+        raise HTTPException(
+            status_code=404,
+            detail="Ticket not found",
+        )
+    return raw_logs
+
+
+@router.post(
+    "/{ticket_id}/uploads",
+    response_model=EvidenceUpload,
+    status_code=status.HTTP_201_CREATED,
+    summary="Start a resumable evidence upload",
+    description="Opens an upload session for one evidence file of the given size. The file is then sent in chunks with PUT /tickets/{ticket_id}/uploads/{upload_id}?offset=N and attached with POST .../complete. Each user may have a limited number of sessions open at once, and files and chunks have maximum sizes.",
+)
+def create_evidence_upload(
+    ticket_id: int,
+    upload_in: EvidenceUploadCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    upload = evidence_upload_service.create_upload(
+        db, ticket_id=ticket_id, upload_in=upload_in, current_user_id=current_user.id
+    )
+    if not upload:
+        raise HTTPException(
+            status_code=404,
+            detail="Ticket not found",
+        )
+    return upload
+
+
+@router.get(
+    "/{ticket_id}/uploads/{upload_id}",
+    response_model=EvidenceUpload,
+    summary="Get the state of an evidence upload",
+    description="Returns the upload session; `recibido` is the offset from which an interrupted upload resumes.",
+)
+def read_evidence_upload(
+    ticket_id: int,
+    upload_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    upload = evidence_upload_service.get_upload(
+        db, ticket_id=ticket_id, upload_id=upload_id, current_user_id=current_user.id
+    )
+    if not upload:
+        raise HTTPException(
+            status_code=404,
+            detail="Upload not found",
+        )
+    return upload
+
+
+@router.put(
+    "/{ticket_id}/uploads/{upload_id}",
+    response_model=EvidenceUpload,
+    summary="Upload a chunk of evidence",
+    description="Appends the raw request body to the upload at `offset`, which must equal the session's `recibido` (409 otherwise, or while another request is using the session). The body is streamed to disk, not parsed as a form.",
+)
+async def upload_evidence_chunk(
+    ticket_id: int,
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of this chunk."),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    return await evidence_upload_service.write_chunk(
+        db,
+        ticket_id=ticket_id,
+        upload_id=upload_id,
+        offset=offset,
+        body=request.stream(),
+        current_user_id=current_user.id,
+    )
+
+
+@router.post(
+    "/{ticket_id}/uploads/{upload_id}/complete",
+    response_model=EvidenceItem,
+    summary="Attach a finished upload as evidence",
+    description="Once every byte has been received, stores the file (deduplicated by SHA-256) and attaches it to the ticket as evidence. If `hash_sha256` is given, the upload is rejected when the received file does not match it. Returns 409 while another request is using the session and 404 once it has been completed.",
+)
+async def complete_evidence_upload(
+    ticket_id: int,
+    upload_id: str,
+    complete_in: EvidenceUploadComplete,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    return await evidence_upload_service.complete_upload(
+        db,
+        ticket_id=ticket_id,
+        upload_id=upload_id,
+        expected_hash=complete_in.hash_sha256,
+        current_user_id=current_user.id,
+    )
+
+
+@router.delete(
+    "/{ticket_id}/uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Cancel an evidence upload",
+    description="Closes the upload session and deletes the data received so far.",
+)
+def cancel_evidence_upload(
+    ticket_id: int,
+    upload_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    if not evidence_upload_service.cancel_upload(
+        db, ticket_id=ticket_id, upload_id=upload_id, current_user_id=current_user.id
+    ):
+        raise HTTPException(
+            status_code=404,
+            detail="Upload not found",
+        )
+    return
 
 
 @router.put(
@@ -275,9 +564,7 @@ async def update_ticket(
     """
     Update a ticket.
     """
-    ticket = ticket_service.get_ticket(
-        db, ticket_id=ticket_id, current_user_id=current_user.id
-    )
+    ticket = ticket_service.get_ticket(db, ticket_id=ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=404,
@@ -312,7 +599,7 @@ async def update_ticket(
 
     ticket_in = TicketUpdate(**update_data)
 
-    updated_ticket = ticket_service.update_ticket(
+    updated_ticket = await ticket_service.update_ticket(
         db=db,
         ticket_id=ticket_id,
         ticket_in=ticket_in,
@@ -369,6 +656,25 @@ async def update_ticket(
     return updated_ticket
 
 
+@router.post(
+    "/bulk",
+    response_model=TicketBulkUpdateResult,
+    summary="Update many tickets at once",
+    description="Applies the same patch (status, severity, assignee, category or resolution) to a list of tickets in one transaction. Permissions, audit entries and notifications are the same as updating each ticket individually; a single 'tickets_bulk_update' WebSocket event is broadcast.",
+)
+async def bulk_update_tickets(
+    bulk_in: TicketBulkUpdate,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Bulk-update tickets.
+    """
+    return await ticket_service.bulk_update_tickets(
+        db, bulk_in=bulk_in, current_user=current_user
+    )
+
+
 @router.post(
     "/{ticket_id}/comments",
     response_model=TicketComment,
@@ -386,9 +692,7 @@ async def create_ticket_comment(
     Create a new comment for a specific ticket.
     """
     try:
-        ticket = ticket_service.get_ticket(
-            db, ticket_id=ticket_id, current_user_id=current_user.id
-        )
+        ticket = ticket_service.get_ticket(db, ticket_id=ticket_id)
         if not ticket:
             raise HTTPException(
                 status_code=404,
@@ -447,9 +751,7 @@ def get_ticket_comments(
     """
     Retrieve all comments for a specific ticket.
     """
-    ticket = ticket_service.get_ticket(
-        db, ticket_id=ticket_id, current_user_id=current_user.id
-    )
+    ticket = ticket_service.get_ticket(db, ticket_id=ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=404,
@@ -503,9 +805,7 @@ async def remediate_ticket(
     """
     Assign a ticket to the current user for remediation and set status to 'En Progreso'.
     """
-    ticket = ticket_service.get_ticket(
-        db, ticket_id=ticket_id, current_user_id=current_user.id
-    )
+    ticket = ticket_service.get_ticket(db, ticket_id=ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=404,
@@ -516,7 +816,7 @@ async def remediate_ticket(
     ticket_in = TicketUpdate(asignado_a_id=current_user.id, estado="En Progreso")
 
     # Use the existing update service
-    updated_ticket = ticket_service.update_ticket(
+    updated_ticket = await ticket_service.update_ticket(
         db=db,
         ticket_id=ticket_id,
         ticket_in=ticket_in,
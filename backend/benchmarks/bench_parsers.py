@@ -0,0 +1,138 @@
+"""
+Micro-benchmarks for the SIEM ingestion parsers.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.bench_parsers [--iterations N] [--samples FILE ...]
+
+The built-in samples come from soc-module/test_*.sh when that directory is
+available, plus a few embedded FortiGate / FortiSIEM payloads. Extra sample
+files use the same NDJSON format as POST /api/v1/fortisiem-incidents/batch.
+Reports parses/sec and the peak memory allocated per parse for each sample.
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+import tracemalloc
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from api.routers.fortisiem import _split_batch_payload  # noqa: E402
+from services.siem_ingest_service import (  # noqa: E402
+    _parse_fortigate_log,
+    parse_raw_log_content,
+)
+
+SOC_MODULE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "soc-module")
+
+EMBEDDED_SAMPLES = {
+    "fortigate_utm_anomaly": (
+        'date=2025-11-11 time=12:55:54 devname="PFA-cluster_FG10E0" '
+        'devid="FG10E0TB22903003" logid="0720018432" type="utm" subtype="anomaly" '
+        'level="alert" severity="critical" srcip="186.57.15.218" '
+        'dstip="200.105.122.1" action="detected" proto=17 service="udp/49802" '
+        'attack="udp_scan" srcport=18088 dstport=49802 policyid=3 '
+        'msg="anomaly: udp_scan, 102 > threshold 100" crlevel="critical"'
+    ),
+    "fortigate_webfilter": (
+        'date=2025-11-12 time=09:14:02 devname="FG-EDGE" logid="0316013056" '
+        'type="utm" subtype="webfilter" level="warning" srcip=10.1.9.15 '
+        'dstip=104.16.0.1 hostname="malware.example" profile="default" '
+        'action="blocked" url="/payload.exe" user="jdoe" catdesc="Malicious Websites" '
+        "sentbyte=512 rcvdbyte=0"
+    ),
+    "fortisiem_bracketed": (
+        "[phCustId]=1,[hostName]=WS-CONTABLE-01,[srcIpAddr]=10.1.9.44,"
+        "[user]=jdoe,[phLogDetail]=Multiple failed logons for user jdoe"
+    ),
+    "fortisiem_incident_xml": (
+        '<incident incidentId="1814704" severity="9" '
+        'incidentCategory="Security/Execution">'
+        "<name>High Severity Inbound Permitted IPS Exploit</name>"
+        "<description>Detects a permitted high severity IPS exploit.</description>"
+        "<displayTime>Tue Nov 11 12:56:30 ART 2025</displayTime>"
+        '<incidentTarget><entry name="Host IP">200.105.122.1</entry></incidentTarget>'
+        "<rawEvents>[NonIPSHighSev] "
+        + "&lt;185&gt;logver=704072731 devname=&quot;PFA-cluster_FG10E0&quot; "
+        'date="2025-11-11" time="12:55:54" srcip="186.57.15.218" '
+        'dstip="200.105.122.1" action="detected" attack="udp_scan"\n' * 20
+        + "</rawEvents></incident>"
+    ),
+}
+
+_SHELL_PAYLOAD_PATTERN = re.compile(
+    r"^(?:FORTISIEM_XML|CEF_MESSAGE)=(['\"])(.*?)\1\s*$", re.DOTALL | re.MULTILINE
+)
+
+
+def load_soc_module_samples():
+    samples = {}
+    for path in sorted(glob.glob(os.path.join(SOC_MODULE_DIR, "test_*.sh"))):
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        for index, match in enumerate(_SHELL_PAYLOAD_PATTERN.finditer(content)):
+            name = f"{os.path.basename(path)}#{index}"
+            samples[name] = match.group(2)
+    return samples
+
+
+def load_sample_file(path):
+    with open(path, encoding="utf-8") as f:
+        items = _split_batch_payload(f.read())
+    return {f"{os.path.basename(path)}#{i}": item for i, item in enumerate(items)}
+
+
+def measure(parser, payload, iterations):
+    # Parses per second
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parser(payload)
+    elapsed = time.perf_counter() - start
+
+    # Peak bytes allocated while parsing a single payload
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    parser(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return iterations / elapsed, peak - baseline
+
+
+def run(samples, iterations):
+    print(f"{'sample':<40} {'parser':<24} {'parses/sec':>12} {'peak KiB/log':>13}")
+    for name, payload in samples.items():
+        parsers = [("parse_raw_log_content", parse_raw_log_content)]
+        if not payload.lstrip().startswith("<"):
+            parsers.insert(0, ("_parse_fortigate_log", _parse_fortigate_log))
+        for parser_name, parser in parsers:
+            try:
+                rate, peak = measure(parser, payload, iterations)
+            except Exception as e:
+                print(f"{name:<40} {parser_name:<24} error: {getattr(e, 'detail', e)}")
+                continue
+            print(f"{name:<40} {parser_name:<24} {rate:>12.0f} {peak / 1024:>13.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument(
+        "--samples", nargs="*", default=[], help="Extra NDJSON/XML sample files."
+    )
+    args = parser.parse_args()
+
+    samples = dict(EMBEDDED_SAMPLES)
+    samples.update(load_soc_module_samples())
+    for path in args.samples:
+        samples.update(load_sample_file(path))
+    run(samples, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
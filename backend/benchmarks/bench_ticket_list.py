@@ -0,0 +1,113 @@
+"""
+Benchmark of the ticket list payload per `fields` projection.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.bench_ticket_list [--tickets N] [--limit N] [--iterations N]
+
+Seeds an in-memory SQLite database with tickets carrying SIEM-sized text
+columns and reports, for each projection, the time to build a page and the
+size of its JSON body, plus the bytes saved against fields=all.
+"""
+
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from db.base import Base  # noqa: E402
+from db.models import Ticket  # noqa: E402
+from repositories.ticket_repository import ticket_count_cache  # noqa: E402
+from services.ticket_service import ticket_service  # noqa: E402
+
+PROJECTIONS = {
+    "summary": None,
+    "ui": "summary,rule_description,rule_remediation",
+    "all": "all",
+}
+
+_LONG_TEXT = (
+    "Detects a permitted high severity IPS exploit from 186.57.15.218 to "
+    "200.105.122.1 (udp_scan, 102 > threshold 100). "
+) * 20
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def seed(session, count):
+    session.execute(
+        insert(Ticket),
+        [
+            {
+                "ticket_uid": f"TCK-2025-{i:06d}",
+                "estado": "Nuevo",
+                "severidad": "Alta",
+                "resumen": f"High Severity Inbound Permitted IPS Exploit #{i}",
+                "descripcion": _LONG_TEXT,
+                "categoria": "Security/Execution",
+                "platform": "FortiSIEM",
+                "rule_name": "High Severity Inbound Permitted IPS Exploit",
+                "rule_description": _LONG_TEXT,
+                "rule_remediation": _LONG_TEXT,
+                "iocs": "186.57.15.218 200.105.122.1",
+            }
+            for i in range(1, count + 1)
+        ],
+    )
+    session.commit()
+
+
+def measure(session, fields, limit, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        ticket_count_cache.clear()
+        tickets, _, _ = ticket_service.get_paginated_tickets(
+            session, limit=limit, fields=fields
+        )
+        session.expire_all()
+    elapsed = (time.perf_counter() - start) / iterations
+    body = json.dumps(tickets).encode("utf-8")
+    return elapsed, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    session = create_session()
+    seed(session, args.tickets)
+
+    results = {
+        name: measure(session, fields, args.limit, args.iterations)
+        for name, fields in PROJECTIONS.items()
+    }
+    full_bytes = results["all"][1]
+    print(f"{'fields':<10} {'ms/page':>10} {'bytes/page':>12} {'saved vs all':>14}")
+    for name, (elapsed, size) in results.items():
+        saved = full_bytes - size
+        print(
+            f"{name:<10} {elapsed * 1000:>10.2f} {size:>12} "
+            f"{saved:>8} ({saved / full_bytes:>4.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark of the PostgreSQL full-text ticket search filter.
+
+Usage (from the backend directory, against a scratch PostgreSQL database):
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_ticket_search \
+        [--tickets N] [--iterations N]
+
+Seeds tickets and alerts in a throwaway schema, then runs EXPLAIN ANALYZE of a
+search count with the matches OR-ed in one WHERE (the previous filter) and
+with the UNION of ticket ids used by TicketRepository._search_filter. Reports
+the plan's scan nodes and the mean execution time of each: the OR is
+expected to show a Seq Scan on tickets, the UNION an index scan per arm.
+"""
+
+import argparse
+import os
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine, func, insert, or_, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from core.config import DATABASE_URL, TICKET_SEARCH_LANGUAGE  # noqa: E402
+from db.base import Base  # noqa: E402
+from db.models import Alert, Ticket  # noqa: E402
+from db.search import (  # noqa: E402
+    ensure_ticket_search_index,
+    prefix_tsquery,
+    supports_full_text_search,
+    ticket_search_vector,
+)
+from repositories.ticket_repository import ticket_repository  # noqa: E402
+
+SCHEMA = "bench_ticket_search"
+SEARCH = "10.1.9.44"
+
+
+def create_engine_in_schema():
+    engine = create_engine(
+        DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA},public"}
+    )
+    if not supports_full_text_search(engine):
+        raise SystemExit("This benchmark needs a PostgreSQL DATABASE_URL.")
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(bind=engine)
+    ensure_ticket_search_index(engine)
+    return engine
+
+
+def seed(engine, count):
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Ticket),
+            [
+                {
+                    "ticket_uid": f"TCK-2025-{i:06d}",
+                    "estado": "Nuevo",
+                    "severidad": "Alta",
+                    "resumen": f"Multiple failed logons #{i}",
+                    "descripcion": "Detects repeated authentication failures.",
+                    "rule_name": "Excessive Denied Connections",
+                }
+                for i in range(1, count + 1)
+            ],
+        )
+        connection.execute(
+            insert(Alert),
+            [
+                {
+                    "ticket_id": i,
+                    "ip_origen": f"10.{i % 250}.{i % 200}.{i % 100}",
+                    "ip_destino": "200.105.122.1",
+                    "host_name": f"WS-{i:06d}",
+                    "usuario_afectado": f"user{i}",
+                    "firma_id": str(i % 5000),
+                }
+                for i in range(1, count + 1)
+            ],
+        )
+        connection.execute(text("ANALYZE"))
+
+
+def or_filter(search):
+    # The filter _search_filter built before the UNION
+    term = search.strip()
+    ts_query = func.to_tsquery(TICKET_SEARCH_LANGUAGE, prefix_tsquery(search))
+    return or_(
+        ticket_search_vector.op("@@")(ts_query),
+        Ticket.ticket_uid == term,
+        Ticket.id.in_(
+            select(Alert.ticket_id).where(
+                or_(
+                    Alert.ip_origen == term,
+                    Alert.ip_destino == term,
+                    Alert.host_name == term,
+                    Alert.usuario_afectado == term,
+                    Alert.firma_id == term,
+                )
+            )
+        ),
+    )
+
+
+def explain(connection, search_filter, iterations):
+    query = select(func.count()).select_from(Ticket).where(search_filter)
+    sql = str(
+        query.compile(
+            dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+    total = 0.0
+    for _ in range(iterations):
+        (plan,) = connection.execute(
+            text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+        ).scalar()
+        total += plan["Execution Time"]
+    return plan["Plan"], total / iterations
+
+
+def scan_nodes(node):
+    nodes = []
+    if "Scan" in node["Node Type"] or node["Node Type"] == "BitmapOr":
+        nodes.append(f"{node['Node Type']} on {node.get('Relation Name', '-')}")
+    for child in node.get("Plans", []):
+        nodes.extend(scan_nodes(child))
+    return nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=200000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine_in_schema()
+    try:
+        seed(engine, args.tickets)
+        with Session(engine) as session:
+            union_filter, _ = ticket_repository._search_filter(session, SEARCH)
+        with engine.connect() as connection:
+            for name, search_filter in (
+                ("or", or_filter(SEARCH)),
+                ("union", union_filter),
+            ):
+                plan, elapsed = explain(connection, search_filter, args.iterations)
+                nodes = ", ".join(sorted(set(scan_nodes(plan))))
+                print(f"{name:<6} {elapsed:>10.2f} ms  {nodes}")
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark of ticket list page rendering: ORM entities + TicketInDB.from_orm +
+jsonable_encoder versus flat row tuples + ticket_serializer + orjson.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.bench_ticket_serialization [--rows N] [--iterations N]
+
+Both paths query the same page of an in-memory SQLite database (fields=all)
+and render the JSON body; reports rows/sec for each and the speedup.
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+
+from benchmarks.bench_ticket_list import create_session, seed  # noqa: E402
+from repositories.ticket_repository import (  # noqa: E402
+    ticket_count_cache,
+    ticket_repository,
+)
+from schemas.ticket import TicketInDB  # noqa: E402
+from services.ticket_service import ticket_service  # noqa: E402
+
+
+def render_from_orm(session, rows):
+    # Ticket list rendering before ticket_serializer
+    tickets, total_count, _ = ticket_repository.get_tickets_with_details(
+        session, limit=rows
+    )
+    result = []
+    for ticket_obj, first_name, last_name, has_raw_logs in tickets:
+        ticket_in_db = TicketInDB.from_orm(ticket_obj)
+        if ticket_obj.creado_en:
+            ticket_in_db.creado_en = ticket_obj.creado_en.isoformat() + "Z"
+        if ticket_obj.actualizado_en:
+            ticket_in_db.actualizado_en = ticket_obj.actualizado_en.isoformat() + "Z"
+        if ticket_obj.cerrado_en:
+            ticket_in_db.cerrado_en = ticket_obj.cerrado_en.isoformat() + "Z"
+        ticket_in_db.reportado_por_nombre = (
+            f"{first_name} {last_name}" if first_name and last_name else "Sistema"
+        )
+        ticket_in_db.has_raw_logs = bool(has_raw_logs)
+        result.append(ticket_in_db)
+    return JSONResponse(
+        content=jsonable_encoder({"total_count": total_count, "tickets": result})
+    ).body
+
+
+def render_from_rows(session, rows):
+    tickets, total_count, _ = ticket_service.get_paginated_tickets(
+        session, limit=rows, fields="all"
+    )
+    return ORJSONResponse(content={"total_count": total_count, "tickets": tickets}).body
+
+
+def measure(render, session, rows, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render(session, rows)
+        session.expire_all()
+    return rows * iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    session = create_session()
+    seed(session, args.rows)
+    # The count is cached across iterations in both paths
+    ticket_count_cache.clear()
+
+    results = {
+        name: measure(render, session, args.rows, args.iterations)
+        for name, render in (
+            ("from_orm + jsonable_encoder", render_from_orm),
+            ("row tuples + orjson", render_from_rows),
+        )
+    }
+    baseline = results["from_orm + jsonable_encoder"]
+    print(f"{'path':<30} {'rows/sec':>12} {'speedup':>8}")
+    for name, rate in results.items():
+        print(f"{name:<30} {rate:>12.0f} {rate / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+# Set TESTING environment variable to True before importing app and db.session
+os.environ["TESTING"] = "True"
+
+from main import app  # noqa: E402
+from api import deps  # noqa: E402
+from db.base import Base  # noqa: E402
+from db.session import SessionLocal, engine  # noqa: E402
+from db.models import Ticket, User  # noqa: E402
+from repositories.ticket_repository import ticket_count_cache  # noqa: E402
+from services.correlation_service import incident_correlation_service  # noqa: E402
+from services.ticket_cache import ticket_list_cache  # noqa: E402
+
+
+@pytest.fixture()
+def db_session():
+    """
+    Session on freshly created tables, with the in-process caches cleared.
+    """
+    Base.metadata.create_all(bind=engine)
+    incident_correlation_service.clear()
+    ticket_count_cache.clear()
+    ticket_list_cache.invalidate()
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture()
+def sample_tickets(db_session):
+    """
+    User 1 (José Núñez) and two tickets: 1 'Nuevo' reported by them, 2
+    'Cerrado' without reporter.
+    """
+    reporter = User(
+        username="analyst",
+        first_name="José",
+        last_name="Núñez",
+        email="analyst@example.com",
+        password_hash="x",
+    )
+    db_session.add(reporter)
+    db_session.flush()
+    tickets = [
+        Ticket(
+            ticket_uid="TCK-2025-000001",
+            estado="Nuevo",
+            severidad="Alta",
+            resumen='Acceso "sospechoso" desde 10.0.0.1   ñandú',
+            descripcion="Línea 1\nLínea 2\t\x01",
+            creado_en=datetime(2025, 3, 1, 12, 0, 0),
+            sla_vencimiento=datetime(2025, 3, 2, 12, 0, 0, 250),
+            reportado_por_id=reporter.id,
+        ),
+        Ticket(
+            ticket_uid="TCK-2025-000002",
+            estado="Cerrado",
+            severidad="Baja",
+            resumen="Escaneo de puertos",
+            creado_en=datetime(2025, 3, 1, 12, 0, 0, 123456),
+            cerrado_en=datetime(2025, 3, 3, 8, 30, 0),
+            rule_description="Regla <b>&</b> descripción",
+        ),
+    ]
+    db_session.add_all(tickets)
+    db_session.commit()
+    return tickets
+
+
+@pytest.fixture()
+def client(db_session, sample_tickets):
+    """
+    API client using `db_session`, authenticated as user 1.
+    """
+    app.dependency_overrides[deps.get_db] = lambda: db_session
+    app.dependency_overrides[deps.get_current_user] = lambda: db_session.get(User, 1)
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(deps.get_db)
+        app.dependency_overrides.pop(deps.get_current_user)
+
+
+@contextmanager
+def _recorded_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture()
+def recorded_queries():
+    """
+    Context manager collecting the SQL statements executed inside it.
+    """
+    return _recorded_queries
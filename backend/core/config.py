@@ -24,4 +24,92 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 120
 ARGENTINA_TIMEZONE = pytz.timezone("America/Argentina/Buenos_Aires")
 
 # Application version
-VERSION = os.getenv("VERSION", "unknown") # Default to "unknown" if not set
\ No newline at end of file
+VERSION = os.getenv("VERSION", "unknown")  # Default to "unknown" if not set
+
+# Asynchronous SIEM ingestion queue
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
+INGEST_POLL_INTERVAL_SECONDS = float(os.getenv("INGEST_POLL_INTERVAL_SECONDS", "1.0"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+# Claims older than this are taken as abandoned (worker died or hung) and
+# requeued; keep it well above the time a batch takes to process
+INGEST_CLAIM_TIMEOUT_SECONDS = int(os.getenv("INGEST_CLAIM_TIMEOUT_SECONDS", "600"))
+
+# Maximum size accepted for a single SIEM ingestion request / XML incident
+SIEM_MAX_PAYLOAD_BYTES = int(os.getenv("SIEM_MAX_PAYLOAD_BYTES", str(20 * 1024 * 1024)))
+
+# SIEM incident deduplication (0 disables correlation into open tickets)
+DEDUP_WINDOW_SECONDS = int(os.getenv("DEDUP_WINDOW_SECONDS", "900"))
+DEDUP_CACHE_SIZE = int(os.getenv("DEDUP_CACHE_SIZE", "10000"))
+DEDUP_MAX_RAW_LOGS = int(os.getenv("DEDUP_MAX_RAW_LOGS", "100"))
+
+# Native syslog listener (UDP + TCP) feeding the SIEM parsers
+SYSLOG_ENABLED = os.getenv("SYSLOG_ENABLED", "False") == "True"
+SYSLOG_HOST = os.getenv("SYSLOG_HOST", "0.0.0.0")
+SYSLOG_UDP_PORT = int(os.getenv("SYSLOG_UDP_PORT", "5514"))
+SYSLOG_TCP_PORT = int(os.getenv("SYSLOG_TCP_PORT", "5514"))
+SYSLOG_BATCH_SIZE = int(os.getenv("SYSLOG_BATCH_SIZE", "500"))
+SYSLOG_FLUSH_INTERVAL_MS = int(os.getenv("SYSLOG_FLUSH_INTERVAL_MS", "200"))
+SYSLOG_QUEUE_SIZE = int(os.getenv("SYSLOG_QUEUE_SIZE", "10000"))
+SYSLOG_MAX_MESSAGE_BYTES = int(os.getenv("SYSLOG_MAX_MESSAGE_BYTES", "65536"))
+
+# zlib level used for the compressed ticket raw log store (1 = fastest, 9 = smallest)
+RAW_LOG_COMPRESSION_LEVEL = int(os.getenv("RAW_LOG_COMPRESSION_LEVEL", "6"))
+
+# Short-lived cache of exact ticket list counts, keyed by the filter set
+TICKET_COUNT_CACHE_TTL_SECONDS = float(
+    os.getenv("TICKET_COUNT_CACHE_TTL_SECONDS", "30")
+)
+TICKET_COUNT_CACHE_SIZE = int(os.getenv("TICKET_COUNT_CACHE_SIZE", "1024"))
+
+# PostgreSQL text search configuration used for the ticket full-text index
+TICKET_SEARCH_LANGUAGE = os.getenv("TICKET_SEARCH_LANGUAGE", "spanish")
+
+# Opt-in pg_trgm GIN indexes for substring (search_mode=substring) ticket search.
+# Requires permission to CREATE EXTENSION pg_trgm.
+TICKET_TRIGRAM_INDEX = os.getenv("TICKET_TRIGRAM_INDEX", "False") == "True"
+
+# Streaming ticket export (GET /tickets/export): rows fetched per server-side
+# cursor batch and gzip level of compressed exports
+TICKET_EXPORT_BATCH_SIZE = int(os.getenv("TICKET_EXPORT_BATCH_SIZE", "1000"))
+TICKET_EXPORT_GZIP_LEVEL = int(os.getenv("TICKET_EXPORT_GZIP_LEVEL", "6"))
+
+# In-memory cache of ticket list pages, invalidated on every ticket write.
+# Pages larger than TICKET_LIST_CACHE_MAX_ENTRY_BYTES (as JSON) are not cached.
+TICKET_LIST_CACHE_SIZE = int(os.getenv("TICKET_LIST_CACHE_SIZE", "256"))
+TICKET_LIST_CACHE_MAX_ENTRY_BYTES = int(
+    os.getenv("TICKET_LIST_CACHE_MAX_ENTRY_BYTES", str(512 * 1024))
+)
+
+# Maximum number of tickets a single POST /tickets/bulk request may change
+TICKET_BULK_MAX_IDS = int(os.getenv("TICKET_BULK_MAX_IDS", "500"))
+
+# Read/write buffer used when storing uploaded evidence files (hashed while written)
+EVIDENCE_COPY_BUFFER_BYTES = int(
+    os.getenv("EVIDENCE_COPY_BUFFER_BYTES", str(1024 * 1024))
+)
+
+# Evidence blob garbage collector: how often it runs, how long a blob must stay
+# unreferenced before it is removed, and how many blobs it removes per pass
+EVIDENCE_GC_INTERVAL_SECONDS = float(os.getenv("EVIDENCE_GC_INTERVAL_SECONDS", "300"))
+EVIDENCE_GC_GRACE_SECONDS = int(os.getenv("EVIDENCE_GC_GRACE_SECONDS", "3600"))
+EVIDENCE_GC_BATCH_SIZE = int(os.getenv("EVIDENCE_GC_BATCH_SIZE", "100"))
+# How often it also walks the blob store for files without a blob row
+EVIDENCE_GC_ORPHAN_SCAN_SECONDS = float(
+    os.getenv("EVIDENCE_GC_ORPHAN_SCAN_SECONDS", str(6 * 3600))
+)
+
+# Resumable evidence uploads (POST /tickets/{id}/uploads): largest file, largest
+# chunk per PUT, open sessions per user, and idle time before a session expires
+EVIDENCE_UPLOAD_MAX_BYTES = int(
+    os.getenv("EVIDENCE_UPLOAD_MAX_BYTES", str(5 * 1024 * 1024 * 1024))
+)
+EVIDENCE_UPLOAD_CHUNK_MAX_BYTES = int(
+    os.getenv("EVIDENCE_UPLOAD_CHUNK_MAX_BYTES", str(16 * 1024 * 1024))
+)
+EVIDENCE_UPLOAD_MAX_SESSIONS_PER_USER = int(
+    os.getenv("EVIDENCE_UPLOAD_MAX_SESSIONS_PER_USER", "3")
+)
+EVIDENCE_UPLOAD_SESSION_TTL_SECONDS = int(
+    os.getenv("EVIDENCE_UPLOAD_SESSION_TTL_SECONDS", str(24 * 3600))
+)
@@ -1,5 +1,6 @@
 from sqlalchemy import (
     Column,
+    BigInteger,
     Integer,
     String,
     Text,
@@ -8,12 +9,37 @@ from sqlalchemy import (
     Boolean,
     Date,
     Table,
+    LargeBinary,
+    Index,
+    literal_column,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import Base
 from datetime import datetime
 
+# Ticket states in which repeated incidents are no longer correlated
+CLOSED_TICKET_STATES = ("Cerrado", "Resuelto")
+
+
+def open_ticket_clause(estado):
+    """
+    estado NOT IN CLOSED_TICKET_STATES, with the states rendered inline rather
+    than as bound parameters so the planner can match it against the predicate
+    of the partial ix_tickets_open_fingerprint index.
+    """
+    return estado.notin_(
+        [literal_column(f"'{state}'") for state in CLOSED_TICKET_STATES]
+    )
+
+
+def dialect_index(dialect, *args, **kwargs):
+    """
+    Index created only on the given dialect. The dialect is also kept in the
+    index's info so that migrations can pick the variant for their database.
+    """
+    return Index(*args, info={"dialect": dialect}, **kwargs).ddl_if(dialect=dialect)
+
 
 # Association Table for Roles and Permissions
 role_permissions = Table('role_permissions', Base.metadata,
@@ -69,7 +95,7 @@ class Ticket(Base):
     __tablename__ = "tickets"
     id = Column(Integer, primary_key=True, index=True)
     ticket_uid = Column(String(20), unique=True, nullable=False, index=True)
-    estado = Column(String(50), nullable=False, index=True)
+    estado = Column(String(50), nullable=False)  # See __table_args__
     severidad = Column(String(50), nullable=False, index=True)
     resumen = Column(String(255), nullable=False)
     descripcion = Column(Text)
@@ -81,7 +107,8 @@ class Ticket(Base):
     )  # Added index
     cerrado_en = Column(DateTime)
     reportado_por_id = Column(Integer, ForeignKey("users.id"), index=True)
-    asignado_a_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # Indexed by ix_tickets_asignado_a_id_estado
+    asignado_a_id = Column(Integer, ForeignKey("users.id"))
     sla_vencimiento = Column(DateTime)
     categoria = Column(String(100), index=True)
     platform = Column(String(100), index=True, nullable=True)
@@ -89,9 +116,76 @@ class Ticket(Base):
     rule_name = Column(String(255), nullable=True)
     rule_description = Column(Text, nullable=True)
     rule_remediation = Column(Text, nullable=True)
-    raw_logs = Column(Text, nullable=True)
+    fingerprint = Column(String(64), nullable=True)  # See ix_tickets_open_fingerprint
+    # Normalized indicators (IPs, hosts, users, hashes) for substring search
+    iocs = Column(Text, nullable=True)
+    ocurrencias = Column(Integer, nullable=False, default=1)
+    ultima_ocurrencia = Column(DateTime, default=datetime.utcnow)
 
     comments = relationship("TicketComment", back_populates="ticket")
+    # Raw logs live in their own table and are only loaded on demand
+    raw_log_segments = relationship(
+        "TicketRawLog",
+        order_by="TicketRawLog.id",
+        cascade="all, delete-orphan",
+        lazy="select",
+    )
+
+    __table_args__ = (
+        # "Assigned to me" lists and counts, optionally by estado
+        Index("ix_tickets_asignado_a_id_estado", asignado_a_id, estado),
+        # Lists filtered by estado in the default creado_en DESC NULLS LAST, id
+        # DESC order. SQLite sorts NULLs first, so a plain DESC index matches
+        # there and it does not accept NULLS LAST in an index.
+        dialect_index(
+            "postgresql",
+            "ix_tickets_estado_creado_en",
+            estado,
+            creado_en.desc().nulls_last(),
+            id.desc(),
+        ),
+        dialect_index(
+            "sqlite",
+            "ix_tickets_estado_creado_en",
+            estado,
+            creado_en.desc(),
+            id.desc(),
+        ),
+        # Correlation of repeated incidents only looks at open tickets
+        Index(
+            "ix_tickets_open_fingerprint",
+            fingerprint,
+            id.desc(),
+            postgresql_where=open_ticket_clause(estado),
+            sqlite_where=open_ticket_clause(estado),
+        ),
+        # "Assigned to me" counts of open tickets. estado is carried along so
+        # that SQLite, without statistics, prefers it to the full index above.
+        Index(
+            "ix_tickets_open_asignado_a_id",
+            asignado_a_id,
+            estado,
+            postgresql_where=open_ticket_clause(estado),
+            sqlite_where=open_ticket_clause(estado),
+        ),
+    )
+
+
+class TicketRawLog(Base):
+    __tablename__ = "ticket_raw_logs"
+    id = Column(Integer, primary_key=True, index=True)
+    ticket_id = Column(
+        Integer, ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    contenido = Column(LargeBinary, nullable=False)  # zlib-compressed UTF-8 text
+    tamano = Column(Integer, nullable=False)  # Uncompressed size in bytes
+    creado_en = Column(DateTime, default=datetime.utcnow)
+
+
+class TicketUidCounter(Base):
+    __tablename__ = "ticket_uid_counters"
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    last_value = Column(Integer, nullable=False, default=0)
 
 
 class TicketComment(Base):
@@ -149,6 +243,40 @@ class Evidence(Base):
     )  # Added index
 
 
+class EvidenceBlob(Base):
+    """
+    Content-addressed evidence file, shared by every Evidence row with the
+    same hash_sha256. `ref_count` counts those rows; blobs left at zero since
+    `sin_referencias_desde` are removed by the evidence garbage collector.
+    """
+
+    __tablename__ = "evidence_blobs"
+    hash_sha256 = Column(String(64), primary_key=True)
+    ruta_almacenamiento = Column(String(512), nullable=False)
+    tamano = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    creado_en = Column(DateTime, default=datetime.utcnow)
+    sin_referencias_desde = Column(DateTime, nullable=True, index=True)
+
+
+class EvidenceUpload(Base):
+    """
+    Resumable upload session for one evidence file: chunks are appended to a
+    partial file until `recibido` reaches `tamano`, then the file is stored as
+    a blob and attached to the ticket as an Evidence row.
+    """
+
+    __tablename__ = "evidence_uploads"
+    id = Column(String(36), primary_key=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False, index=True)
+    usuario_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    nombre_archivo = Column(String(255), nullable=False)
+    tamano = Column(BigInteger, nullable=False)
+    recibido = Column(BigInteger, nullable=False, default=0)
+    creado_en = Column(DateTime, default=datetime.utcnow)
+    actualizado_en = Column(DateTime, default=datetime.utcnow, index=True)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
     id = Column(Integer, primary_key=True, index=True)
@@ -224,3 +352,16 @@ class Setting(Base):
     id = Column(Integer, primary_key=True, index=True)
     key = Column(String(100), unique=True, nullable=False, index=True)  # Added index
     value = Column(String(255), nullable=False)
+
+
+class IngestQueueItem(Base):
+    __tablename__ = "ingest_queue"
+    id = Column(Integer, primary_key=True, index=True)
+    payload = Column(Text, nullable=False)
+    estado = Column(String(20), nullable=False, default="pendiente", index=True)
+    intentos = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    recibido_en = Column(DateTime, default=datetime.utcnow, index=True)
+    # When a worker last claimed it; stale claims are requeued by claim_batch
+    reclamado_en = Column(DateTime, nullable=True)
+    procesado_en = Column(DateTime, nullable=True)
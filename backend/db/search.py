@@ -0,0 +1,74 @@
+import re
+
+from sqlalchemy import literal_column, text
+from sqlalchemy.engine import Engine
+
+from core.config import TICKET_SEARCH_LANGUAGE, TICKET_TRIGRAM_INDEX
+
+if not re.fullmatch(r"\w+", TICKET_SEARCH_LANGUAGE):
+    raise ValueError(f"Invalid TICKET_SEARCH_LANGUAGE: {TICKET_SEARCH_LANGUAGE!r}")
+
+# Weighted full-text document of a ticket: identifiers and titles rank above
+# descriptions, which rank above remediation text.
+_TICKET_SEARCH_DOCUMENT = " || ".join(
+    f"setweight(to_tsvector('{TICKET_SEARCH_LANGUAGE}'::regconfig, "
+    f"coalesce({column}, '')), '{weight}')"
+    for column, weight in (
+        ("ticket_uid", "A"),
+        ("resumen", "A"),
+        ("rule_name", "A"),
+        ("descripcion", "B"),
+        ("rule_description", "B"),
+        ("rule_remediation", "C"),
+    )
+)
+
+# Generated column, so PostgreSQL keeps it up to date on every INSERT/UPDATE
+_TICKET_SEARCH_DDL = (
+    "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({_TICKET_SEARCH_DOCUMENT}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_search_vector "
+    "ON tickets USING GIN (search_vector)",
+)
+
+# Trigram indexes let ILIKE '%fragment%' on identifiers and IOCs use an index
+_TICKET_TRIGRAM_DDL = ("CREATE EXTENSION IF NOT EXISTS pg_trgm",) + tuple(
+    f"CREATE INDEX IF NOT EXISTS ix_tickets_{column}_trgm "
+    f"ON tickets USING GIN ({column} gin_trgm_ops)"
+    for column in ("ticket_uid", "rule_name", "iocs")
+)
+
+ticket_search_vector = literal_column("tickets.search_vector")
+
+_SEARCH_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def supports_full_text_search(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def ensure_ticket_search_index(engine: Engine) -> None:
+    """
+    Adds the tickets.search_vector column and its GIN index if missing, and the
+    pg_trgm indexes when TICKET_TRIGRAM_INDEX is enabled.
+    A no-op on databases other than PostgreSQL.
+    """
+    if not supports_full_text_search(engine):
+        return
+    statements = _TICKET_SEARCH_DDL
+    if TICKET_TRIGRAM_INDEX:
+        statements += _TICKET_TRIGRAM_DDL
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+
+def prefix_tsquery(search: str) -> str:
+    """
+    Turns free text into a to_tsquery expression that requires every word,
+    each one matched as a prefix ("seg malw" -> "seg:* & malw:*"). Returns an
+    empty string if the text has no searchable words.
+    """
+    return " & ".join(
+        f"{term}:*" for term in _SEARCH_TERM_PATTERN.findall(search.lower())
+    )
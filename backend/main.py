@@ -21,12 +21,18 @@ from api.routers import (
     eml,
     dashboard,
     system,
+    syslog,
 )
 from db.session import SessionLocal
 from db.base import Base
 from db.session import engine
+from db.search import ensure_ticket_search_index
 from db.models import User, Role, Permission
 from core.security import get_password_hash
+from services.ingest_service import ingest_worker_pool
+from services.evidence_gc import evidence_gc
+from services.syslog_service import syslog_listener
+from core.config import SYSLOG_ENABLED
 
 
 # Configure logging
@@ -39,6 +45,7 @@ logger = logging.getLogger(__name__)
 if os.getenv("TESTING") != "True":
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    ensure_ticket_search_index(engine)
 
 app = FastAPI(
     title="CiberCase API",
@@ -71,6 +78,7 @@ app.include_router(websockets.router, prefix="/api/v1/ws", tags=["websockets"])
 app.include_router(eml.router, prefix="/api/v1/eml", tags=["eml"])
 app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["dashboard"])
 app.include_router(system.router, prefix="/api/v1/system", tags=["system"])
+app.include_router(syslog.router, prefix="/api/v1/syslog", tags=["syslog"])
 
 
 def create_initial_data(db: SessionLocal):
@@ -190,3 +198,14 @@ async def startup_event():
             print("Application startup complete.")
         finally:
             db.close()
+        await ingest_worker_pool.start()
+        await evidence_gc.start()
+        if SYSLOG_ENABLED:
+            await syslog_listener.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await syslog_listener.stop()
+    await ingest_worker_pool.stop()
+    await evidence_gc.stop()
@@ -0,0 +1,80 @@
+"""
+Mueve los raw_logs existentes de la tabla tickets al almacenamiento comprimido
+(ticket_raw_logs) y elimina la columna tickets.raw_logs.
+
+Uso (desde el directorio backend):
+
+    python migrate_raw_logs.py [--batch-size N] [--keep-column]
+
+Es idempotente: los tickets que ya tienen raw logs comprimidos se omiten. En
+PostgreSQL conviene ejecutar VACUUM FULL tickets después para recuperar el
+espacio ocupado por la columna eliminada.
+"""
+
+import argparse
+import logging
+
+from sqlalchemy import bindparam, insert, inspect, text
+
+from db.session import engine
+from db.models import TicketRawLog
+from repositories.ticket_repository import compress_raw_log
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+_SELECT_PENDING = text(
+    "SELECT t.id, t.raw_logs FROM tickets t "
+    "WHERE t.id > :last_id AND t.raw_logs IS NOT NULL AND t.raw_logs <> '' "
+    "AND NOT EXISTS (SELECT 1 FROM ticket_raw_logs r WHERE r.ticket_id = t.id) "
+    "ORDER BY t.id LIMIT :limit"
+).bindparams(bindparam("last_id"), bindparam("limit"))
+
+
+def migrate_raw_logs(batch_size: int = 500, keep_column: bool = False):
+    columns = {column["name"] for column in inspect(engine).get_columns("tickets")}
+    if "raw_logs" not in columns:
+        logger.info("La columna tickets.raw_logs ya no existe; nada que migrar.")
+        return
+
+    TicketRawLog.__table__.create(bind=engine, checkfirst=True)
+
+    migrated = 0
+    last_id = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                _SELECT_PENDING, {"last_id": last_id, "limit": batch_size}
+            ).all()
+            if not rows:
+                break
+            connection.execute(
+                insert(TicketRawLog),
+                [
+                    {"ticket_id": ticket_id, **compress_raw_log(raw_logs)}
+                    for ticket_id, raw_logs in rows
+                ],
+            )
+        migrated += len(rows)
+        last_id = rows[-1][0]
+        logger.info(f"{migrated} tickets migrados (último id {last_id}).")
+
+    if not keep_column:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE tickets DROP COLUMN raw_logs"))
+        logger.info("Columna tickets.raw_logs eliminada.")
+    logger.info(f"Migración completada: {migrated} tickets con raw logs comprimidos.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--keep-column",
+        action="store_true",
+        help="No eliminar tickets.raw_logs después de copiar los datos.",
+    )
+    args = parser.parse_args()
+    migrate_raw_logs(batch_size=args.batch_size, keep_column=args.keep_column)
@@ -0,0 +1,79 @@
+"""
+Crea los índices compuestos y parciales de tickets en una base existente y
+elimina los índices de una sola columna a los que reemplazan.
+
+Uso (desde el directorio backend):
+
+    python migrate_ticket_indexes.py [--keep-old-indexes]
+
+Es idempotente. Las bases nuevas ya los obtienen de db/models.py con
+create_all. En PostgreSQL cada índice se crea con CREATE INDEX CONCURRENTLY
+para no bloquear las escrituras del ingest mientras se construye.
+"""
+
+import argparse
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from db.session import engine
+from db.models import Ticket
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+NEW_INDEXES = (
+    "ix_tickets_asignado_a_id_estado",
+    "ix_tickets_estado_creado_en",
+    "ix_tickets_open_fingerprint",
+    "ix_tickets_open_asignado_a_id",
+)
+
+# Single-column indexes covered by the leading column of a new index
+REPLACED_INDEXES = (
+    "ix_tickets_asignado_a_id",
+    "ix_tickets_estado",
+    "ix_tickets_fingerprint",
+)
+
+
+def migrate_ticket_indexes(keep_old_indexes: bool = False):
+    existing = {index["name"] for index in inspect(engine).get_indexes("tickets")}
+    dialect = engine.dialect.name
+    postgresql = dialect == "postgresql"
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for index in Ticket.__table__.indexes:
+            if index.name not in NEW_INDEXES or index.name in existing:
+                continue
+            # Variants for another dialect (see db.models.dialect_index)
+            if index.info.get("dialect", dialect) != dialect:
+                continue
+            ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+            if postgresql:
+                ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+            conn.execute(text(ddl))
+            logger.info(f"Índice {index.name} creado.")
+
+        if keep_old_indexes:
+            return
+        for name in REPLACED_INDEXES:
+            if name in existing:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+                logger.info(f"Índice {name} eliminado.")
+    logger.info("Migración de índices de tickets completada.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--keep-old-indexes",
+        action="store_true",
+        help="No eliminar los índices de una sola columna reemplazados.",
+    )
+    args = parser.parse_args()
+    migrate_ticket_indexes(keep_old_indexes=args.keep_old_indexes)
@@ -4,6 +4,8 @@ from .ticket_comment_repository import ticket_comment_repository
 from .report_repository import report_repository
 from .form_repository import form_repository
 from .audit_log_repository import audit_log_repository
+from .ingest_queue_repository import ingest_queue_repository
+from .alert_repository import alert_repository
 
 __all__ = [
     "user_repository",
@@ -12,4 +14,6 @@ __all__ = [
     "report_repository",
     "form_repository",
     "audit_log_repository",
+    "ingest_queue_repository",
+    "alert_repository",
 ]
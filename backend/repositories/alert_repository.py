@@ -0,0 +1,87 @@
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+
+from db.models import Alert
+from schemas.alert import AlertCreate
+
+# Column sizes of the indexed Alert fields, used to truncate parsed values
+_ALERT_FIELD_LIMITS = {
+    "fuente": 50,
+    "vendor": 50,
+    "producto": 50,
+    "tipo_evento": 100,
+    "severidad": 50,
+    "ip_origen": 45,
+    "ip_destino": 45,
+    "host_name": 255,
+    "usuario_afectado": 100,
+    "firma_id": 100,
+    "correlacion_id": 100,
+}
+
+
+class AlertRepository:
+    def create_many(
+        self, db: Session, *, objs_in: List[AlertCreate], ticket_ids: List[int]
+    ) -> None:
+        """
+        Inserts one alert per (obj_in, ticket_id) pair with a single executemany
+        INSERT. Does not commit: the caller owns the transaction.
+        """
+        if not objs_in:
+            return
+        now = datetime.utcnow()
+        rows = []
+        for obj_in, ticket_id in zip(objs_in, ticket_ids):
+            row = obj_in.dict()
+            for field, limit in _ALERT_FIELD_LIMITS.items():
+                if row[field] is not None:
+                    row[field] = row[field][:limit]
+            row["ticket_id"] = ticket_id
+            row["recibido_en"] = now
+            rows.append(row)
+        db.execute(insert(Alert), rows)
+
+    def remove_for_ticket(self, db: Session, *, ticket_id: int) -> int:
+        """
+        Deletes the alerts of a ticket. Returns the number deleted. Does not
+        commit: the caller owns the transaction.
+        """
+        return db.execute(
+            delete(Alert)
+            .where(Alert.ticket_id == ticket_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    def get_by_indicator(
+        self,
+        db: Session,
+        *,
+        ip: Optional[str] = None,
+        host_name: Optional[str] = None,
+        usuario: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Alert]:
+        """
+        Pivots on exact indicator values using the indexed alert columns.
+        An IP matches either the source or the destination address.
+        """
+        query = db.query(Alert)
+        if ip:
+            query = query.filter((Alert.ip_origen == ip) | (Alert.ip_destino == ip))
+        if host_name:
+            query = query.filter(Alert.host_name == host_name)
+        if usuario:
+            query = query.filter(Alert.usuario_afectado == usuario)
+        return (
+            query.order_by(Alert.recibido_en.desc(), Alert.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+
+alert_repository = AlertRepository()
@@ -1,5 +1,7 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from typing import List, Tuple
+from datetime import datetime
 
 from db.base import BaseRepository
 from db.models import AuditLog, User
@@ -15,6 +17,20 @@ class AuditLogRepository(BaseRepository[AuditLog, AuditLogBase, AuditLogBase]):
             .all()
         )
 
+    def create_many(self, db: Session, *, objs_in: List[AuditLogBase]) -> None:
+        """
+        Inserts several audit log entries with a single executemany INSERT.
+        Does not commit: the caller owns the transaction.
+        """
+        if not objs_in:
+            return
+        now = datetime.utcnow()
+        rows = [obj_in.dict() for obj_in in objs_in]
+        for row in rows:
+            if row["timestamp"] is None:
+                row["timestamp"] = now
+        db.execute(insert(AuditLog), rows)
+
     def get_multi_with_actor_details(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[Tuple[AuditLog, str]]:
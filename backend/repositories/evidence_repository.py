@@ -0,0 +1,256 @@
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db.models import Evidence, EvidenceBlob, EvidenceUpload
+
+
+class EvidenceRepository:
+    def add_reference(self, db: Session, *, hash_sha256: str) -> Optional[str]:
+        """
+        Counts one more Evidence row for the blob with this hash and returns its
+        storage path, or None if there is no such blob. The UPDATE locks the
+        blob row until the caller's transaction ends, so the garbage collector
+        cannot remove it in between.
+        """
+        return db.execute(
+            update(EvidenceBlob)
+            .where(EvidenceBlob.hash_sha256 == hash_sha256)
+            .values(
+                ref_count=EvidenceBlob.ref_count + 1,
+                sin_referencias_desde=None,
+            )
+            .returning(EvidenceBlob.ruta_almacenamiento)
+        ).scalar()
+
+    def create_blob(
+        self, db: Session, *, hash_sha256: str, ruta_almacenamiento: str, tamano: int
+    ) -> bool:
+        """
+        Registers a new blob referenced by one Evidence row. Returns False if
+        another transaction registered the same hash first.
+        """
+        try:
+            with db.begin_nested():
+                db.execute(
+                    insert(EvidenceBlob).values(
+                        hash_sha256=hash_sha256,
+                        ruta_almacenamiento=ruta_almacenamiento,
+                        tamano=tamano,
+                        ref_count=1,
+                        creado_en=datetime.utcnow(),
+                    )
+                )
+            return True
+        except IntegrityError:
+            return False
+
+    def remove_for_ticket(self, db: Session, *, ticket_id: int) -> int:
+        """
+        Deletes the Evidence rows of a ticket and releases their blob
+        references; blobs left without references are marked for the garbage
+        collector. Only rows stored at their blob's path hold a reference:
+        files saved before the blob store have the same hash but their own
+        path. Returns the number of rows deleted. Does not commit.
+        """
+        references = db.execute(
+            select(Evidence.hash_sha256, func.count())
+            .join(
+                EvidenceBlob,
+                and_(
+                    EvidenceBlob.hash_sha256 == Evidence.hash_sha256,
+                    EvidenceBlob.ruta_almacenamiento == Evidence.ruta_almacenamiento,
+                ),
+            )
+            .where(Evidence.ticket_id == ticket_id)
+            .group_by(Evidence.hash_sha256)
+        ).all()
+        now = datetime.utcnow()
+        for hash_sha256, count in references:
+            remaining = EvidenceBlob.ref_count - count
+            db.execute(
+                update(EvidenceBlob)
+                .where(EvidenceBlob.hash_sha256 == hash_sha256)
+                .values(
+                    ref_count=remaining,
+                    sin_referencias_desde=case(
+                        (remaining <= 0, now),
+                        else_=EvidenceBlob.sin_referencias_desde,
+                    ),
+                )
+            )
+        return db.execute(
+            delete(Evidence)
+            .where(Evidence.ticket_id == ticket_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    def get_unreferenced(
+        self, db: Session, *, since: datetime, limit: int
+    ) -> List[Tuple[str, str]]:
+        """
+        Returns (hash_sha256, ruta_almacenamiento) of blobs without references
+        since before `since`.
+        """
+        return db.execute(
+            select(EvidenceBlob.hash_sha256, EvidenceBlob.ruta_almacenamiento)
+            .where(
+                EvidenceBlob.ref_count <= 0,
+                EvidenceBlob.sin_referencias_desde < since,
+            )
+            .order_by(EvidenceBlob.sin_referencias_desde)
+            .limit(limit)
+        ).all()
+
+    def get_blob_hashes(self, db: Session, *, hashes: List[str]) -> Set[str]:
+        """
+        Returns which of `hashes` have a blob row.
+        """
+        return set(
+            db.execute(
+                select(EvidenceBlob.hash_sha256).where(
+                    EvidenceBlob.hash_sha256.in_(hashes)
+                )
+            ).scalars()
+        )
+
+    def delete_if_unreferenced(self, db: Session, *, hash_sha256: str) -> bool:
+        """
+        Deletes the blob row unless it was referenced again in the meantime.
+        Does not commit.
+        """
+        return (
+            db.execute(
+                delete(EvidenceBlob).where(
+                    EvidenceBlob.hash_sha256 == hash_sha256,
+                    EvidenceBlob.ref_count <= 0,
+                )
+            ).rowcount
+            == 1
+        )
+
+    def create_upload(self, db: Session, *, obj_in: dict) -> EvidenceUpload:
+        db_obj = EvidenceUpload(**obj_in)
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def count_active_uploads(
+        self, db: Session, *, user_id: int, since: datetime
+    ) -> int:
+        """
+        Counts the upload sessions of a user updated after `since` (the ones
+        that have not expired).
+        """
+        return db.execute(
+            select(func.count())
+            .select_from(EvidenceUpload)
+            .where(
+                EvidenceUpload.usuario_id == user_id,
+                EvidenceUpload.actualizado_en >= since,
+            )
+        ).scalar_one()
+
+    def get_upload(
+        self,
+        db: Session,
+        *,
+        upload_id: str,
+        ticket_id: int,
+        user_id: int,
+        since: datetime,
+    ) -> Optional[EvidenceUpload]:
+        """
+        Returns the user's unexpired upload session for the ticket, if any.
+        """
+        return db.execute(
+            select(EvidenceUpload).where(
+                EvidenceUpload.id == upload_id,
+                EvidenceUpload.ticket_id == ticket_id,
+                EvidenceUpload.usuario_id == user_id,
+                EvidenceUpload.actualizado_en >= since,
+            )
+        ).scalar_one_or_none()
+
+    def advance_upload(
+        self, db: Session, *, upload_id: str, offset: int, recibido: int
+    ) -> bool:
+        """
+        Moves the received offset of an upload from `offset` to `recibido`.
+        Returns False if the upload is no longer at `offset`. Does not commit.
+        """
+        return (
+            db.execute(
+                update(EvidenceUpload)
+                .where(
+                    EvidenceUpload.id == upload_id,
+                    EvidenceUpload.recibido == offset,
+                )
+                .values(recibido=recibido, actualizado_en=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            == 1
+        )
+
+    def remove_upload(self, db: Session, *, upload_id: str) -> bool:
+        """
+        Deletes an upload session. Does not commit.
+        """
+        return (
+            db.execute(
+                delete(EvidenceUpload)
+                .where(EvidenceUpload.id == upload_id)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            == 1
+        )
+
+    def remove_uploads_for_ticket(self, db: Session, *, ticket_id: int) -> List[str]:
+        """
+        Deletes the upload sessions of a ticket and returns their ids. Does not
+        commit.
+        """
+        return (
+            db.execute(
+                delete(EvidenceUpload)
+                .where(EvidenceUpload.ticket_id == ticket_id)
+                .returning(EvidenceUpload.id)
+                .execution_options(synchronize_session=False)
+            )
+            .scalars()
+            .all()
+        )
+
+    def remove_expired_uploads(
+        self, db: Session, *, before: datetime, limit: int
+    ) -> List[str]:
+        """
+        Deletes up to `limit` upload sessions not updated since `before` and
+        returns their ids. Does not commit.
+        """
+        expired = (
+            select(EvidenceUpload.id)
+            .where(EvidenceUpload.actualizado_en < before)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        return (
+            db.execute(
+                delete(EvidenceUpload)
+                .where(
+                    EvidenceUpload.id.in_(expired),
+                    EvidenceUpload.actualizado_en < before,
+                )
+                .returning(EvidenceUpload.id)
+                .execution_options(synchronize_session=False)
+            )
+            .scalars()
+            .all()
+        )
+
+
+evidence_repository = EvidenceRepository()
@@ -0,0 +1,115 @@
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List
+from datetime import datetime
+
+from db.models import IngestQueueItem
+
+
+class IngestQueueRepository:
+    def enqueue(self, db: Session, *, payloads: List[str]) -> List[IngestQueueItem]:
+        db_objs = [IngestQueueItem(payload=payload) for payload in payloads]
+        db.add_all(db_objs)
+        db.commit()
+        return db_objs
+
+    def claim_batch(
+        self, db: Session, *, limit: int, stale_before: datetime, max_attempts: int
+    ) -> List[IngestQueueItem]:
+        """
+        Marks up to `limit` items as being processed and returns them: pending
+        items, and items claimed before `stale_before` whose worker died or hung.
+        Stale claims that have used up their attempts are marked as failed
+        instead. On PostgreSQL the rows are locked with SKIP LOCKED so
+        concurrent workers never claim the same item.
+        """
+        now = datetime.utcnow()
+        stale = and_(
+            IngestQueueItem.estado == "procesando",
+            IngestQueueItem.reclamado_en < stale_before,
+        )
+        db.query(IngestQueueItem).filter(
+            stale, IngestQueueItem.intentos >= max_attempts
+        ).update(
+            {
+                "estado": "error",
+                "error": "Tiempo de procesamiento agotado.",
+                "procesado_en": now,
+            },
+            synchronize_session=False,
+        )
+        items = (
+            db.query(IngestQueueItem)
+            .filter(or_(IngestQueueItem.estado == "pendiente", stale))
+            .order_by(IngestQueueItem.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for item in items:
+            item.estado = "procesando"
+            item.intentos += 1
+            item.reclamado_en = now
+        db.commit()
+        return items
+
+    def mark_done(self, db: Session, *, ids: List[int]) -> None:
+        if ids:
+            db.query(IngestQueueItem).filter(IngestQueueItem.id.in_(ids)).delete(
+                synchronize_session=False
+            )
+        db.commit()
+
+    def mark_failed(self, db: Session, *, errors: Dict[int, str]) -> None:
+        now = datetime.utcnow()
+        for item_id, error in errors.items():
+            db.query(IngestQueueItem).filter(IngestQueueItem.id == item_id).update(
+                {"estado": "error", "error": error, "procesado_en": now},
+                synchronize_session=False,
+            )
+        db.commit()
+
+    def release(
+        self, db: Session, *, ids: List[int], error: str, max_attempts: int
+    ) -> None:
+        """
+        Returns claimed items to the queue after a transient failure, or marks
+        them as failed once they have used up their attempts.
+        """
+        if not ids:
+            return
+        query = db.query(IngestQueueItem).filter(IngestQueueItem.id.in_(ids))
+        query.filter(IngestQueueItem.intentos >= max_attempts).update(
+            {"estado": "error", "error": error, "procesado_en": datetime.utcnow()},
+            synchronize_session=False,
+        )
+        query.filter(IngestQueueItem.estado == "procesando").update(
+            {"estado": "pendiente", "error": error}, synchronize_session=False
+        )
+        db.commit()
+
+    def get_stats(self, db: Session) -> Dict[str, Any]:
+        counts = dict(
+            db.query(IngestQueueItem.estado, func.count(IngestQueueItem.id))
+            .group_by(IngestQueueItem.estado)
+            .all()
+        )
+        oldest_pending = (
+            db.query(func.min(IngestQueueItem.recibido_en))
+            .filter(IngestQueueItem.estado == "pendiente")
+            .scalar()
+        )
+        lag_seconds = (
+            (datetime.utcnow() - oldest_pending).total_seconds()
+            if oldest_pending
+            else 0.0
+        )
+        return {
+            "pending": counts.get("pendiente", 0),
+            "processing": counts.get("procesando", 0),
+            "failed": counts.get("error", 0),
+            "lag_seconds": lag_seconds,
+        }
+
+
+ingest_queue_repository = IngestQueueRepository()
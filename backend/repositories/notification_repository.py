@@ -0,0 +1,30 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import List
+from datetime import datetime
+
+from db.models import Notification
+from schemas.notification import NotificationCreate
+
+
+class NotificationRepository:
+    def create_many(
+        self, db: Session, *, objs_in: List[NotificationCreate], user_ids: List[int]
+    ) -> None:
+        """
+        Inserts one notification per (obj_in, user_id) pair with a single
+        executemany INSERT. Does not commit: the caller owns the transaction.
+        """
+        if not objs_in:
+            return
+        now = datetime.utcnow()
+        rows = []
+        for obj_in, user_id in zip(objs_in, user_ids):
+            row = obj_in.dict()
+            row["user_id"] = user_id
+            row["created_at"] = now
+            rows.append(row)
+        db.execute(insert(Notification), rows)
+
+
+notification_repository = NotificationRepository()
@@ -4,7 +4,7 @@ from sqlalchemy import func, extract
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 
-from db.models import Ticket, Alert
+from db.models import Ticket, Alert, open_ticket_clause
 
 logger = logging.getLogger(__name__)
 
@@ -80,10 +80,11 @@ class ReportRepository:
         return db.query(Ticket).count()
 
     def get_my_assigned_tickets_count(self, db: Session, user_id: int) -> int:
+        # Answered from the partial ix_tickets_open_asignado_a_id index alone
         return (
-            db.query(Ticket)
-            .filter(Ticket.asignado_a_id == user_id, Ticket.estado != "Cerrado")
-            .count()
+            db.query(func.count(Ticket.id))
+            .filter(Ticket.asignado_a_id == user_id, open_ticket_clause(Ticket.estado))
+            .scalar()
         )
 
     def get_ticket_counts_by_category(self, db: Session):
@@ -1,15 +1,177 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import base64
+import binascii
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from itertools import groupby
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 
+from core.config import (
+    RAW_LOG_COMPRESSION_LEVEL,
+    TICKET_SEARCH_LANGUAGE,
+    TICKET_COUNT_CACHE_TTL_SECONDS,
+    TICKET_COUNT_CACHE_SIZE,
+)
 from db.base import BaseRepository
-from db.models import Ticket, User, Alert, Evidence
+from db.search import prefix_tsquery, supports_full_text_search, ticket_search_vector
+from db.models import (
+    Alert,
+    Evidence,
+    Ticket,
+    TicketRawLog,
+    TicketUidCounter,
+    User,
+    open_ticket_clause,
+)
 from schemas.ticket import TicketCreate, TicketUpdate
 
-from sqlalchemy import or_  # Import or_ for search functionality
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    and_,
+    exists,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    text,
+    type_coerce,
+    union,
+    update,
+)
+
+# Pseudo sort column ordering full-text search results by rank
+RELEVANCE_SORT = "relevance"
+
+# Ticket search modes: full-text over ticket fields, or substring over
+# identifiers and IOCs (trigram-indexed when TICKET_TRIGRAM_INDEX is enabled)
+SEARCH_MODES = ("fulltext", "substring")
+
+# Ticket list count modes: exact COUNT(*), planner estimate, or no count at all
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+class TicketCountCache:
+    """
+    In-memory LRU of exact ticket list counts keyed by the normalized filter set.
+    Entries expire after `ttl_seconds`, so a count may lag recent writes by at
+    most that long.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = TICKET_COUNT_CACHE_TTL_SECONDS,
+        max_entries: int = TICKET_COUNT_CACHE_SIZE,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            count, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return count
+
+    def set(self, key: tuple, count: int) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (count, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+ticket_count_cache = TicketCountCache()
+
+
+def compress_raw_log(text: str) -> Dict[str, Any]:
+    """
+    Returns the TicketRawLog column values for a raw log segment.
+    """
+    data = text.encode("utf-8")
+    return {
+        "contenido": zlib.compress(data, RAW_LOG_COMPRESSION_LEVEL),
+        "tamano": len(data),
+    }
+
+
+def decompress_raw_log(contenido: bytes) -> str:
+    return zlib.decompress(contenido).decode("utf-8")
+
+
+def _raw_log_segments(raw_logs: Optional[str]) -> List[TicketRawLog]:
+    return [TicketRawLog(**compress_raw_log(raw_logs))] if raw_logs else []
 
 
 class TicketRepository(BaseRepository[Ticket, TicketCreate, TicketUpdate]):
+    def reserve_ticket_uids(
+        self, db: Session, *, count: int, year: Optional[int] = None
+    ) -> List[str]:
+        """
+        Reserves a contiguous block of `count` ticket UIDs (TCK-YYYY-NNNNNN) from
+        the per-year counter row. The counter row stays locked by the UPDATE until
+        the caller's transaction ends, so concurrent allocations never overlap.
+        """
+        if count <= 0:
+            return []
+        year = year or datetime.utcnow().year
+        last_value = self._increment_uid_counter(db, year=year, count=count)
+        if last_value is None:
+            last_value = self._create_uid_counter(db, year=year, count=count)
+        first_value = last_value - count + 1
+        return [
+            f"TCK-{year}-{number:06d}" for number in range(first_value, last_value + 1)
+        ]
+
+    def _increment_uid_counter(
+        self, db: Session, *, year: int, count: int
+    ) -> Optional[int]:
+        return db.execute(
+            update(TicketUidCounter)
+            .where(TicketUidCounter.year == year)
+            .values(last_value=TicketUidCounter.last_value + count)
+            .returning(TicketUidCounter.last_value)
+        ).scalar()
+
+    def _create_uid_counter(self, db: Session, *, year: int, count: int) -> int:
+        # First allocation of the year: continue after any UID already issued
+        # for it, so tickets created before the counter existed are not reused.
+        last_uid = db.execute(
+            select(func.max(self.model.ticket_uid)).where(
+                self.model.ticket_uid.like(f"TCK-{year}-%")
+            )
+        ).scalar()
+        seed = int(last_uid.rsplit("-", 1)[1]) if last_uid else 0
+        try:
+            with db.begin_nested():
+                db.execute(
+                    insert(TicketUidCounter).values(year=year, last_value=seed + count)
+                )
+            return seed + count
+        except IntegrityError:
+            # Another transaction created the row first; take the next block from it.
+            return self._increment_uid_counter(db, year=year, count=count)
+
     def create_with_owner(
         self,
         db: Session,
@@ -17,16 +179,192 @@ class TicketRepository(BaseRepository[Ticket, TicketCreate, TicketUpdate]):
         obj_in: TicketCreate,
         current_user_id: Optional[int] = None,
     ) -> Ticket:
-        ticket_uid = f"TCK-{datetime.utcnow().strftime('%Y')}-{db.query(self.model).count() + 1:06d}"
+        ticket_uid = self.reserve_ticket_uids(db, count=1)[0]
 
         ticket_data_dict = obj_in.dict(exclude_unset=True)
+        raw_logs = ticket_data_dict.pop("raw_logs", None)
 
         db_obj = self.model(**ticket_data_dict, ticket_uid=ticket_uid)
+        db_obj.raw_log_segments = _raw_log_segments(raw_logs)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def create_many_with_owner(
+        self, db: Session, *, objs_in: List[TicketCreate]
+    ) -> List[Ticket]:
+        """
+        Inserts several tickets in a single flush so the INSERTs are batched.
+        Does not commit: the caller owns the transaction.
+        """
+        ticket_uids = self.reserve_ticket_uids(db, count=len(objs_in))
+
+        db_objs = []
+        for obj_in, ticket_uid in zip(objs_in, ticket_uids):
+            ticket_data_dict = obj_in.dict(exclude_unset=True)
+            raw_logs = ticket_data_dict.pop("raw_logs", None)
+            db_obj = self.model(**ticket_data_dict, ticket_uid=ticket_uid)
+            db_obj.raw_log_segments = _raw_log_segments(raw_logs)
+            db_objs.append(db_obj)
+        db.add_all(db_objs)
+        db.flush()
+        return db_objs
+
+    def get_open_by_fingerprint(
+        self, db: Session, *, fingerprint: str, since: datetime
+    ) -> Optional[Tuple[int, str]]:
+        """
+        Returns (id, ticket_uid) of the most recent open ticket with this
+        fingerprint whose last occurrence is not older than `since`.
+        """
+        return (
+            db.query(self.model.id, self.model.ticket_uid)
+            .filter(
+                self.model.fingerprint == fingerprint,
+                open_ticket_clause(self.model.estado),
+                self.model.ultima_ocurrencia >= since,
+            )
+            .order_by(self.model.id.desc())
+            .first()
+        )
+
+    def register_occurrences(
+        self,
+        db: Session,
+        *,
+        ticket_id: int,
+        fingerprint: str,
+        raw_logs: List[str],
+        seen_at: datetime,
+        since: datetime,
+        max_raw_logs: int,
+    ) -> bool:
+        """
+        Adds repeated occurrences to an open ticket: bumps the counter and
+        last-seen time with a single UPDATE and stores the raw logs as a new
+        compressed segment, up to `max_raw_logs` occurrences. Returns False if the
+        ticket is closed, outside the window or no longer carries this fingerprint.
+        Does not commit.
+        """
+        ocurrencias = db.execute(
+            update(self.model)
+            .where(
+                self.model.id == ticket_id,
+                self.model.fingerprint == fingerprint,
+                open_ticket_clause(self.model.estado),
+                self.model.ultima_ocurrencia >= since,
+            )
+            .values(
+                ocurrencias=self.model.ocurrencias + len(raw_logs),
+                ultima_ocurrencia=seen_at,
+            )
+            .returning(self.model.ocurrencias)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if ocurrencias is None:
+            return False
+        if ocurrencias - len(raw_logs) < max_raw_logs:
+            db.execute(
+                insert(TicketRawLog).values(
+                    ticket_id=ticket_id, **compress_raw_log("\n".join(raw_logs))
+                )
+            )
+        return True
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Ticket,
+        obj_in: Union[TicketUpdate, Dict[str, Any]],
+    ) -> Ticket:
+        update_data = (
+            obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        )
+        if "raw_logs" in update_data:
+            update_data = dict(update_data)
+            db_obj.raw_log_segments = _raw_log_segments(update_data.pop("raw_logs"))
+        return super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    def lock_many(
+        self, db: Session, *, ids: List[int], columns: List[str]
+    ) -> List[Any]:
+        """
+        Selects `columns` (plus id, ticket_uid, resumen and reportado_por_id) of
+        the given tickets FOR UPDATE, in id order so concurrent bulk operations
+        lock rows in the same sequence. Tickets that do not exist are skipped.
+        """
+        names = dict.fromkeys(
+            ["id", "ticket_uid", "resumen", "reportado_por_id", *columns]
+        )
+        return db.execute(
+            select(*(self.model.__table__.columns[name] for name in names))
+            .where(self.model.id.in_(ids))
+            .order_by(self.model.id)
+            .with_for_update()
+        ).all()
+
+    def update_many(
+        self, db: Session, *, ids: List[int], values: Dict[str, Any]
+    ) -> None:
+        """
+        Applies the same column values to every ticket in `ids` with a single
+        UPDATE. Does not commit: the caller owns the transaction.
+        """
+        if ids:
+            db.execute(
+                update(self.model).where(self.model.id.in_(ids)).values(**values)
+            )
+
+    def acknowledge(self, db: Session, *, ticket_id: int, user_id: int) -> bool:
+        """
+        Moves the ticket from 'Nuevo' to 'Abierto' if it is assigned to
+        `user_id`, with a single conditional UPDATE. Returns whether it changed.
+        Does not commit: the caller owns the transaction.
+        """
+        return (
+            db.execute(
+                update(self.model)
+                .where(
+                    self.model.id == ticket_id,
+                    self.model.estado == "Nuevo",
+                    self.model.asignado_a_id == user_id,
+                )
+                .values(estado="Abierto")
+            ).rowcount
+            == 1
+        )
+
+    def get_raw_logs(self, db: Session, *, ticket_id: int) -> Optional[str]:
+        """
+        Loads and decompresses the raw logs of a single ticket.
+        """
+        segments = db.execute(
+            select(TicketRawLog.contenido)
+            .where(TicketRawLog.ticket_id == ticket_id)
+            .order_by(TicketRawLog.id)
+        ).scalars()
+        raw_logs = "\n".join(decompress_raw_log(contenido) for contenido in segments)
+        return raw_logs or None
+
+    def iter_raw_logs(
+        self, db: Session, *, batch_size: int = 100
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Streams (ticket_id, raw_logs) for every ticket that has raw logs, without
+        loading the ticket rows themselves.
+        """
+        rows = db.execute(
+            select(TicketRawLog.ticket_id, TicketRawLog.contenido)
+            .order_by(TicketRawLog.ticket_id, TicketRawLog.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for ticket_id, segments in groupby(rows, key=lambda row: row.ticket_id):
+            yield ticket_id, "\n".join(
+                decompress_raw_log(segment.contenido) for segment in segments
+            )
+
     def get_tickets_with_details(
         self,
         db: Session,
@@ -43,7 +381,242 @@ class TicketRepository(BaseRepository[Ticket, TicketCreate, TicketUpdate]):
         sort_order: Optional[str] = "desc",
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        count_mode: str = "exact",
+        search_mode: str = "fulltext",
+        columns: Optional[List[str]] = None,
     ):
+        """
+        Returns (rows, total_count, next_cursor). Pages are selected with `skip`
+        (offset) unless `cursor` is given, in which case the page starts right
+        after the (sort value, id) position it encodes, which costs the same at
+        any depth. `next_cursor` is None on the last page.
+
+        `count_mode` picks how total_count is computed: "exact" (cached for a few
+        seconds per filter set), "estimate" (PostgreSQL planner estimate, exact
+        elsewhere) or "none" (total_count is None).
+
+        On PostgreSQL `search` uses the full-text index; unless another sort_by is
+        given, matches are ranked by relevance (sort_by="relevance").
+        search_mode="substring" instead matches fragments of the ticket UID, rule
+        name and IOCs.
+
+        Rows are (ticket, first_name, last_name, has_raw_logs). When `columns` is
+        given, only those Ticket columns are read and each row is a flat tuple of
+        them followed by first_name, last_name and has_raw_logs, so no ORM
+        entities are built for list pages.
+        """
+        if count_mode not in COUNT_MODES:
+            raise ValueError(f"Invalid count_mode: {count_mode}")
+        query, filters, ts_query = self._filtered_query(
+            db,
+            status=status,
+            assigned_to_me_id=assigned_to_me_id,
+            severity=severity,
+            created_by_me_id=created_by_me_id,
+            category=category,
+            search=search,
+            search_mode=search_mode,
+            reportado_por_id=reportado_por_id,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        if columns:
+            # id and the sort column are always needed for paging
+            loaded = ["id", *columns]
+            if sort_by and sort_by in self.model.__table__.columns:
+                loaded.append(sort_by)
+            query = query.with_entities(
+                *(getattr(self.model, column) for column in dict.fromkeys(loaded))
+            )
+        total_count = self._count_tickets(db, query, filters, count_mode)
+
+        final_query = self._with_details(query)
+
+        if ts_query is not None and sort_by in (None, RELEVANCE_SORT):
+            # Full-text matches ranked by relevance. Ranks are not stable keys,
+            # so the cursor carries the offset of the next page instead.
+            if cursor:
+                skip = self._decode_offset_cursor(cursor)
+            rows = (
+                final_query.order_by(
+                    func.ts_rank_cd(ticket_search_vector, ts_query).desc(),
+                    self.model.id.desc(),
+                )
+                .offset(skip)
+                .limit(limit + 1)
+                .all()
+            )
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = self._encode_offset_cursor(skip + limit)
+            return rows, total_count, next_cursor
+
+        # Dynamic sorting, always tie-broken on id so pages are stable
+        sort_column = self.model.__table__.columns.get(sort_by) if sort_by else None
+        if sort_column is None:
+            # Fallback to default sorting if sort_by is missing or invalid
+            sort_column, descending = self.model.__table__.c.id, True
+        else:
+            descending = sort_order == "desc"
+        final_query = final_query.order_by(
+            *self._keyset_order_by(sort_column, descending)
+        )
+
+        if cursor:
+            final_query = final_query.filter(
+                self._keyset_filter(
+                    sort_column,
+                    descending,
+                    self._decode_cursor(cursor, sort_column, descending),
+                )
+            )
+        else:
+            final_query = final_query.offset(skip)
+        # One extra row tells whether there is a next page
+        rows = final_query.limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_ticket = rows[-1] if columns else rows[-1][0]
+            next_cursor = self._encode_cursor(
+                sort_column,
+                descending,
+                getattr(last_ticket, sort_column.key),
+                last_ticket.id,
+            )
+        return rows, total_count, next_cursor
+
+    def _search_filter(self, db: Session, search: str, search_mode: str = "fulltext"):
+        """
+        Returns (filter, tsquery). On PostgreSQL the weighted search_vector
+        column is matched with a prefix tsquery through its GIN index, plus exact
+        matches on the ticket UID and the indexed alert indicators; tsquery is
+        None elsewhere, where every field is matched with ILIKE.
+        The PostgreSQL matches are a UNION of ticket ids, one arm per index: OR-ed
+        in a single WHERE, the alert subquery keeps the planner from combining
+        the tickets indexes in a BitmapOr and it scans the whole table instead
+        (see benchmarks/bench_ticket_search.py).
+        In substring mode the ticket UID, rule name and normalized IOCs are
+        matched with ILIKE, which the pg_trgm indexes serve on PostgreSQL.
+        """
+        if search_mode == "substring":
+            pattern = f"%{search.strip()}%"
+            return (
+                or_(
+                    self.model.ticket_uid.ilike(pattern),
+                    self.model.rule_name.ilike(pattern),
+                    self.model.iocs.ilike(pattern.lower()),
+                ),
+                None,
+            )
+
+        terms = prefix_tsquery(search)
+        if supports_full_text_search(db.get_bind()) and terms:
+            ts_query = func.to_tsquery(TICKET_SEARCH_LANGUAGE, terms)
+            term = search.strip()
+            matching_ids = union(
+                select(self.model.id).where(ticket_search_vector.op("@@")(ts_query)),
+                select(self.model.id).where(self.model.ticket_uid == term),
+                select(Alert.ticket_id).where(
+                    or_(
+                        Alert.ip_origen == term,
+                        Alert.ip_destino == term,
+                        Alert.host_name == term,
+                        Alert.usuario_afectado == term,
+                        Alert.firma_id == term,
+                    )
+                ),
+            )
+            return self.model.id.in_(matching_ids), ts_query
+
+        pattern = f"%{search}%"
+        return (
+            or_(
+                self.model.resumen.ilike(pattern),
+                self.model.descripcion.ilike(pattern),
+                self.model.ticket_uid.ilike(pattern),
+                self.model.rule_name.ilike(pattern),
+                self.model.rule_description.ilike(pattern),
+                self.model.rule_remediation.ilike(pattern),
+                # Raw logs are stored compressed; match on the indicators
+                # extracted from them into the alerts table instead.
+                exists().where(
+                    Alert.ticket_id == self.model.id,
+                    or_(
+                        Alert.ip_origen.ilike(pattern),
+                        Alert.ip_destino.ilike(pattern),
+                        Alert.host_name.ilike(pattern),
+                        Alert.usuario_afectado.ilike(pattern),
+                        Alert.firma_id.ilike(pattern),
+                    ),
+                ),
+            ),
+            None,
+        )
+
+    def iter_tickets_with_details(
+        self,
+        db: Session,
+        *,
+        columns: List[str],
+        batch_size: int = 1000,
+        **filters: Any,
+    ) -> Iterator[List[Any]]:
+        """
+        Streams every ticket matching the list `filters` (see _filtered_query)
+        in id order, as batches of flat rows with the given Ticket `columns`
+        followed by first_name, last_name and has_raw_logs. Rows are read with
+        yield_per (a server-side cursor on PostgreSQL), so memory use does not
+        grow with the number of tickets. Invalid filters raise ValueError here,
+        before any row is read.
+        """
+        query, _, _ = self._filtered_query(db, **filters)
+        query = self._with_details(
+            query.with_entities(
+                *(getattr(self.model, column) for column in dict.fromkeys(columns))
+            )
+        ).order_by(self.model.id)
+        return db.execute(
+            query.statement.execution_options(yield_per=batch_size)
+        ).partitions()
+
+    def _with_details(self, query):
+        # Reporter name and raw log flag of each ticket
+        return query.join(
+            User, self.model.reportado_por_id == User.id, isouter=True
+        ).add_columns(
+            User.first_name,
+            User.last_name,
+            exists()
+            .where(TicketRawLog.ticket_id == self.model.id)
+            .label("has_raw_logs"),
+        )
+
+    def _filtered_query(
+        self,
+        db: Session,
+        *,
+        status: Optional[str] = None,
+        assigned_to_me_id: Optional[int] = None,
+        severity: Optional[str] = None,
+        created_by_me_id: Optional[int] = None,
+        category: Optional[str] = None,
+        search: Optional[str] = None,
+        search_mode: str = "fulltext",
+        reportado_por_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ):
+        """
+        Returns (query, filters, ts_query) for the ticket list filters: the
+        filtered Ticket query, the normalized filter tuple used as count cache
+        key and the full-text query, if `search` used the full-text index.
+        """
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Invalid search_mode: {search_mode}")
         query = db.query(self.model)
 
         if status:
@@ -61,18 +634,10 @@ class TicketRepository(BaseRepository[Ticket, TicketCreate, TicketUpdate]):
         if category:
             query = query.filter(self.model.categoria == category)
 
+        ts_query = None
         if search:
-            query = query.filter(
-                or_(
-                    self.model.resumen.ilike(f"%{search}%"),
-                    self.model.descripcion.ilike(f"%{search}%"),
-                    self.model.ticket_uid.ilike(f"%{search}%"),
-                    self.model.rule_name.ilike(f"%{search}%"),
-                    self.model.rule_description.ilike(f"%{search}%"),
-                    self.model.rule_remediation.ilike(f"%{search}%"),
-                    self.model.raw_logs.ilike(f"%{search}%"),
-                )
-            )
+            search_filter, ts_query = self._search_filter(db, search, search_mode)
+            query = query.filter(search_filter)
 
         if reportado_por_id is not None:
             query = query.filter(self.model.reportado_por_id == reportado_por_id)
@@ -83,39 +648,199 @@ class TicketRepository(BaseRepository[Ticket, TicketCreate, TicketUpdate]):
         if end_date:
             query = query.filter(self.model.creado_en <= end_date)
 
-        total_count = query.count()
-
-        # Dynamic sorting
-        if sort_by:
-            if hasattr(self.model, sort_by):
-                sort_column = getattr(self.model, sort_by)
-                if sort_order == "desc":
-                    query = query.order_by(sort_column.desc())
-                else:
-                    query = query.order_by(sort_column.asc())
-            else:
-                # Fallback to default sorting if sort_by is invalid
-                query = query.order_by(self.model.id.desc())
-        else:
-            query = query.order_by(self.model.id.desc())
+        filters = (
+            status,
+            assigned_to_me_id,
+            severity,
+            created_by_me_id,
+            category,
+            search.strip().lower() if search else None,
+            search_mode if search else None,
+            reportado_por_id,
+            start_date,
+            end_date,
+        )
+        return query, filters, ts_query
+
+    def _count_tickets(
+        self, db: Session, query, filters: tuple, count_mode: str
+    ) -> Optional[int]:
+        if count_mode == "none":
+            return None
+        if count_mode == "estimate" and db.get_bind().dialect.name == "postgresql":
+            return self._estimate_count(db, query, filtered=any(filters))
+        total_count = ticket_count_cache.get(filters)
+        if total_count is None:
+            total_count = self._exact_count(query)
+            ticket_count_cache.set(filters, total_count)
+        return total_count
 
-        final_query = (
-            query.join(User, self.model.reportado_por_id == User.id, isouter=True)
-            .add_columns(User.first_name, User.last_name, self.model.raw_logs)
-            .offset(skip)
-            .limit(limit)
+    def _exact_count(self, query) -> int:
+        # COUNT over the filtered table instead of a subquery of full ticket rows
+        return query.order_by(None).with_entities(func.count(self.model.id)).scalar()
+
+    def _estimate_count(self, db: Session, query, *, filtered: bool) -> int:
+        """
+        Planner row estimate: pg_class.reltuples for the whole table, or the
+        top-level "Plan Rows" of EXPLAIN for a filtered query.
+        """
+        if not filtered:
+            reltuples = db.execute(
+                text(
+                    "SELECT reltuples::bigint FROM pg_class "
+                    "WHERE oid = CAST(:table AS regclass)"
+                ),
+                {"table": self.model.__tablename__},
+            ).scalar()
+            # -1 / 0 until the table has been analyzed
+            if reltuples and reltuples > 0:
+                return reltuples
+            return self._exact_count(query)
+        compiled = query.statement.compile(dialect=db.get_bind().dialect)
+        plan = (
+            db.connection()
+            .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+            .scalar()
+        )
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def _keyset_order_by(self, sort_column, descending: bool) -> list:
+        id_column = self.model.__table__.c.id
+        if sort_column is id_column:
+            return [id_column.desc() if descending else id_column.asc()]
+        order = sort_column.desc() if descending else sort_column.asc()
+        if sort_column.nullable:
+            order = order.nulls_last()
+        return [order, id_column.desc() if descending else id_column.asc()]
+
+    def _keyset_filter(self, sort_column, descending: bool, position: Tuple[Any, int]):
+        """
+        Rows strictly after `position` (sort value, id) in the order produced by
+        _keyset_order_by, with NULL sort values last.
+        """
+        value, last_id = position
+        id_column = self.model.__table__.c.id
+        id_after = id_column < last_id if descending else id_column > last_id
+        if sort_column is id_column:
+            return id_after
+        if value is None:
+            return and_(sort_column.is_(None), id_after)
+        value_after = sort_column < value if descending else sort_column > value
+        conditions = [value_after, and_(sort_column == value, id_after)]
+        if sort_column.nullable:
+            conditions.append(sort_column.is_(None))
+        return or_(*conditions)
+
+    @staticmethod
+    def _encode_cursor(sort_column, descending: bool, value: Any, last_id: int) -> str:
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = json.dumps(
+            {"s": sort_column.key, "d": descending, "v": value, "id": last_id},
+            separators=(",", ":"),
         )
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort_column, descending: bool) -> Tuple[Any, int]:
+        """
+        Returns the (sort value, id) position encoded in `cursor`. Raises ValueError
+        if the cursor is malformed or was issued for a different sort order.
+        """
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            value, last_id = payload["v"], int(payload["id"])
+            if payload["s"] != sort_column.key or payload["d"] != descending:
+                raise ValueError("cursor does not match the requested sort order")
+            if value is not None and isinstance(sort_column.type, DateTime):
+                value = datetime.fromisoformat(value)
+        except (KeyError, TypeError, ValueError, binascii.Error) as e:
+            raise ValueError(f"Invalid cursor: {e}") from e
+        return value, last_id
 
-        return final_query.all(), total_count
+    @staticmethod
+    def _encode_offset_cursor(offset: int) -> str:
+        payload = json.dumps({"s": RELEVANCE_SORT, "o": offset}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
 
-    def get_ticket_with_details(self, db: Session, ticket_id: int):
+    @staticmethod
+    def _decode_offset_cursor(cursor: str) -> int:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if payload["s"] != RELEVANCE_SORT:
+                raise ValueError("cursor does not match the requested sort order")
+            return max(int(payload["o"]), 0)
+        except (KeyError, TypeError, ValueError, binascii.Error) as e:
+            raise ValueError(f"Invalid cursor: {e}") from e
+
+    def get_ticket_detail(self, db: Session, ticket_id: int):
+        """
+        Loads everything a ticket detail needs in one statement: the Ticket, its
+        reporter's and assignee's names, its evidence as a JSON array (id,
+        nombre_archivo, ruta_almacenamiento, in id order) and whether it has raw
+        logs. Returns a Row with `Ticket`, `reporter_first_name`,
+        `reporter_last_name`, `assignee_first_name`, `assignee_last_name`,
+        `evidencia` and `has_raw_logs`, or None if the ticket does not exist.
+        """
+        reporter, assignee = aliased(User), aliased(User)
         return (
-            db.query(self.model, User.first_name, User.last_name)
-            .outerjoin(User, self.model.reportado_por_id == User.id)
+            db.query(
+                self.model,
+                reporter.first_name.label("reporter_first_name"),
+                reporter.last_name.label("reporter_last_name"),
+                assignee.first_name.label("assignee_first_name"),
+                assignee.last_name.label("assignee_last_name"),
+                self._evidence_json(db).label("evidencia"),
+                exists()
+                .where(TicketRawLog.ticket_id == self.model.id)
+                .label("has_raw_logs"),
+            )
+            .outerjoin(reporter, self.model.reportado_por_id == reporter.id)
+            .outerjoin(assignee, self.model.asignado_a_id == assignee.id)
             .filter(self.model.id == ticket_id)
             .first()
         )
 
+    def _evidence_json(self, db: Session):
+        fields = [
+            item
+            for column in (
+                Evidence.id,
+                Evidence.nombre_archivo,
+                Evidence.ruta_almacenamiento,
+            )
+            for item in (literal_column(f"'{column.key}'"), column)
+        ]
+        if db.get_bind().dialect.name == "postgresql":
+            aggregate = func.json_agg(
+                aggregate_order_by(func.json_build_object(*fields), Evidence.id)
+            )
+        else:
+            # SQLite aggregates in scan order: the ticket_id index yields id order
+            aggregate = func.json_group_array(func.json_object(*fields))
+        return (
+            select(type_coerce(func.coalesce(aggregate, literal_column("'[]'")), JSON))
+            .where(Evidence.ticket_id == self.model.id)
+            .scalar_subquery()
+        )
+
+    def get_ticket_version(self, db: Session, ticket_id: int):
+        """
+        Returns (actualizado_en, evidence count, last evidence id) of a ticket,
+        or None if it does not exist: what the detail ETag is built from, read
+        without loading the ticket or its evidence.
+        """
+        of_ticket = Evidence.ticket_id == self.model.id
+        return db.execute(
+            select(
+                self.model.actualizado_en,
+                select(func.count(Evidence.id)).where(of_ticket).scalar_subquery(),
+                select(func.max(Evidence.id)).where(of_ticket).scalar_subquery(),
+            ).where(self.model.id == ticket_id)
+        ).first()
+
     def get_evidence_for_ticket(self, db: Session, ticket_id: int) -> List[Evidence]:
         return db.query(Evidence).filter(Evidence.ticket_id == ticket_id).all()
 
@@ -2,6 +2,7 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from db.base import Base
+from db.search import ensure_ticket_search_index
 
 # Database configuration (should match main.py)
 DATABASE_URL = os.getenv(
@@ -20,6 +21,7 @@ def reset_database_data():
 
         print("Creando todas las tablas...")
         Base.metadata.create_all(bind=engine)
+        ensure_ticket_search_index(engine)
         print("Tablas creadas.")
 
         from main import create_initial_admin_user
@@ -45,4 +45,5 @@ class AlertInDB(AlertBase):
 
     class Config:
         from_attributes = True
+        orm_mode = True
         json_encoders = {datetime: convert_utc_to_argentina_time}
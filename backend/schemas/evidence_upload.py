@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class EvidenceUploadCreate(BaseModel):
+    nombre_archivo: str = Field(..., min_length=1, max_length=255)
+    tamano: int = Field(..., gt=0, description="Total size of the file in bytes.")
+
+
+class EvidenceUpload(BaseModel):
+    id: str
+    ticket_id: int
+    nombre_archivo: str
+    tamano: int
+    recibido: int = Field(
+        ..., description="Bytes received so far: the offset of the next chunk."
+    )
+    creado_en: datetime
+    actualizado_en: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class EvidenceUploadComplete(BaseModel):
+    hash_sha256: Optional[str] = Field(
+        None,
+        regex="^[0-9a-f]{64}$",
+        description="Expected SHA-256 of the file; the upload is rejected if it differs.",
+    )
+
+
+class EvidenceItem(BaseModel):
+    id: int
+    nombre_archivo: str
+    ruta_almacenamiento: str
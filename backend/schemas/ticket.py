@@ -1,8 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist, root_validator
 from typing import Optional, List, Dict
 from datetime import datetime
 import pytz
 
+from core.config import TICKET_BULK_MAX_IDS
+
 # Define UTC timezone
 UTC_TIMEZONE = pytz.utc
 
@@ -37,7 +39,8 @@ class TicketBase(BaseModel):
 
 
 class TicketCreate(TicketBase):
-    pass
+    fingerprint: Optional[str] = None
+    iocs: Optional[str] = None
 
 
 class TicketUpdate(BaseModel):
@@ -60,6 +63,35 @@ class TicketUpdate(BaseModel):
     creado_en: Optional[datetime] = None
 
 
+class TicketBulkPatch(BaseModel):
+    # Fields a bulk operation may set; an explicit null asignado_a_id unassigns
+    estado: Optional[str] = None
+    severidad: Optional[str] = None
+    asignado_a_id: Optional[int] = None
+    categoria: Optional[str] = None
+    resolucion: Optional[str] = None
+
+    @root_validator(pre=True, skip_on_failure=True)
+    def check_not_empty(cls, values):
+        if not set(values) & set(cls.__fields__):
+            raise ValueError("El patch debe incluir al menos un campo.")
+        for field in ("estado", "severidad"):
+            if field in values and values[field] is None:
+                raise ValueError(f"{field} no puede ser null.")
+        return values
+
+
+class TicketBulkUpdate(BaseModel):
+    ticket_ids: conlist(int, min_items=1, max_items=TICKET_BULK_MAX_IDS)
+    patch: TicketBulkPatch
+
+
+class TicketBulkUpdateResult(BaseModel):
+    updated_ids: List[int] = []
+    unchanged_ids: List[int] = []  # Already had every patched value
+    not_found_ids: List[int] = []
+
+
 class TicketInDB(TicketBase):
     id: int
     ticket_uid: str
@@ -67,18 +99,51 @@ class TicketInDB(TicketBase):
     actualizado_en: Optional[datetime] = None
     cerrado_en: Optional[datetime] = None
     reportado_por_nombre: Optional[str] = None
+    asignado_a_nombre: Optional[str] = None
     evidencia: List[Dict] = []
     raw_logs: Optional[str] = None
+    has_raw_logs: Optional[bool] = None
     source_host: Optional[str] = None
     destination_ip: Optional[str] = None
     firewall_action: Optional[str] = None
     platform: Optional[str] = None
+    ocurrencias: Optional[int] = None
+    ultima_ocurrencia: Optional[datetime] = None
 
     class Config:
         orm_mode = True
         json_encoders = {datetime: convert_to_utc_iso_z}
 
 
+# Default projection of ticket list items (GET /tickets/ without `fields`):
+# short columns only, so large text columns are never read for list views.
+TICKET_SUMMARY_FIELDS = (
+    "id",
+    "ticket_uid",
+    "estado",
+    "severidad",
+    "resumen",
+    "categoria",
+    "platform",
+    "rule_name",
+    "reportado_por_id",
+    "asignado_a_id",
+    "sla_vencimiento",
+    "creado_en",
+    "actualizado_en",
+    "cerrado_en",
+    "ocurrencias",
+    "ultima_ocurrencia",
+    "reportado_por_nombre",
+    "has_raw_logs",
+)
+
+# List fields computed from joins rather than read from Ticket columns
+TICKET_LIST_COMPUTED_FIELDS = ("reportado_por_nombre", "has_raw_logs")
+
+
 class PaginatedTicketResponse(BaseModel):
-    total_count: int
-    tickets: List[TicketInDB]
+    total_count: Optional[int] = None  # None when count_mode="none"
+    tickets: List[Dict]  # TicketInDB fields selected by `fields`
+    next_cursor: Optional[str] = None
+    has_more: bool = False
@@ -0,0 +1,128 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from core.config import (
+    DEDUP_WINDOW_SECONDS,
+    DEDUP_CACHE_SIZE,
+    DEDUP_MAX_RAW_LOGS,
+)
+from repositories.ticket_repository import ticket_repository
+
+
+class IncidentCorrelationService:
+    """
+    Groups repeated SIEM incidents into the open ticket that first reported them.
+
+    Incidents are identified by a fingerprint of rule, source IP, source host and
+    category. Recently seen fingerprints are kept in an in-memory LRU so repeats
+    go straight to the UPDATE of the known ticket; on a cache miss the indexed
+    Ticket.fingerprint column is queried.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = DEDUP_WINDOW_SECONDS,
+        cache_size: int = DEDUP_CACHE_SIZE,
+        max_raw_logs: int = DEDUP_MAX_RAW_LOGS,
+    ):
+        self.window_seconds = window_seconds
+        self.cache_size = cache_size
+        self.max_raw_logs = max_raw_logs
+        # fingerprint -> (ticket_id, ticket_uid, last_seen)
+        self._recent: "OrderedDict[str, Tuple[int, str, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    @staticmethod
+    def fingerprint(
+        rule_name: Optional[str],
+        source_ip: Optional[str],
+        source_host: Optional[str],
+        category: Optional[str],
+    ) -> str:
+        key = "|".join(
+            (value or "").strip().lower()
+            for value in (rule_name, source_ip, source_host, category)
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def remember(self, fingerprint: str, ticket_id: int, ticket_uid: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._recent[fingerprint] = (ticket_id, ticket_uid, datetime.utcnow())
+            self._recent.move_to_end(fingerprint)
+            while len(self._recent) > self.cache_size:
+                self._recent.popitem(last=False)
+
+    def forget(self, fingerprint: str) -> None:
+        with self._lock:
+            self._recent.pop(fingerprint, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent.clear()
+
+    def append_occurrences(
+        self, db: Session, *, fingerprint: str, raw_logs: List[str]
+    ) -> Optional[Tuple[int, str]]:
+        """
+        Records `raw_logs` as new occurrences of an open ticket with the same
+        fingerprint seen within the window. Returns (ticket_id, ticket_uid) of that
+        ticket, or None if a new ticket must be created. Does not commit, nor
+        `remember` the match: the caller does once its transaction is committed,
+        so a rolled-back write never reaches the cache.
+        """
+        if not self.enabled or not raw_logs:
+            return None
+
+        now = datetime.utcnow()
+        since = now - timedelta(seconds=self.window_seconds)
+
+        with self._lock:
+            cached = self._recent.get(fingerprint)
+        if cached and cached[2] >= since:
+            ticket_id, ticket_uid, _ = cached
+            if self._register(db, ticket_id, fingerprint, raw_logs, now, since):
+                return ticket_id, ticket_uid
+        if cached:
+            self.forget(fingerprint)
+
+        match = ticket_repository.get_open_by_fingerprint(
+            db, fingerprint=fingerprint, since=since
+        )
+        if match:
+            ticket_id, ticket_uid = match
+            if self._register(db, ticket_id, fingerprint, raw_logs, now, since):
+                return ticket_id, ticket_uid
+        return None
+
+    def _register(
+        self,
+        db: Session,
+        ticket_id: int,
+        fingerprint: str,
+        raw_logs: List[str],
+        seen_at: datetime,
+        since: datetime,
+    ) -> bool:
+        return ticket_repository.register_occurrences(
+            db,
+            ticket_id=ticket_id,
+            fingerprint=fingerprint,
+            raw_logs=raw_logs,
+            seen_at=seen_at,
+            since=since,
+            max_raw_logs=self.max_raw_logs,
+        )
+
+
+incident_correlation_service = IncidentCorrelationService()
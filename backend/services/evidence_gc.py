@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from core.config import (
+    EVIDENCE_GC_INTERVAL_SECONDS,
+    EVIDENCE_GC_GRACE_SECONDS,
+    EVIDENCE_GC_BATCH_SIZE,
+    EVIDENCE_GC_ORPHAN_SCAN_SECONDS,
+    EVIDENCE_UPLOAD_SESSION_TTL_SECONDS,
+)
+from db.session import SessionLocal
+from repositories.evidence_repository import evidence_repository
+from services.evidence_store import evidence_store
+from services.evidence_upload_service import evidence_upload_service
+
+logger = logging.getLogger(__name__)
+
+
+class EvidenceGarbageCollector:
+    """
+    Background task that removes evidence blobs left without references (e.g.
+    after their tickets were deleted) for longer than the grace period, and
+    resumable upload sessions that expired with their partial files. Less
+    often, it also removes blob files without a blob row and leftover
+    uploads in tmp/, e.g. from transactions rolled back after the file was
+    moved into place. Database and file work runs in the thread pool.
+    """
+
+    def __init__(
+        self,
+        interval: float = EVIDENCE_GC_INTERVAL_SECONDS,
+        grace_seconds: int = EVIDENCE_GC_GRACE_SECONDS,
+        batch_size: int = EVIDENCE_GC_BATCH_SIZE,
+        upload_ttl_seconds: int = EVIDENCE_UPLOAD_SESSION_TTL_SECONDS,
+        orphan_scan_interval: float = EVIDENCE_GC_ORPHAN_SCAN_SECONDS,
+    ):
+        self.interval = interval
+        self.grace_seconds = grace_seconds
+        self.batch_size = batch_size
+        self.upload_ttl_seconds = upload_ttl_seconds
+        self.orphan_scan_interval = orphan_scan_interval
+        self._last_orphan_scan: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def collect_once(self) -> int:
+        """
+        Removes one batch of unreferenced blobs. Returns the number removed.
+        """
+        db = SessionLocal()
+        try:
+            since = datetime.utcnow() - timedelta(seconds=self.grace_seconds)
+            candidates = evidence_repository.get_unreferenced(
+                db, since=since, limit=self.batch_size
+            )
+            removed = 0
+            for hash_sha256, ruta in candidates:
+                # The row is deleted (and locked) before the file goes, so an
+                # upload of the same content either re-references it first or
+                # waits and then writes a new blob.
+                if not evidence_repository.delete_if_unreferenced(
+                    db, hash_sha256=hash_sha256
+                ):
+                    db.rollback()
+                    continue
+                try:
+                    os.remove(ruta)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.error(f"No se pudo eliminar la evidencia {ruta}: {e}")
+                    db.rollback()
+                    continue
+                db.commit()
+                removed += 1
+            if removed:
+                logger.info(f"Evidencias sin referencias eliminadas: {removed}.")
+            return removed
+        finally:
+            db.close()
+
+    def collect_expired_uploads(self) -> int:
+        """
+        Removes one batch of expired upload sessions and their partial files.
+        Returns the number removed.
+        """
+        db = SessionLocal()
+        try:
+            before = datetime.utcnow() - timedelta(seconds=self.upload_ttl_seconds)
+            upload_ids = evidence_repository.remove_expired_uploads(
+                db, before=before, limit=self.batch_size
+            )
+            db.commit()
+        finally:
+            db.close()
+        for upload_id in upload_ids:
+            evidence_store.discard(evidence_store.partial_path(upload_id))
+            evidence_upload_service.forget(upload_id)
+        if upload_ids:
+            logger.info(f"Cargas de evidencia expiradas eliminadas: {len(upload_ids)}.")
+        return len(upload_ids)
+
+    def collect_orphan_files(self) -> int:
+        """
+        Walks the blob and tmp directories and removes files older than the
+        grace period that no blob row accounts for. Returns the number removed.
+        """
+        older_than = time.time() - self.grace_seconds
+        removed = 0
+        db = SessionLocal()
+        try:
+            candidates = evidence_store.blob_files_older_than(older_than)
+            while batch := list(islice(candidates, self.batch_size)):
+                known = evidence_repository.get_blob_hashes(
+                    db, hashes=[hash_sha256 for hash_sha256, _ in batch]
+                )
+                db.rollback()  # Do not hold the read transaction while walking
+                for hash_sha256, path in batch:
+                    if hash_sha256 in known:
+                        continue
+                    try:
+                        # Checked again: an upload may have just moved it into place
+                        if os.stat(path).st_mtime >= older_than:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    evidence_store.discard(path)
+                    removed += 1
+        finally:
+            db.close()
+        for path in evidence_store.temp_files_older_than(older_than):
+            evidence_store.discard(path)
+            removed += 1
+        if removed:
+            logger.info(f"Archivos de evidencia huérfanos eliminados: {removed}.")
+        return removed
+
+    def _orphan_scan_due(self) -> bool:
+        now = time.monotonic()
+        if (
+            self._last_orphan_scan is not None
+            and now - self._last_orphan_scan < self.orphan_scan_interval
+        ):
+            return False
+        self._last_orphan_scan = now
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                removed = await run_in_threadpool(self.collect_once)
+                removed = max(
+                    removed, await run_in_threadpool(self.collect_expired_uploads)
+                )
+                if self._orphan_scan_due():
+                    await run_in_threadpool(self.collect_orphan_files)
+            except Exception as e:
+                logger.error(f"Recolector de evidencias falló: {e}", exc_info=True)
+                removed = 0
+            if removed < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+evidence_gc = EvidenceGarbageCollector()
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, Iterator, NamedTuple, Tuple
+
+from sqlalchemy.orm import Session
+
+from core.config import EVIDENCE_COPY_BUFFER_BYTES
+from repositories.evidence_repository import evidence_repository
+
+# Directory served at /uploads (see main.py)
+UPLOAD_DIR = "uploads"
+
+
+class StoredEvidence(NamedTuple):
+    nombre_archivo: str
+    ruta_almacenamiento: str
+    hash_sha256: str
+    size: int
+    # Where the upload was written; moved to ruta_almacenamiento by store_blob
+    ruta_temporal: str
+
+
+class EvidenceStore:
+    """
+    Content-addressed store for evidence files. Uploads are written under
+    `tmp/` while their SHA-256 is computed in the same pass (the file is never
+    read back), then `store_blob` moves them to `blobs/ab/cd/<hash>` or, if a
+    blob with that hash already exists, drops the copy and adds a reference
+    to the existing one. Blocking; async callers run `save` in the thread pool.
+    """
+
+    def __init__(
+        self,
+        upload_dir: str = UPLOAD_DIR,
+        buffer_size: int = EVIDENCE_COPY_BUFFER_BYTES,
+    ):
+        self.upload_dir = upload_dir
+        self.buffer_size = buffer_size
+
+    def blob_path(self, hash_sha256: str) -> str:
+        # Two levels of sharding keep directories small
+        return (
+            f"{self.upload_dir}/blobs/{hash_sha256[:2]}/{hash_sha256[2:4]}/"
+            f"{hash_sha256}"
+        )
+
+    def temp_path(self) -> str:
+        tmp_dir = f"{self.upload_dir}/tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        return f"{tmp_dir}/{uuid.uuid4()}"
+
+    def partial_path(self, upload_id: str) -> str:
+        # Where a resumable upload session accumulates its chunks
+        partial_dir = f"{self.upload_dir}/partial"
+        os.makedirs(partial_dir, exist_ok=True)
+        return f"{partial_dir}/{upload_id}"
+
+    def open_at(self, path: str, offset: int) -> BinaryIO:
+        """
+        Opens the file for writing at `offset`, dropping anything after it
+        (e.g. the rest of a chunk whose request failed before it was
+        acknowledged).
+        """
+        destination = open(path, "r+b")
+        destination.seek(offset)
+        destination.truncate()
+        return destination
+
+    def hash_prefix(self, path: str, size: int):
+        """
+        Returns a sha256 object fed with the first `size` bytes of the file.
+        """
+        sha256_hash = hashlib.sha256()
+        remaining = size
+        with open(path, "rb") as source:
+            while remaining and (
+                chunk := source.read(min(self.buffer_size, remaining))
+            ):
+                sha256_hash.update(chunk)
+                remaining -= len(chunk)
+        if remaining:
+            raise ValueError(f"{path} is shorter than {size} bytes")
+        return sha256_hash
+
+    def save(self, source: BinaryIO, filename: str) -> StoredEvidence:
+        temp_path = self.temp_path()
+        sha256_hash = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as destination:
+                while chunk := source.read(self.buffer_size):
+                    sha256_hash.update(chunk)
+                    destination.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            # Do not leave a partial file behind
+            self.discard(temp_path)
+            raise
+        digest = sha256_hash.hexdigest()
+        return StoredEvidence(filename, self.blob_path(digest), digest, size, temp_path)
+
+    def store_blob(self, db: Session, stored: StoredEvidence) -> str:
+        """
+        Adds a reference to the blob of a saved upload, creating the blob if
+        this is the first copy of its content, and returns the blob path. Runs
+        in the caller's transaction; the reference is only counted once it
+        commits.
+        """
+        while True:
+            ruta = evidence_repository.add_reference(db, hash_sha256=stored.hash_sha256)
+            if ruta is not None:
+                if stored.ruta_temporal != ruta:
+                    if os.path.exists(ruta):
+                        self.discard(stored.ruta_temporal)
+                    else:
+                        # The blob row survived its file; restore it from this copy
+                        self._move_into_place(stored.ruta_temporal, ruta)
+                return ruta
+
+            self._move_into_place(stored.ruta_temporal, stored.ruta_almacenamiento)
+            if evidence_repository.create_blob(
+                db,
+                hash_sha256=stored.hash_sha256,
+                ruta_almacenamiento=stored.ruta_almacenamiento,
+                tamano=stored.size,
+            ):
+                return stored.ruta_almacenamiento
+            # Another upload registered the same content first: reference it.
+            # The file we moved has identical content, so the blob stays valid.
+            stored = stored._replace(ruta_temporal=stored.ruta_almacenamiento)
+
+    def _move_into_place(self, source: str, destination: str):
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        os.replace(source, destination)
+        # The blob row is only committed later; a fresh mtime keeps the garbage
+        # collector from taking the file for an orphan in the meantime
+        os.utime(destination)
+
+    def _files_older_than(self, directory: str, timestamp: float) -> Iterator[str]:
+        for dirpath, _, filenames in os.walk(directory):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.stat(path).st_mtime < timestamp:
+                        yield path
+                except FileNotFoundError:
+                    continue
+
+    def blob_files_older_than(self, timestamp: float) -> Iterator[Tuple[str, str]]:
+        """
+        Yields (hash_sha256, path) of the blob files last modified before
+        `timestamp`.
+        """
+        for path in self._files_older_than(f"{self.upload_dir}/blobs", timestamp):
+            yield os.path.basename(path), path
+
+    def temp_files_older_than(self, timestamp: float) -> Iterator[str]:
+        """
+        Yields the paths of uploads left in tmp/ since before `timestamp`.
+        """
+        return self._files_older_than(f"{self.upload_dir}/tmp", timestamp)
+
+    def discard(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+evidence_store = EvidenceStore()
@@ -0,0 +1,340 @@
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from core.config import (
+    EVIDENCE_UPLOAD_MAX_BYTES,
+    EVIDENCE_UPLOAD_CHUNK_MAX_BYTES,
+    EVIDENCE_UPLOAD_MAX_SESSIONS_PER_USER,
+    EVIDENCE_UPLOAD_SESSION_TTL_SECONDS,
+)
+from db.models import EvidenceUpload, Ticket
+from repositories.evidence_repository import evidence_repository
+from schemas.evidence_upload import EvidenceUploadCreate
+from services.evidence_store import StoredEvidence, evidence_store
+from services.ticket_service import ticket_service
+from api.routers.websockets import manager
+
+
+class EvidenceUploadService:
+    """
+    Resumable evidence uploads. A session is created with the file name and
+    size; the client then PUTs chunks at the session's `recibido` offset, each
+    appended to a partial file on disk and fed to a running SHA-256, and
+    finally completes the session, which stores the file as a blob (see
+    EvidenceStore.store_blob) and attaches it to the ticket. After a failed
+    chunk the client asks for the session and resumes from `recibido`.
+
+    The running hashes are kept in memory per session; if one is missing (e.g.
+    after a restart) it is rebuilt from the partial file. A session serves one
+    chunk or completion at a time; a concurrent request on it gets a 409.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = EVIDENCE_UPLOAD_MAX_BYTES,
+        chunk_max_bytes: int = EVIDENCE_UPLOAD_CHUNK_MAX_BYTES,
+        max_sessions_per_user: int = EVIDENCE_UPLOAD_MAX_SESSIONS_PER_USER,
+        session_ttl_seconds: int = EVIDENCE_UPLOAD_SESSION_TTL_SECONDS,
+    ):
+        self.max_bytes = max_bytes
+        self.chunk_max_bytes = chunk_max_bytes
+        self.max_sessions_per_user = max_sessions_per_user
+        self.session_ttl_seconds = session_ttl_seconds
+        # upload id -> (bytes hashed, sha256 object)
+        self._hashes: Dict[str, Tuple[int, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _active_since(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=self.session_ttl_seconds)
+
+    def _lock(self, upload_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def forget(self, upload_id: str):
+        """
+        Drops the running hash and lock kept for a session that no longer exists.
+        """
+        self._hashes.pop(upload_id, None)
+        with self._locks_guard:
+            self._locks.pop(upload_id, None)
+
+    def create_upload(
+        self,
+        db: Session,
+        ticket_id: int,
+        upload_in: EvidenceUploadCreate,
+        current_user_id: int,
+    ) -> Optional[EvidenceUpload]:
+        """
+        Opens an upload session for the ticket. Returns None if the ticket
+        does not exist.
+        """
+        if db.get(Ticket, ticket_id) is None:
+            return None
+        if upload_in.tamano > self.max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"El archivo supera el tamaño máximo de {self.max_bytes} bytes.",
+            )
+        active = evidence_repository.count_active_uploads(
+            db, user_id=current_user_id, since=self._active_since()
+        )
+        if active >= self.max_sessions_per_user:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Ya tienes {active} cargas de evidencia en curso.",
+            )
+
+        upload_id = str(uuid.uuid4())
+        # Created empty, so every chunk (including the first) is a write_at
+        open(evidence_store.partial_path(upload_id), "wb").close()
+        now = datetime.utcnow()
+        return evidence_repository.create_upload(
+            db,
+            obj_in={
+                "id": upload_id,
+                "ticket_id": ticket_id,
+                "usuario_id": current_user_id,
+                "nombre_archivo": upload_in.nombre_archivo,
+                "tamano": upload_in.tamano,
+                "recibido": 0,
+                "creado_en": now,
+                "actualizado_en": now,
+            },
+        )
+
+    def get_upload(
+        self, db: Session, ticket_id: int, upload_id: str, current_user_id: int
+    ) -> Optional[EvidenceUpload]:
+        return evidence_repository.get_upload(
+            db,
+            upload_id=upload_id,
+            ticket_id=ticket_id,
+            user_id=current_user_id,
+            since=self._active_since(),
+        )
+
+    def _require_upload(
+        self, db: Session, ticket_id: int, upload_id: str, current_user_id: int
+    ) -> EvidenceUpload:
+        upload = self.get_upload(db, ticket_id, upload_id, current_user_id)
+        if upload is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Carga de evidencia no encontrada o expirada.",
+            )
+        return upload
+
+    def _offset_conflict(self, recibido: int) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El fragmento debe comenzar en el byte {recibido}.",
+        )
+
+    def _busy(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La carga de evidencia está siendo usada por otra petición.",
+        )
+
+    async def write_chunk(
+        self,
+        db: Session,
+        ticket_id: int,
+        upload_id: str,
+        offset: int,
+        body: AsyncIterator[bytes],
+        current_user_id: int,
+    ) -> EvidenceUpload:
+        """
+        Appends the request body at `offset`, which must equal the bytes
+        received so far. The body is copied to the partial file in blocks of
+        about EvidenceStore.buffer_size as it arrives, never held whole.
+        """
+        upload = self._require_upload(db, ticket_id, upload_id, current_user_id)
+        if offset != upload.recibido:
+            raise self._offset_conflict(upload.recibido)
+        limit = min(self.chunk_max_bytes, upload.tamano - offset)
+        # Not waited for: the holder may be streaming a chunk from a slow client
+        lock = self._lock(upload_id)
+        if not lock.acquire(blocking=False):
+            raise self._busy()
+        try:
+            await self._receive_chunk(db, upload, offset, body, limit)
+        finally:
+            lock.release()
+        db.refresh(upload)
+        return upload
+
+    async def _receive_chunk(
+        self,
+        db: Session,
+        upload: EvidenceUpload,
+        offset: int,
+        body: AsyncIterator[bytes],
+        limit: int,
+    ):
+        upload_id = upload.id
+        # Another chunk may have been counted since the session was read
+        await run_in_threadpool(db.refresh, upload)
+        if upload.recibido != offset:
+            raise self._offset_conflict(upload.recibido)
+        sha256_hash = await run_in_threadpool(self._running_hash, upload_id, offset)
+        # Put back once the chunk is counted; until then it is rebuilt from disk
+        self._hashes.pop(upload_id, None)
+
+        destination = await run_in_threadpool(
+            evidence_store.open_at, evidence_store.partial_path(upload_id), offset
+        )
+        size = 0
+        block = bytearray()
+        try:
+            async for piece in body:
+                size += len(piece)
+                if size > limit:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"El fragmento supera el máximo de {limit} bytes.",
+                    )
+                block += piece
+                if len(block) >= evidence_store.buffer_size:
+                    await run_in_threadpool(
+                        self._write_block, destination, sha256_hash, block
+                    )
+                    block = bytearray()
+            if block:
+                await run_in_threadpool(
+                    self._write_block, destination, sha256_hash, block
+                )
+        finally:
+            await run_in_threadpool(destination.close)
+
+        await run_in_threadpool(self._advance, db, upload, offset, offset + size)
+        self._hashes[upload_id] = (offset + size, sha256_hash)
+
+    def _write_block(self, destination: BinaryIO, sha256_hash, block: bytearray):
+        destination.write(block)
+        sha256_hash.update(block)
+
+    def _advance(self, db: Session, upload: EvidenceUpload, offset: int, recibido: int):
+        # Bytes are only counted once the offset moves
+        if not evidence_repository.advance_upload(
+            db, upload_id=upload.id, offset=offset, recibido=recibido
+        ):
+            db.rollback()
+            db.refresh(upload)
+            raise self._offset_conflict(upload.recibido)
+        db.commit()
+
+    def _running_hash(self, upload_id: str, size: int):
+        hashed, sha256_hash = self._hashes.get(upload_id, (None, None))
+        if hashed != size:
+            sha256_hash = evidence_store.hash_prefix(
+                evidence_store.partial_path(upload_id), size
+            )
+        return sha256_hash
+
+    async def complete_upload(
+        self,
+        db: Session,
+        ticket_id: int,
+        upload_id: str,
+        expected_hash: Optional[str],
+        current_user_id: int,
+    ) -> dict:
+        """
+        Attaches the fully received file to the ticket as an Evidence row and
+        closes the session. Returns the new `evidencia` item.
+        """
+        self._require_upload(db, ticket_id, upload_id, current_user_id)
+        lock = self._lock(upload_id)
+        if not lock.acquire(blocking=False):
+            raise self._busy()
+        try:
+            # Checked again under the lock: a concurrent completion removes it
+            upload = self._require_upload(db, ticket_id, upload_id, current_user_id)
+            item = await self._complete(
+                db, ticket_id, upload, expected_hash, current_user_id
+            )
+        finally:
+            lock.release()
+
+        ticket = ticket_service.get_ticket(db, ticket_id=ticket_id)
+        if ticket:
+            await manager.broadcast(ticket.json())
+        return item
+
+    async def _complete(
+        self,
+        db: Session,
+        ticket_id: int,
+        upload: EvidenceUpload,
+        expected_hash: Optional[str],
+        current_user_id: int,
+    ) -> dict:
+        upload_id = upload.id
+        if upload.recibido != upload.tamano:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Faltan {upload.tamano - upload.recibido} bytes por recibir.",
+            )
+
+        sha256_hash = await run_in_threadpool(
+            self._running_hash, upload_id, upload.tamano
+        )
+        hash_sha256 = sha256_hash.hexdigest()
+        if expected_hash and expected_hash != hash_sha256:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="El hash SHA-256 del archivo recibido no coincide.",
+            )
+
+        stored = StoredEvidence(
+            nombre_archivo=upload.nombre_archivo,
+            ruta_almacenamiento=evidence_store.blob_path(hash_sha256),
+            hash_sha256=hash_sha256,
+            size=upload.tamano,
+            ruta_temporal=evidence_store.partial_path(upload_id),
+        )
+        # The session goes in the same commit as the evidence row
+        evidence_repository.remove_upload(db, upload_id=upload_id)
+        try:
+            (item,) = await run_in_threadpool(
+                ticket_service._add_evidence, db, ticket_id, [stored], current_user_id
+            )
+        except Exception:
+            # The partial file is gone; the session cannot be resumed
+            evidence_repository.remove_upload(db, upload_id=upload_id)
+            db.commit()
+            raise
+        finally:
+            self.forget(upload_id)
+        return item
+
+    def cancel_upload(
+        self, db: Session, ticket_id: int, upload_id: str, current_user_id: int
+    ) -> bool:
+        if not self.get_upload(db, ticket_id, upload_id, current_user_id):
+            return False
+        lock = self._lock(upload_id)
+        if not lock.acquire(blocking=False):
+            raise self._busy()
+        try:
+            evidence_repository.remove_upload(db, upload_id=upload_id)
+            db.commit()
+            evidence_store.discard(evidence_store.partial_path(upload_id))
+        finally:
+            lock.release()
+        self.forget(upload_id)
+        return True
+
+
+evidence_upload_service = EvidenceUploadService()
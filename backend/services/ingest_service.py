@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List
+
+from starlette.concurrency import run_in_threadpool
+
+from core.config import (
+    INGEST_WORKERS,
+    INGEST_BATCH_SIZE,
+    INGEST_POLL_INTERVAL_SECONDS,
+    INGEST_MAX_ATTEMPTS,
+    INGEST_CLAIM_TIMEOUT_SECONDS,
+)
+from db.session import SessionLocal
+from repositories.ingest_queue_repository import ingest_queue_repository
+from services.siem_ingest_service import create_tickets_from_raw_logs
+
+logger = logging.getLogger(__name__)
+
+
+class IngestWorkerPool:
+    """
+    Pool of background workers that drains the SIEM ingestion queue in batches.
+    Database work runs in the thread pool so the event loop is never blocked.
+    Items claimed by a worker that died or hung (in this or another process)
+    are claimed again once `claim_timeout` has passed.
+    """
+
+    def __init__(
+        self,
+        workers: int = INGEST_WORKERS,
+        batch_size: int = INGEST_BATCH_SIZE,
+        poll_interval: float = INGEST_POLL_INTERVAL_SECONDS,
+        max_attempts: int = INGEST_MAX_ATTEMPTS,
+        claim_timeout: int = INGEST_CLAIM_TIMEOUT_SECONDS,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.claim_timeout = claim_timeout
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    def drain_once(self) -> int:
+        """
+        Claims and processes a single batch. Returns the number of items claimed.
+        """
+        db = SessionLocal()
+        try:
+            items = ingest_queue_repository.claim_batch(
+                db,
+                limit=self.batch_size,
+                stale_before=datetime.utcnow() - timedelta(seconds=self.claim_timeout),
+                max_attempts=self.max_attempts,
+            )
+            if not items:
+                return 0
+            ids = [item.id for item in items]
+            payloads = [item.payload for item in items]
+
+            try:
+                results = create_tickets_from_raw_logs(db, payloads)
+            except Exception as e:
+                logger.error(f"Error al procesar lote de la cola: {e}", exc_info=True)
+                ingest_queue_repository.release(
+                    db, ids=ids, error=str(e), max_attempts=self.max_attempts
+                )
+                return len(items)
+
+            done_ids = []
+            errors = {}
+            for item_id, result in zip(ids, results):
+                if result["status"] != "error":
+                    done_ids.append(item_id)
+                else:
+                    errors[item_id] = str(result.get("detail"))
+            ingest_queue_repository.mark_done(db, ids=done_ids)
+            ingest_queue_repository.mark_failed(db, errors=errors)
+            logger.info(
+                f"Cola de ingesta: {len(done_ids)} procesados, {len(errors)} con error."
+            )
+            return len(items)
+        finally:
+            db.close()
+
+    async def _run_worker(self, worker_id: int):
+        logger.info(f"Worker de ingesta {worker_id} iniciado.")
+        while not self._stopping:
+            try:
+                claimed = await run_in_threadpool(self.drain_once)
+            except Exception as e:
+                logger.error(f"Worker de ingesta {worker_id} falló: {e}", exc_info=True)
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._run_worker(worker_id))
+            for worker_id in range(self.workers)
+        ]
+
+    async def stop(self):
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+ingest_worker_pool = IngestWorkerPool()
@@ -0,0 +1,642 @@
+"""
+Parsing of FortiSIEM / FortiGate raw logs and creation of their tickets and
+alerts, shared by the SIEM endpoints, the ingest queue workers and the syslog
+listener.
+"""
+
+import json
+import logging
+import re
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import pytz
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from core.config import SIEM_MAX_PAYLOAD_BYTES
+from db.models import User
+from repositories.alert_repository import alert_repository
+from repositories.audit_log_repository import audit_log_repository
+from repositories.ticket_repository import ticket_repository
+from schemas.alert import AlertCreate
+from schemas.audit import AuditLogBase
+from schemas.ticket import TicketCreate
+from services.correlation_service import incident_correlation_service
+from services.ticket_cache import ticket_list_cache
+
+logger = logging.getLogger(__name__)
+
+ARGENTINA_TIMEZONE = pytz.timezone("America/Argentina/Buenos_Aires")
+
+
+def _map_category_from_rule_name(rule_name: str) -> str:
+    """
+    Intenta mapear una categoría basada en palabras clave en el nombre de la regla.
+    """
+    if not rule_name:
+        return "N/A"
+
+    rule_name_lower = rule_name.lower()
+
+    # Mapeo de palabras clave a categorías
+    category_map = {
+        "brute force": "Security / Brute-Force",
+        "bruteforce": "Security / Brute-Force",
+        "login failed": "Security / Authentication",
+        "failed login": "Security / Authentication",
+        "port scan": "Security / Discovery",
+        "scan": "Security / Discovery",
+        "malware": "Security / Malicious Code",
+        "virus": "Security / Malicious Code",
+        "trojan": "Security / Malicious Code",
+        "exploit": "Security / Exploit",
+        "vulnerability": "Security / Exploit",
+        "lateral movement": "Security / Lateral Movement",
+        "policy violation": "Policy / Violation",
+        "web access": "Web / Access",
+        "denial of service": "Availability / DoS",
+        "dos": "Availability / DoS",
+    }
+
+    for keyword, category in category_map.items():
+        if keyword in rule_name_lower:
+            return category
+
+    return "General"  # Categoria por defecto si no se encuentra mapeo
+
+
+# Tamaño de los fragmentos con los que se alimenta el parser incremental
+XML_FEED_CHUNK_SIZE = 64 * 1024
+
+# Hijos directos de <incident> cuyo texto se extrae
+_FORTISIEM_TEXT_FIELDS = ("name", "description", "remediation", "displayTime")
+
+
+def payload_too_large(size: int) -> HTTPException:
+    """
+    Error de un payload SIEM que supera SIEM_MAX_PAYLOAD_BYTES.
+    """
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"El payload ({size} bytes) supera el máximo de {SIEM_MAX_PAYLOAD_BYTES} bytes.",
+    )
+
+
+def _parse_fortisiem_xml(xml_string: str):
+    """
+    Parsea el XML de FortiSIEM y extrae la información relevante.
+
+    Usa un parser incremental: el documento se recorre una sola vez y cada hijo
+    de <incident> se descarta en cuanto se extrae su contenido, de modo que solo
+    el texto de <rawEvents> se conserva completo.
+    """
+    if len(xml_string) > SIEM_MAX_PAYLOAD_BYTES:
+        raise payload_too_large(len(xml_string))
+    logger.debug("Parsing FortiSIEM XML (%d caracteres)", len(xml_string))
+
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    depth = 0
+    text_fields = {}
+    raw_log_content = ""  # Default empty
+    target_entries = []
+
+    def handle_events():
+        nonlocal root, depth, raw_log_content
+        for event, elem in parser.read_events():
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = elem
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+            # Fin de un hijo directo de <incident>
+            if elem.tag == "rawEvents":
+                raw_log_content = "".join(elem.itertext()).strip()
+            elif elem.tag == "incidentTarget":
+                target_entries.extend(
+                    (entry.get("name"), entry.text) for entry in elem.iter("entry")
+                )
+            elif elem.tag in _FORTISIEM_TEXT_FIELDS:
+                text_fields.setdefault(elem.tag, elem.text or "")
+            elem.clear()
+
+    try:
+        for offset in range(0, len(xml_string), XML_FEED_CHUNK_SIZE):
+            parser.feed(xml_string[offset : offset + XML_FEED_CHUNK_SIZE])
+            handle_events()
+        parser.close()
+        handle_events()
+    except ET.ParseError as e:
+        logger.error(f"Error al parsear XML de FortiSIEM: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Formato XML inválido: {e}"
+        )
+
+    incident_id = root.get("incidentId", "N/A")
+    severity = root.get("severity", "N/A")
+    rule_name = text_fields.get("name", "N/A")
+    description = text_fields.get("description", "No description provided.")
+    remediation = text_fields.get("remediation", "")
+    incident_category = root.get("incidentCategory", "N/A")
+    display_time = text_fields.get("displayTime")  # Extraer displayTime
+
+    source_ip = "N/A"
+    source_host = "N/A"
+    destination_ip = "N/A"
+    firewall_action = "N/A"  # Default for FortiSIEM XML
+
+    for entry_name, entry_text in target_entries:
+        if entry_name == "Host IP":
+            source_ip = entry_text
+        elif entry_name == "Host Name":
+            source_host = entry_text
+        elif (
+            entry_name == "Destination IP"
+        ):  # Assuming a "Destination IP" entry might exist
+            destination_ip = entry_text
+
+    return {
+        "incident_id": incident_id,
+        "severity_num": severity,
+        "rule_name": rule_name,
+        "source_ip": source_ip,
+        "source_host": source_host,
+        "destination_ip": destination_ip,  # Include destination_ip
+        "firewall_action": firewall_action,  # Include firewall_action
+        "incident_category": incident_category,
+        "description": description,
+        "remediation": remediation,
+        "raw_log": raw_log_content,
+        "display_time": display_time,
+    }
+
+
+# Un único patrón para ambas sintaxis, de modo que el log se recorre una sola vez:
+#   [key]=value          (formato específico de FortiSIEM)
+#   key="value" / key=value
+_FORTIGATE_TOKEN_PATTERN = re.compile(
+    r'\[(\w+)\]=([^,\]]+)|(\w+)=(?:"([^"]*)"|([^\s"]+))'
+)
+# Solo key="value" / key=value, para el contenido de los valores entre corchetes
+_FORTIGATE_PAIR_PATTERN = re.compile(r'(\w+)=(?:"([^"]*)"|([^\s"]+))')
+
+# Campo de salida -> (claves del log en orden de preferencia, valor por defecto)
+_FORTIGATE_FIELD_MAP = {
+    "incident_id": (("logid",), "N/A"),
+    "severity_str": (("level",), "informational"),
+    "rule_name": (("profile", "msg", "phLogDetail"), "N/A"),
+    "source_ip": (("srcip",), "N/A"),
+    "source_host": (("devname", "hostname"), "N/A"),
+    "destination_ip": (("dstip",), "N/A"),
+    "firewall_action": (("action",), "N/A"),
+    "incident_category": (("catdesc",), "N/A"),
+    "description": (("msg", "phLogDetail"), "No description provided."),
+    "url": (("url",), "N/A"),
+    "hostname": (("hostname",), "N/A"),
+    "user": (("user",), "N/A"),
+    "sentbyte": (("sentbyte",), "N/A"),
+    "rcvdbyte": (("rcvdbyte",), "N/A"),
+    "policyid": (("policyid",), "N/A"),
+}
+
+
+def _tokenize_fortigate_log(log_string: str) -> dict:
+    """
+    Extrae los pares clave-valor de un log en una sola pasada. Los pares
+    [key]=value tienen prioridad sobre key=value con la misma clave. El
+    contenido de un valor entre corchetes (p. ej. [rawEventMsg]=<log de
+    FortiGate>) se analiza también en busca de pares key=value.
+    """
+    log_dict = {}
+    bracketed = {}
+    for match in _FORTIGATE_TOKEN_PATTERN.finditer(log_string):
+        bracket_key, bracket_val, key, quoted_val, unquoted_val = match.groups()
+        if bracket_key is not None:
+            bracketed[bracket_key] = bracket_val.strip()
+            for pair in _FORTIGATE_PAIR_PATTERN.finditer(bracket_val):
+                key, quoted_val, unquoted_val = pair.groups()
+                log_dict[key] = quoted_val if quoted_val is not None else unquoted_val
+        else:
+            log_dict[key] = quoted_val if quoted_val is not None else unquoted_val
+    if bracketed:
+        log_dict.update(bracketed)
+    return log_dict
+
+
+def _parse_fortigate_log(log_string: str):
+    """
+    Parsea un log de FortiGate en formato key-value, mejorado para manejar variaciones.
+    """
+    logger.debug("Parsing FortiGate log: %.200s...", log_string)
+
+    log_dict = _tokenize_fortigate_log(log_string)
+
+    # Mapear a la misma estructura que _parse_fortisiem_xml
+    incident_info = {}
+    for field, (keys, default) in _FORTIGATE_FIELD_MAP.items():
+        value = default
+        for key in keys:
+            if key in log_dict:
+                value = log_dict[key]
+                break
+        incident_info[field] = value
+    incident_info["remediation"] = ""
+    incident_info["raw_log"] = log_string
+    return incident_info
+
+
+def extract_datetime_from_log(
+    raw_log_content: str,
+    current_year: int,
+    fortisiem_display_time: Optional[str] = None,
+) -> Optional[datetime]:
+    """
+    Extrae la fecha y hora de un string de log, intentando varios formatos.
+    Prioriza fortisiem_display_time si se proporciona.
+    """
+    if fortisiem_display_time:
+        try:
+            time_str_without_tz = fortisiem_display_time.replace("ART", "").strip()
+            naive_dt = datetime.strptime(time_str_without_tz, "%a %b %d %H:%M:%S %Y")
+            localized_dt = ARGENTINA_TIMEZONE.localize(naive_dt, is_dst=None)
+            return localized_dt.astimezone(timezone.utc)
+        except ValueError:
+            logger.warning(
+                f"No se pudo parsear fortisiem_display_time: {fortisiem_display_time}. Intentando otros formatos."
+            )
+
+    # Unificar la búsqueda de fecha y hora para formatos con y sin comillas
+    date_match = re.search(r'date="?(\d{4}-\d{2}-\d{2})"?', raw_log_content)
+    time_match = re.search(r'time="?(\d{2}:\d{2}:\d{2})"?', raw_log_content)
+
+    if date_match and time_match:
+        combined_datetime_str = f"{date_match.group(1)} {time_match.group(1)}"
+        try:
+            naive_dt = datetime.strptime(combined_datetime_str, "%Y-%m-%d %H:%M:%S")
+            localized_dt = ARGENTINA_TIMEZONE.localize(naive_dt, is_dst=None)
+            return localized_dt.astimezone(timezone.utc)
+        except ValueError:
+            logger.warning(
+                f"No se pudo parsear el formato YYYY-MM-DD HH:MM:SS: {combined_datetime_str}"
+            )
+
+    month_day_time_match = re.search(
+        r"([A-Za-z]{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})", raw_log_content
+    )
+    if month_day_time_match:
+        dt_str = f"{month_day_time_match.group(1)} {current_year}"
+        try:
+            naive_dt = datetime.strptime(dt_str, "%b %d %H:%M:%S %Y")
+            localized_dt = ARGENTINA_TIMEZONE.localize(naive_dt, is_dst=None)
+            return localized_dt.astimezone(timezone.utc)
+        except ValueError:
+            logger.warning(
+                f"No se pudo parsear el formato Month Day HH:MM:SS: {dt_str}"
+            )
+
+    return None
+
+
+def parse_raw_log_content(raw_log_content: str) -> dict:
+    is_xml = raw_log_content.strip().startswith("<")
+    incident_info = {}
+    severity_name = "Baja"
+
+    if is_xml:
+        incident_info = _parse_fortisiem_xml(raw_log_content)
+        severity_num = int(incident_info.get("severity_num", 0))
+        if severity_num >= 7:
+            severity_name = "Crítica"
+        elif severity_num >= 5:
+            severity_name = "Alta"
+        elif severity_num >= 3:
+            severity_name = "Media"
+
+        if incident_info.get("source_host") == "N/A" and incident_info.get("raw_log"):
+            hostname_match = re.search(
+                r"\[hostName\]=([^,\]]+)", incident_info["raw_log"]
+            )
+            if hostname_match:
+                incident_info["source_host"] = hostname_match.group(1).strip()
+    else:
+        incident_info = _parse_fortigate_log(raw_log_content)
+        severity_str = incident_info.get("severity_str", "informational").lower()
+        if severity_str in ["critical", "alert", "emergency"]:
+            severity_name = "Crítica"
+        elif severity_str in ["high", "error"]:
+            severity_name = "Alta"
+        elif severity_str in ["medium", "warning"]:
+            severity_name = "Media"
+
+    incident_info["severity_name"] = severity_name
+    incident_info["log_source"] = "FortiSIEM" if is_xml else "FortiGate"
+    event_description = incident_info.get("description", "Descripción no disponible.")
+
+    details = {
+        "ID de Incidente": incident_info.get("incident_id"),
+        "Regla Disparada": incident_info.get("rule_name"),
+        "Categoría": incident_info.get("incident_category"),
+        "Dispositivo Afectado": incident_info.get("source_host"),
+        "IP Origen": incident_info.get("source_ip"),
+        "IP Destino": incident_info.get("destination_ip"),
+        "Usuario": incident_info.get("user"),
+        "URL": incident_info.get("url"),
+        "Hostname": incident_info.get("hostname"),
+        "Acción de Firewall": incident_info.get("firewall_action"),
+        "ID de Política": incident_info.get("policyid"),
+        "Bytes Enviados": incident_info.get("sentbyte"),
+        "Bytes Recibidos": incident_info.get("rcvdbyte"),
+        "Remediación Sugerida": incident_info.get("remediation"),
+    }
+
+    formatted_description = (
+        f"**Descripción del Evento:**\n{event_description}\n\n**Detalles Técnicos:**\n"
+    )
+    for key, value in details.items():
+        if value and str(value).strip() and str(value).strip() not in ["N/A", ""]:
+            formatted_description += f"**{key}:** {value}\n"
+
+    incident_info["detailed_description"] = formatted_description.strip()
+    return incident_info
+
+
+def _get_siem_creator_id(db: Session) -> int:
+    """
+    Devuelve el ID del usuario al que se atribuyen los tickets creados por el SIEM.
+    """
+    admin_user = db.query(User).filter(User.email == "admin@example.com").first()
+    return admin_user.id if admin_user else 1
+
+
+# Hashes MD5 / SHA-1 / SHA-256 presentes en los logs
+_HASH_PATTERN = re.compile(r"\b(?:[0-9a-fA-F]{64}|[0-9a-fA-F]{40}|[0-9a-fA-F]{32})\b")
+
+
+def _build_ioc_text(incident_data: dict) -> Optional[str]:
+    """
+    Normaliza los indicadores del incidente (IPs, host, usuario y hashes del log)
+    en un único texto en minúsculas para la búsqueda por subcadena.
+    """
+    values = [
+        incident_data.get("source_ip"),
+        incident_data.get("destination_ip"),
+        incident_data.get("source_host"),
+        incident_data.get("user"),
+    ]
+    values.extend(_HASH_PATTERN.findall(incident_data.get("raw_log") or ""))
+    iocs = dict.fromkeys(
+        value.lower() for value in map(_normalize_alert_value, values) if value
+    )
+    return " ".join(iocs) or None
+
+
+def _build_ticket_create(incident_data: dict, creator_user_id: int) -> TicketCreate:
+    """
+    Construye el TicketCreate a partir de un incidente ya parseado.
+    """
+    current_year = datetime.now().year
+    created_at_from_log = extract_datetime_from_log(
+        incident_data["raw_log"],
+        current_year,
+        fortisiem_display_time=incident_data.get("display_time"),
+    )
+
+    final_created_at = (
+        created_at_from_log if created_at_from_log else datetime.now(timezone.utc)
+    )
+
+    # Lógica para determinar la categoría
+    category = incident_data.get("incident_category")
+    if not category or category == "N/A":
+        category = _map_category_from_rule_name(incident_data.get("rule_name", ""))
+
+    fingerprint = incident_correlation_service.fingerprint(
+        incident_data.get("rule_name"),
+        incident_data.get("source_ip"),
+        incident_data.get("source_host"),
+        category,
+    )
+
+    return TicketCreate(
+        resumen=incident_data["rule_name"],
+        descripcion=incident_data["detailed_description"],
+        severidad=incident_data["severity_name"],
+        estado="Nuevo",
+        platform="FortiSIEM",
+        categoria=category,  # Usar la categoría determinada
+        raw_logs=incident_data["raw_log"],
+        reportado_por_id=creator_user_id,
+        rule_name=incident_data["rule_name"],
+        rule_description=incident_data.get("description", ""),
+        rule_remediation=incident_data.get("remediation", ""),
+        dispositivo_afectado=incident_data.get("source_host", "N/A"),
+        creado_en=final_created_at,
+        fingerprint=fingerprint,
+        iocs=_build_ioc_text(incident_data),
+    )
+
+
+def _normalize_alert_value(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value if value and value != "N/A" else None
+
+
+def _build_alert_create(
+    incident_data: dict, ticket_create: TicketCreate
+) -> AlertCreate:
+    """
+    Construye la alerta normalizada asociada a un incidente ya parseado.
+    """
+    log_source = incident_data.get("log_source")
+    return AlertCreate(
+        fuente=log_source,
+        vendor="Fortinet",
+        producto=log_source,
+        tipo_evento=_normalize_alert_value(ticket_create.categoria),
+        severidad=ticket_create.severidad,
+        ip_origen=_normalize_alert_value(incident_data.get("source_ip")),
+        ip_destino=_normalize_alert_value(incident_data.get("destination_ip")),
+        host_name=_normalize_alert_value(incident_data.get("source_host")),
+        usuario_afectado=_normalize_alert_value(incident_data.get("user")),
+        firma_id=_normalize_alert_value(incident_data.get("incident_id")),
+        descripcion=incident_data.get("description"),
+        correlacion_id=ticket_create.fingerprint,
+    )
+
+
+def create_ticket_from_raw_log(db: Session, raw_log: str) -> Tuple[int, bool]:
+    """
+    Parsea un log crudo y crea su ticket, o lo agrega al ticket abierto que
+    corresponde a su huella. Devuelve (ID del ticket, si fue agregado a uno
+    existente).
+    """
+    incident_data = parse_raw_log_content(raw_log)
+
+    creator_user_id = _get_siem_creator_id(db)
+    ticket_create = _build_ticket_create(incident_data, creator_user_id)
+    alert_create = _build_alert_create(incident_data, ticket_create)
+
+    # Si el mismo incidente ya tiene un ticket abierto, se suma a ese ticket
+    correlated = incident_correlation_service.append_occurrences(
+        db,
+        fingerprint=ticket_create.fingerprint,
+        raw_logs=[ticket_create.raw_logs or ""],
+    )
+    if correlated:
+        alert_repository.create_many(
+            db, objs_in=[alert_create], ticket_ids=[correlated[0]]
+        )
+        db.commit()
+        incident_correlation_service.remember(ticket_create.fingerprint, *correlated)
+        ticket_list_cache.invalidate()
+        logger.info(f"Incidente agregado al ticket existente {correlated[0]}")
+        return correlated[0], True
+
+    new_ticket = ticket_repository.create_with_owner(
+        db=db, obj_in=ticket_create, current_user_id=creator_user_id
+    )
+    alert_repository.create_many(db, objs_in=[alert_create], ticket_ids=[new_ticket.id])
+
+    audit_log_repository.create(
+        db,
+        obj_in=AuditLogBase(
+            entidad="Ticket",
+            entidad_id=new_ticket.id,
+            actor_id=creator_user_id,
+            accion="Creación de Ticket (SIEM)",
+            detalle=json.dumps(
+                {"resumen": new_ticket.resumen, "source": "FortiSIEM/FortiGate"}
+            ),
+        ),
+    )
+
+    incident_correlation_service.remember(
+        ticket_create.fingerprint, new_ticket.id, new_ticket.ticket_uid
+    )
+    ticket_list_cache.invalidate()
+    logger.info(f"Ticket creado exitosamente con ID: {new_ticket.id}")
+    return new_ticket.id, False
+
+
+def create_tickets_from_raw_logs(db: Session, raw_items: List[str]) -> List[dict]:
+    """
+    Parsea cada log crudo con parse_raw_log_content e inserta todos los tickets
+    válidos y sus registros de auditoría en una única transacción. Los incidentes
+    repetidos se agregan al ticket abierto que corresponde a su huella.
+    Devuelve un resultado por elemento, en el mismo orden que raw_items.
+    """
+    creator_user_id = _get_siem_creator_id(db)
+
+    results = []
+    # Huella -> [(índice en results, TicketCreate, AlertCreate)], en orden de llegada
+    groups = OrderedDict()
+    for index, raw_item in enumerate(raw_items):
+        try:
+            incident_data = parse_raw_log_content(raw_item)
+            ticket_create = _build_ticket_create(incident_data, creator_user_id)
+            alert_create = _build_alert_create(incident_data, ticket_create)
+        except HTTPException as e:
+            results.append({"index": index, "status": "error", "detail": e.detail})
+            continue
+        except Exception as e:
+            logger.warning(f"No se pudo parsear el elemento {index} del lote: {e}")
+            results.append({"index": index, "status": "error", "detail": str(e)})
+            continue
+        results.append({"index": index, "status": "pending"})
+        group_key = (
+            ticket_create.fingerprint if incident_correlation_service.enabled else index
+        )
+        groups.setdefault(group_key, []).append(
+            (len(results) - 1, ticket_create, alert_create)
+        )
+
+    if not groups:
+        return results
+
+    alerts = []  # (AlertCreate, ticket_id)
+    # (huella, ticket_id, ticket_uid) a recordar una vez confirmada la transacción
+    matches = []
+
+    def mark_correlated(members, ticket_id, ticket_uid):
+        matches.append((members[0][1].fingerprint, ticket_id, ticket_uid))
+        for result_index, _, alert_create in members:
+            results[result_index].update(
+                status="correlated", ticket_id=ticket_id, ticket_uid=ticket_uid
+            )
+            alerts.append((alert_create, ticket_id))
+
+    try:
+        to_create = []
+        for members in groups.values():
+            fingerprint = members[0][1].fingerprint
+            correlated = incident_correlation_service.append_occurrences(
+                db,
+                fingerprint=fingerprint,
+                raw_logs=[
+                    ticket_create.raw_logs or "" for _, ticket_create, _ in members
+                ],
+            )
+            if correlated:
+                mark_correlated(members, *correlated)
+            else:
+                to_create.append(members)
+
+        new_tickets = ticket_repository.create_many_with_owner(
+            db, objs_in=[members[0][1] for members in to_create]
+        )
+        audit_log_repository.create_many(
+            db,
+            objs_in=[
+                AuditLogBase(
+                    entidad="Ticket",
+                    entidad_id=ticket.id,
+                    actor_id=creator_user_id,
+                    accion="Creación de Ticket (SIEM)",
+                    detalle=json.dumps(
+                        {"resumen": ticket.resumen, "source": "FortiSIEM/FortiGate"}
+                    ),
+                )
+                for ticket in new_tickets
+            ],
+        )
+
+        for members, ticket in zip(to_create, new_tickets):
+            result_index, ticket_create, alert_create = members[0]
+            results[result_index].update(
+                status="created", ticket_id=ticket.id, ticket_uid=ticket.ticket_uid
+            )
+            alerts.append((alert_create, ticket.id))
+            matches.append((ticket_create.fingerprint, ticket.id, ticket.ticket_uid))
+            # Repeticiones dentro del mismo lote
+            repeats = members[1:]
+            if repeats and incident_correlation_service.append_occurrences(
+                db,
+                fingerprint=ticket_create.fingerprint,
+                raw_logs=[repeat.raw_logs or "" for _, repeat, _ in repeats],
+            ):
+                mark_correlated(repeats, ticket.id, ticket.ticket_uid)
+
+        alert_repository.create_many(
+            db,
+            objs_in=[alert_create for alert_create, _ in alerts],
+            ticket_ids=[ticket_id for _, ticket_id in alerts],
+        )
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    for fingerprint, ticket_id, ticket_uid in matches:
+        incident_correlation_service.remember(fingerprint, ticket_id, ticket_uid)
+    ticket_list_cache.invalidate()
+
+    return results
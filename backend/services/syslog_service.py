@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import re
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from core.config import (
+    SYSLOG_HOST,
+    SYSLOG_UDP_PORT,
+    SYSLOG_TCP_PORT,
+    SYSLOG_BATCH_SIZE,
+    SYSLOG_FLUSH_INTERVAL_MS,
+    SYSLOG_QUEUE_SIZE,
+    SYSLOG_MAX_MESSAGE_BYTES,
+)
+from db.session import SessionLocal
+from services.siem_ingest_service import create_tickets_from_raw_logs
+
+logger = logging.getLogger(__name__)
+
+# Cabecera PRI de syslog (<189>); no confundir con el XML de FortiSIEM (<incident ...>)
+_SYSLOG_PRI_PATTERN = re.compile(r"^<\d{1,3}>")
+
+
+def strip_syslog_priority(message: str) -> str:
+    return _SYSLOG_PRI_PATTERN.sub("", message.strip(), count=1)
+
+
+class _SyslogUDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener: "SyslogListener"):
+        self.listener = listener
+
+    def datagram_received(self, data: bytes, addr):
+        self.listener.submit(data)
+
+    def error_received(self, exc: Exception):
+        logger.error(f"Error en el socket UDP de syslog: {exc}")
+
+
+class SyslogListener:
+    """
+    Receptor syslog asyncio (UDP y TCP con framing por conteo de octetos, RFC 6587,
+    o delimitado por saltos de línea). Los mensajes se encolan y se escriben en
+    la base de datos en lotes cada `flush_interval_ms` o cada `batch_size` eventos.
+    """
+
+    def __init__(
+        self,
+        host: str = SYSLOG_HOST,
+        udp_port: Optional[int] = SYSLOG_UDP_PORT,
+        tcp_port: Optional[int] = SYSLOG_TCP_PORT,
+        batch_size: int = SYSLOG_BATCH_SIZE,
+        flush_interval_ms: int = SYSLOG_FLUSH_INTERVAL_MS,
+        queue_size: int = SYSLOG_QUEUE_SIZE,
+        max_message_bytes: int = SYSLOG_MAX_MESSAGE_BYTES,
+    ):
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_message_bytes = max_message_bytes
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._udp_transport = None
+        self._tcp_server = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.counters: Dict[str, int] = {
+            "received": 0,
+            "dropped": 0,
+            "parsed": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+
+    def submit(self, data: bytes) -> None:
+        self.counters["received"] += 1
+        if len(data) > self.max_message_bytes:
+            self.counters["dropped"] += 1
+            return
+        message = strip_syslog_priority(data.decode("utf-8", errors="replace"))
+        if not message:
+            self.counters["dropped"] += 1
+            return
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+
+    async def _discard(self, reader: asyncio.StreamReader, length: int) -> None:
+        """
+        Lee y descarta `length` bytes sin retener más de max_message_bytes.
+        """
+        while length > 0:
+            length -= len(await reader.readexactly(min(length, self.max_message_bytes)))
+
+    async def _handle_tcp_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        peer = writer.get_extra_info("peername")
+        try:
+            while True:
+                first = await reader.read(1)
+                if not first:
+                    break
+                if first.isdigit():
+                    # Octet counting: "<longitud> <mensaje>"
+                    length_bytes = first + await reader.readuntil(b" ")
+                    length = int(length_bytes[:-1])
+                    if length > self.max_message_bytes:
+                        logger.warning(
+                            f"Mensaje syslog TCP de {peer} demasiado grande ({length} bytes)."
+                        )
+                        self.counters["received"] += 1
+                        self.counters["dropped"] += 1
+                        # Se descarta el mensaje y se sigue con el siguiente
+                        await self._discard(reader, length)
+                        continue
+                    self.submit(await reader.readexactly(length))
+                else:
+                    # Non-transparent framing: mensaje terminado en salto de línea
+                    line = first + await reader.readline()
+                    if line.strip():
+                        self.submit(line)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            logger.warning(f"Conexión syslog TCP de {peer} con framing inválido.")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _write_batch(self, batch: List[str]) -> None:
+        db = SessionLocal()
+        try:
+            results = create_tickets_from_raw_logs(db, batch)
+        finally:
+            db.close()
+        failed = sum(1 for result in results if result["status"] == "error")
+        self.counters["parsed"] += len(results) - failed
+        self.counters["failed"] += failed
+        self.counters["batches"] += 1
+
+    async def _flush_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await run_in_threadpool(self._write_batch, batch)
+            except Exception as e:
+                self.counters["failed"] += len(batch)
+                logger.error(f"Error al escribir lote de syslog: {e}", exc_info=True)
+
+    async def start(self):
+        if self._flush_task:
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.udp_port:
+            self._udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _SyslogUDPProtocol(self), local_addr=(self.host, self.udp_port)
+            )
+            logger.info(f"Syslog UDP escuchando en {self.host}:{self.udp_port}")
+        if self.tcp_port:
+            self._tcp_server = await asyncio.start_server(
+                self._handle_tcp_client, self.host, self.tcp_port
+            )
+            logger.info(f"Syslog TCP escuchando en {self.host}:{self.tcp_port}")
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._udp_transport:
+            self._udp_transport.close()
+            self._udp_transport = None
+        if self._tcp_server:
+            self._tcp_server.close()
+            await self._tcp_server.wait_closed()
+            self._tcp_server = None
+        if self._flush_task:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self.counters)
+        stats["queued"] = self._queue.qsize() if self._queue else 0
+        return stats
+
+
+syslog_listener = SyslogListener()
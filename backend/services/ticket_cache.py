@@ -0,0 +1,102 @@
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import TICKET_LIST_CACHE_SIZE, TICKET_LIST_CACHE_MAX_ENTRY_BYTES
+from repositories.ticket_repository import ticket_count_cache
+
+
+class TicketListCache:
+    """
+    In-memory LRU of ticket list results keyed by the normalized filter, sort and
+    page parameters. Every ticket write calls `invalidate`, which bumps the
+    generation counter and drops all entries; a result computed under an older
+    generation is never stored, so a page read concurrently with a write cannot
+    repopulate the cache with pre-write data.
+
+    Invalidating also clears the repository's TTL count cache, so a page stored
+    after a write never carries a count from before it. Results larger than
+    `max_entry_bytes` (their JSON size, estimated by the caller) are not cached.
+    The cache is per process; `version` identifies its current generation, so
+    list ETags built from it change with every write and every restart.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = TICKET_LIST_CACHE_SIZE,
+        max_entry_bytes: int = TICKET_LIST_CACHE_MAX_ENTRY_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.generation = 0
+        # Tells this process's generations apart from a previous run's
+        self._instance = uuid.uuid4().hex
+        # key -> (result, size in bytes)
+        self._entries: "OrderedDict[tuple, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "oversized": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def version(self) -> Tuple[str, int]:
+        return self._instance, self.generation
+
+    def get(self, key: tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry[0]
+
+    def set(self, key: tuple, result: Any, size: int, generation: int) -> None:
+        """
+        Stores `result` if no write happened since `generation` was read and it
+        fits in max_entry_bytes.
+        """
+        if not self.enabled:
+            return
+        if size > self.max_entry_bytes:
+            self.counters["oversized"] += 1
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (result, size)
+            self._entries.move_to_end(key)
+            self.counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.counters["invalidations"] += 1
+        ticket_count_cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = sum(size for _, size in self._entries.values())
+            stats["generation"] = self.generation
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+ticket_list_cache = TicketListCache()
@@ -0,0 +1,144 @@
+import csv
+import io
+from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from sqlalchemy import DateTime
+
+from db.models import Ticket
+from schemas.ticket import TicketInDB, convert_to_utc_iso_z
+
+# Timestamps the ticket list renders as isoformat() + "Z"; every other datetime
+# goes through convert_to_utc_iso_z, as in the TicketInDB json_encoders.
+_LIST_ISO_Z_FIELDS = ("creado_en", "actualizado_en", "cerrado_en")
+
+# Bytes counted per field by estimated_json_size besides the text of string
+# values: quotes, separators and a number, boolean, null or formatted date
+_JSON_VALUE_BYTES = 8
+
+_Accessor = Callable[[Sequence[Any]], Any]
+
+
+def _iso_z(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() + "Z" if value is not None else None
+
+
+def _utc_iso_z(value: Optional[datetime]) -> Optional[str]:
+    return convert_to_utc_iso_z(value) if value is not None else None
+
+
+def _formatted(getter: _Accessor, formatter: Callable) -> _Accessor:
+    return lambda row: formatter(getter(row))
+
+
+def _reporter_name(first_name: _Accessor, last_name: _Accessor, reporter_id):
+    def accessor(row):
+        first, last = first_name(row), last_name(row)
+        if first and last:
+            return f"{first} {last}"
+        return "Sistema" if reporter_id(row) is None else "Desconocido"
+
+    return accessor
+
+
+class TicketSerializer:
+    """
+    Builds JSON-ready ticket dicts straight from query rows, using accessors
+    precomputed once per (row layout, fields) instead of going through
+    TicketInDB.from_orm and jsonable_encoder for every ticket. The dicts only
+    hold JSON types, so they can be rendered with ORJSONResponse.
+    """
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _list_accessors(
+        row_fields: Tuple[str, ...], output_fields: Tuple[str, ...]
+    ) -> Tuple[Tuple[str, _Accessor], ...]:
+        index = {name: position for position, name in enumerate(row_fields)}
+        columns = Ticket.__table__.columns
+        accessors = []
+        for name in output_fields:
+            if name == "reportado_por_nombre":
+                accessor = _reporter_name(
+                    itemgetter(index["first_name"]),
+                    itemgetter(index["last_name"]),
+                    itemgetter(index["reportado_por_id"]),
+                )
+            elif name == "has_raw_logs":
+                accessor = _formatted(itemgetter(index["has_raw_logs"]), bool)
+            elif name in _LIST_ISO_Z_FIELDS:
+                accessor = _formatted(itemgetter(index[name]), _iso_z)
+            elif isinstance(columns[name].type, DateTime):
+                accessor = _formatted(itemgetter(index[name]), _utc_iso_z)
+            else:
+                accessor = itemgetter(index[name])
+            accessors.append((name, accessor))
+        return tuple(accessors)
+
+    def list_items(
+        self, rows: Sequence[Any], output_fields: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Converts ticket list rows (flat Row tuples with the Ticket columns plus
+        first_name, last_name and has_raw_logs) into dicts holding `output_fields`.
+        """
+        if not rows:
+            return []
+        accessors = self._list_accessors(tuple(rows[0]._fields), tuple(output_fields))
+        return [{name: accessor(row) for name, accessor in accessors} for row in rows]
+
+    def estimated_json_size(
+        self, items: List[Dict[str, Any]], output_fields: Sequence[str]
+    ) -> int:
+        """
+        Approximate size in bytes of `items` rendered as a JSON array, without
+        serializing them: keys and non-text values are counted at a fixed width
+        and text values by their length.
+        """
+        per_item = sum(len(name) + _JSON_VALUE_BYTES for name in output_fields)
+        text = sum(
+            len(value)
+            for item in items
+            for value in item.values()
+            if isinstance(value, str)
+        )
+        return 2 + len(items) * per_item + text
+
+    def ndjson_lines(self, items: List[Dict[str, Any]]) -> bytes:
+        return b"".join(orjson.dumps(item) + b"\n" for item in items)
+
+    def csv_lines(
+        self,
+        items: List[Dict[str, Any]],
+        output_fields: Sequence[str],
+        header: bool = False,
+    ) -> bytes:
+        """
+        Renders list items as CSV rows in `output_fields` order (None as an
+        empty cell), optionally preceded by the header row.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(output_fields)
+        writer.writerows([item[name] for name in output_fields] for item in items)
+        return buffer.getvalue().encode("utf-8")
+
+    def ticket_detail(self, ticket: TicketInDB) -> Dict[str, Any]:
+        """
+        Converts a ticket detail into the dict the TicketInDB response model
+        would produce, with every datetime rendered by convert_to_utc_iso_z.
+        """
+        values = {}
+        for name in TicketInDB.__fields__:
+            value = getattr(ticket, name)
+            if isinstance(value, datetime):
+                value = convert_to_utc_iso_z(value)
+            values[name] = value
+        return values
+
+
+ticket_serializer = TicketSerializer()
@@ -1,19 +1,44 @@
 from fastapi import UploadFile, HTTPException, status
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 from sqlalchemy.orm import Session
-import shutil
-import uuid
+from starlette.concurrency import run_in_threadpool
 import hashlib
 import json
+import zlib
 from datetime import datetime  # Importar datetime
 
+from core.config import TICKET_EXPORT_BATCH_SIZE, TICKET_EXPORT_GZIP_LEVEL
+
 from repositories.ticket_repository import ticket_repository
 from repositories.audit_log_repository import audit_log_repository
+from repositories.notification_repository import notification_repository
+from repositories.evidence_repository import evidence_repository
+from repositories.alert_repository import alert_repository
 from db.models import Evidence, User, Ticket
-from schemas.ticket import TicketInDB, TicketCreate, TicketUpdate
+from schemas.ticket import (
+    TICKET_LIST_COMPUTED_FIELDS,
+    TICKET_SUMMARY_FIELDS,
+    TicketBulkUpdate,
+    TicketBulkUpdateResult,
+    TicketInDB,
+    TicketCreate,
+    TicketUpdate,
+)
 from schemas.audit import AuditLogBase  # Importar AuditLogBase
+from schemas.notification import NotificationCreate
+from services.evidence_store import StoredEvidence, evidence_store
+from services.ticket_cache import ticket_list_cache
+from services.ticket_serializer import ticket_serializer
 from api.routers.websockets import manager  # Importar el manager de websockets
 
+# Formats of GET /tickets/export
+TICKET_EXPORT_FORMATS = ("csv", "ndjson")
+
+
+def _weak_etag(*parts) -> str:
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16)
+    return f'W/"{digest.hexdigest()}"'
+
 
 class TicketService:
     def get_paginated_tickets(
@@ -32,145 +57,301 @@ class TicketService:
         sort_order: Optional[str] = "desc",
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-    ) -> Tuple[List[TicketInDB], int]:
+        cursor: Optional[str] = None,
+        count_mode: str = "exact",
+        search_mode: str = "fulltext",
+        fields: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[int], Optional[str]]:
         """
         Retrieves a paginated list of tickets with optional filtering, sorting, and search capabilities.
-        It also enriches ticket data with reporter's name and raw logs from associated alerts.
+        Pages are selected by offset (`skip`) or, when `cursor` is given, by keyset; the returned
+        next_cursor continues after the last ticket of the page. `count_mode` ("exact", "estimate"
+        or "none") controls how total_count is computed; `search_mode` ("fulltext" or "substring")
+        how `search` is matched. Each ticket is returned as a dict holding only the `fields`
+        requested (see _resolve_list_fields), the summary projection by default.
+        It also enriches ticket data with reporter's name and whether raw logs are stored;
+        the raw logs themselves are only loaded by the detail view.
         """
 
-        # Fetch tickets from the repository with joined details (reporter name, raw logs)
-        tickets_with_details, total_count = ticket_repository.get_tickets_with_details(
-            db,
-            skip=skip,
-            limit=limit,
-            status=status,
-            assigned_to_me_id=assigned_to_me_id,
-            severity=severity,
-            created_by_me_id=created_by_me_id,
-            category=category,
-            search=search,
-            reportado_por_id=reportado_por_id,
-            sort_by=sort_by,
-            sort_order=sort_order,
-            start_date=start_date,
-            end_date=end_date,
+        columns, output_fields = self._resolve_list_fields(fields)
+
+        # Pages are cached until the next ticket write (see TicketListCache)
+        cache_key = (
+            skip,
+            limit,
+            status,
+            assigned_to_me_id,
+            severity,
+            created_by_me_id,
+            category,
+            search.strip().lower() if search else None,
+            search_mode if search else None,
+            reportado_por_id,
+            sort_by,
+            sort_order,
+            start_date,
+            end_date,
+            cursor,
+            count_mode,
+            tuple(output_fields),
         )
+        cached = ticket_list_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        generation = ticket_list_cache.generation
 
-        result = []
-        # Process each ticket object to construct the TicketInDB schema
-        for ticket_obj, first_name, last_name, raw_log in tickets_with_details:
-            ticket_in_db = TicketInDB.from_orm(ticket_obj)
-
-            # Manually format datetimes to ISO string with Z
-            if ticket_obj.creado_en:
-                ticket_in_db.creado_en = ticket_obj.creado_en.isoformat() + "Z"
-            if ticket_obj.actualizado_en:
-                ticket_in_db.actualizado_en = (
-                    ticket_obj.actualizado_en.isoformat() + "Z"
-                )
-            if ticket_obj.cerrado_en:
-                ticket_in_db.cerrado_en = ticket_obj.cerrado_en.isoformat() + "Z"
-
-            # Assign reporter's full name or default to "Sistema" / "Desconocido"
-            if first_name and last_name:
-                ticket_in_db.reportado_por_nombre = f"{first_name} {last_name}"
-            else:
-                ticket_in_db.reportado_por_nombre = (
-                    "Sistema" if ticket_obj.reportado_por_id is None else "Desconocido"
+        # Fetch tickets from the repository with joined details (reporter name, raw log flag)
+        try:
+            (
+                tickets_with_details,
+                total_count,
+                next_cursor,
+            ) = ticket_repository.get_tickets_with_details(
+                db,
+                skip=skip,
+                limit=limit,
+                status=status,
+                assigned_to_me_id=assigned_to_me_id,
+                severity=severity,
+                created_by_me_id=created_by_me_id,
+                category=category,
+                search=search,
+                reportado_por_id=reportado_por_id,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                start_date=start_date,
+                end_date=end_date,
+                cursor=cursor,
+                count_mode=count_mode,
+                search_mode=search_mode,
+                columns=columns,
+            )
+        except ValueError as e:
+            # `status` is shadowed by the filter argument here
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Rows are flat tuples of the projected columns, so deferred columns are
+        # never loaded and no ORM entities are built
+        result = ticket_serializer.list_items(tickets_with_details, output_fields)
+
+        page = (result, total_count, next_cursor)
+        if ticket_list_cache.enabled:
+            size = ticket_serializer.estimated_json_size(result, output_fields)
+            ticket_list_cache.set(cache_key, page, size, generation)
+        return page
+
+    def _resolve_list_fields(
+        self, fields: Optional[str]
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Parses the comma-separated `fields` parameter of the ticket list into
+        (Ticket columns to load, fields to return). "summary" expands to
+        TICKET_SUMMARY_FIELDS and "all" to every list field; id is always returned.
+        """
+        ticket_columns = [
+            name for name in TicketInDB.__fields__ if name in Ticket.__table__.columns
+        ]
+        selectable = ticket_columns + list(TICKET_LIST_COMPUTED_FIELDS)
+
+        requested = ["id"]
+        for name in (fields or "summary").split(","):
+            name = name.strip()
+            if name == "summary":
+                requested.extend(TICKET_SUMMARY_FIELDS)
+            elif name == "all":
+                requested.extend(selectable)
+            elif name in selectable:
+                requested.append(name)
+            elif name:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown ticket field: {name}",
                 )
+        output_fields = list(dict.fromkeys(requested))
 
-            # Attach raw logs and rule details from the associated alert
-            ticket_in_db.raw_logs = raw_log
-            ticket_in_db.rule_name = ticket_obj.rule_name
-            ticket_in_db.rule_description = ticket_obj.rule_description
-            ticket_in_db.rule_remediation = ticket_obj.rule_remediation
+        columns = [name for name in output_fields if name in ticket_columns]
+        if "reportado_por_nombre" in output_fields:
+            columns.append("reportado_por_id")
+        return list(dict.fromkeys(columns)), output_fields
 
-            result.append(ticket_in_db)
+    def export_tickets(
+        self,
+        db: Session,
+        export_format: str = "csv",
+        fields: Optional[str] = None,
+        compress: bool = False,
+        **filters,
+    ) -> Iterator[bytes]:
+        """
+        Returns an iterator of CSV or NDJSON chunks (gzip-compressed if
+        `compress`) with every ticket matching the list `filters`, in id order.
+        `fields` selects the columns as in the ticket list and defaults to "all".
+        Tickets are read in batches from a server-side cursor and each batch is
+        encoded and released before the next one is fetched, so memory stays
+        flat however many tickets are exported. Invalid parameters raise an
+        HTTPException before anything is streamed.
+        """
+        if export_format not in TICKET_EXPORT_FORMATS:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid export format: {export_format}"
+            )
+        columns, output_fields = self._resolve_list_fields(fields or "all")
+        try:
+            batches = ticket_repository.iter_tickets_with_details(
+                db, columns=columns, batch_size=TICKET_EXPORT_BATCH_SIZE, **filters
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        def chunks():
+            if export_format == "csv":
+                yield ticket_serializer.csv_lines([], output_fields, header=True)
+            for rows in batches:
+                items = ticket_serializer.list_items(rows, output_fields)
+                if export_format == "csv":
+                    yield ticket_serializer.csv_lines(items, output_fields)
+                else:
+                    yield ticket_serializer.ndjson_lines(items)
+
+        return self._gzip_chunks(chunks()) if compress else chunks()
+
+    def _gzip_chunks(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        # wbits=31 writes a gzip container rather than a raw zlib stream
+        compressor = zlib.compressobj(TICKET_EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def get_ticket(self, db: Session, ticket_id: int) -> Optional[TicketInDB]:
+        """
+        Retrieves a single ticket by its ID, enriching it with reporter's and
+        assignee's names, associated evidence, and raw logs. One query, plus one
+        for the raw logs when the ticket has any. Read-only: the assignee's first
+        view is recorded by acknowledge_ticket.
+        """
+        row = ticket_repository.get_ticket_detail(db, ticket_id=ticket_id)
+        if not row:
+            return None
 
-        return result, total_count
+        # Load and decompress the raw logs stored for this ticket, if any
+        raw_logs = (
+            ticket_repository.get_raw_logs(db, ticket_id=ticket_id)
+            if row.has_raw_logs
+            else None
+        )
+        return self._ticket_detail(
+            row.Ticket,
+            reporter_names=(row.reporter_first_name, row.reporter_last_name),
+            assignee_names=(row.assignee_first_name, row.assignee_last_name),
+            evidencia=row.evidencia,
+            raw_logs=raw_logs,
+        )
 
-    def get_ticket(
-        self, db: Session, ticket_id: int, current_user_id: int
-    ) -> Optional[TicketInDB]:
+    def _ticket_detail(
+        self,
+        ticket_obj: Ticket,
+        reporter_names: Tuple[Optional[str], Optional[str]],
+        assignee_names: Tuple[Optional[str], Optional[str]],
+        evidencia: List[dict],
+        raw_logs: Optional[str],
+    ) -> TicketInDB:
         """
-        Retrieves a single ticket by its ID, enriching it with reporter's name,
-        associated evidence, and raw logs from any linked alert.
-        Also, changes status from 'Nuevo' to 'Abierto' if viewed by assignee.
+        Builds a ticket detail from an already loaded Ticket, without queries.
         """
-        # Fetch the ticket along with its reporter's first and last name
-        ticket_with_reporter = ticket_repository.get_ticket_with_details(
-            db, ticket_id=ticket_id
-        )
+        # Datetimes are rendered by the TicketInDB encoders / ticket_serializer
+        ticket_in_db = TicketInDB.from_orm(ticket_obj)
 
-        if not ticket_with_reporter:
-            return None
+        # Assign reporter's full name or default to "Sistema" / "Desconocido"
+        first_name, last_name = reporter_names
+        if first_name and last_name:
+            ticket_in_db.reportado_por_nombre = f"{first_name} {last_name}"
+        else:
+            ticket_in_db.reportado_por_nombre = (
+                "Sistema" if ticket_obj.reportado_por_id is None else "Desconocido"
+            )
+        first_name, last_name = assignee_names
+        if first_name and last_name:
+            ticket_in_db.asignado_a_nombre = f"{first_name} {last_name}"
+
+        ticket_in_db.evidencia = list(evidencia)
+        ticket_in_db.raw_logs = raw_logs or None
+        ticket_in_db.has_raw_logs = ticket_in_db.raw_logs is not None
+        return ticket_in_db
 
-        ticket_obj, first_name, last_name = ticket_with_reporter
+    def _user_names(
+        self, db: Session, user_id: Optional[int]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        # Served from the session's identity map when the user is already loaded
+        user = db.get(User, user_id) if user_id is not None else None
+        return (user.first_name, user.last_name) if user else (None, None)
 
-        # Change status if it's the first time the assignee sees it
-        if ticket_obj.estado == "Nuevo" and ticket_obj.asignado_a_id == current_user_id:
-            old_estado = ticket_obj.estado
-            ticket_obj.estado = "Abierto"
-            db.add(ticket_obj)
-            db.commit()
-            db.refresh(ticket_obj)
+    def get_ticket_etag(self, db: Session, ticket_id: int) -> Optional[str]:
+        """
+        ETag of the ticket detail, from its id, actualizado_en and evidence, read
+        with one small query. Returns None if the ticket does not exist.
+        """
+        version = ticket_repository.get_ticket_version(db, ticket_id=ticket_id)
+        if version is None:
+            return None
+        actualizado_en, evidence_count, last_evidence = version
+        return _weak_etag(
+            "ticket", ticket_id, actualizado_en, evidence_count, last_evidence
+        )
 
-            # Create audit log for the automatic status change
+    def acknowledge_ticket(
+        self, db: Session, ticket_id: int, current_user_id: int
+    ) -> Optional[TicketInDB]:
+        """
+        Records that the assignee has seen the ticket: a 'Nuevo' ticket assigned
+        to `current_user_id` moves to 'Abierto' with an audit entry. Any other
+        ticket is returned unchanged, without writing.
+        """
+        if ticket_repository.acknowledge(
+            db, ticket_id=ticket_id, user_id=current_user_id
+        ):
             audit_log_data = AuditLogBase(
                 entidad="Ticket",
-                entidad_id=ticket_obj.id,
+                entidad_id=ticket_id,
                 actor_id=current_user_id,
                 accion="Cambio de Estado Automático",
                 detalle=json.dumps(
                     {
-                        "cambios": {"estado": {"old": old_estado, "new": "Abierto"}},
+                        "cambios": {"estado": {"old": "Nuevo", "new": "Abierto"}},
                         "reason": "Visto por asignado",
                     }
                 ),
             )
             audit_log_repository.create(db, obj_in=audit_log_data)
+            ticket_list_cache.invalidate()
+        return self.get_ticket(db, ticket_id=ticket_id)
 
-        ticket_in_db = TicketInDB.from_orm(ticket_obj)
-
-        # Manually format datetimes to ISO string with Z
-        if ticket_obj.creado_en:
-            ticket_in_db.creado_en = ticket_obj.creado_en.isoformat() + "Z"
-        if ticket_obj.actualizado_en:
-            ticket_in_db.actualizado_en = ticket_obj.actualizado_en.isoformat() + "Z"
-        if ticket_obj.cerrado_en:
-            ticket_in_db.cerrado_en = ticket_obj.cerrado_en.isoformat() + "Z"
-
-        # Assign reporter's full name or default to "Sistema" / "Desconocido"
-        if first_name and last_name:
-            ticket_in_db.reportado_por_nombre = f"{first_name} {last_name}"
-        else:
-            ticket_in_db.reportado_por_nombre = (
-                "Sistema" if ticket_obj.reportado_por_id is None else "Desconocido"
-            )
-
-        # Retrieve and attach evidence records associated with the ticket
-        evidence_records = ticket_repository.get_evidence_for_ticket(
-            db, ticket_id=ticket_obj.id
+    def get_tickets_etag(self, params: dict, **filters) -> str:
+        """
+        ETag of a ticket list page: the request `params` (paging, sorting,
+        fields...) and `filters` plus the list cache version, which every
+        ticket write bumps. Runs no query, so a 304 costs nothing and a 200
+        costs only the page itself (often a cache hit).
+        """
+        return _weak_etag(
+            "tickets",
+            sorted(params.items()),
+            sorted(filters.items()),
+            ticket_list_cache.version(),
         )
-        ticket_in_db.evidencia = [
-            {
-                "id": ev.id,
-                "nombre_archivo": ev.nombre_archivo,
-                "ruta_almacenamiento": ev.ruta_almacenamiento,
-            }
-            for ev in evidence_records
-        ]
-
-        # Attach raw logs from the associated alert, if any (assuming it's directly on ticket_obj)
-        if ticket_obj.raw_logs:
-            ticket_in_db.raw_logs = ticket_obj.raw_logs
-
-        # Attach rule details directly from the ticket object
-        ticket_in_db.rule_name = ticket_obj.rule_name
-        ticket_in_db.rule_description = ticket_obj.rule_description
-        ticket_in_db.rule_remediation = ticket_obj.rule_remediation
 
-        return ticket_in_db
+    def get_ticket_raw_logs(self, db: Session, ticket_id: int) -> Optional[dict]:
+        """
+        Retrieves only the decompressed raw logs of a ticket, without loading
+        evidence or reporter details.
+        """
+        if not ticket_repository.get(db, id=ticket_id):
+            return None
+        return {
+            "ticket_id": ticket_id,
+            "raw_logs": ticket_repository.get_raw_logs(db, ticket_id=ticket_id),
+        }
 
     async def create_ticket(
         self,
@@ -179,68 +360,106 @@ class TicketService:
         files: List[UploadFile],
         current_user_id: int,
     ) -> TicketInDB:
+        # Read the names before any commit expires the users in the session
+        reporter_names = self._user_names(db, ticket_data.reportado_por_id)
+        assignee_names = self._user_names(db, ticket_data.asignado_a_id)
+
         # Create the ticket record in the database
         # This also generates a unique ticket_uid (e.g., TCK-YYYY-NNNNNN)
         created_ticket = ticket_repository.create_with_owner(
             db=db, obj_in=ticket_data, current_user_id=current_user_id
         )
+        # The response is built from the refreshed ticket, not reloaded
+        full_ticket = self._ticket_detail(
+            created_ticket,
+            reporter_names=reporter_names,
+            assignee_names=assignee_names,
+            evidencia=[],
+            raw_logs=ticket_data.raw_logs,
+        )
 
-        # Handle file uploads if any evidence files are provided
-        for file in files:
-            if file.filename:
-                # Generate a unique filename to prevent collisions
-                file_extension = file.filename.split(".")[-1]
-                unique_filename = f"{uuid.uuid4()}.{file_extension}"
-                file_path = f"uploads/{unique_filename}"
-
-                # Save the uploaded file to the specified path
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-
-                # Calculate SHA256 hash of the uploaded file for integrity verification
-                sha256_hash = hashlib.sha256()
-                with open(file_path, "rb") as f:
-                    # Read file in chunks to handle large files efficiently
-                    for byte_block in iter(lambda: f.read(4096), b""):
-                        sha256_hash.update(byte_block)
-
-                # Create an Evidence record in the database for the uploaded file
-                evidence = Evidence(
-                    ticket_id=created_ticket.id,
-                    nombre_archivo=file.filename,
-                    ruta_almacenamiento=file_path,
-                    hash_sha256=sha256_hash.hexdigest(),
-                    subido_por_id=current_user_id,
-                )
-                db.add(evidence)
-                db.commit()  # Commit after adding each evidence to ensure it's linked
-                db.refresh(evidence)  # Refresh to get the ID
+        # Store the evidence files and link them with a single commit
+        stored_files = await self._store_evidence_files(files)
+        full_ticket.evidencia.extend(
+            self._add_evidence(db, full_ticket.id, stored_files, current_user_id)
+        )
 
         # Create an audit log entry for the ticket creation
         audit_log_data = AuditLogBase(
             entidad="Ticket",
-            entidad_id=created_ticket.id,
+            entidad_id=full_ticket.id,
             actor_id=current_user_id,
             accion="Creación de Ticket",
             detalle=json.dumps(
-                {"resumen": created_ticket.resumen, "estado": created_ticket.estado}
+                {"resumen": full_ticket.resumen, "estado": full_ticket.estado}
             ),
         )
         audit_log_repository.create(db, obj_in=audit_log_data)
-
-        # Retrieve the full ticket details including reporter name, evidence, and raw logs
-        full_ticket = self.get_ticket(
-            db, ticket_id=created_ticket.id, current_user_id=current_user_id
-        )
+        ticket_list_cache.invalidate()
 
         # Broadcast the new ticket information via WebSocket for real-time updates
-        if full_ticket:
-            import logging
+        import logging
 
-            logging.info(f"Broadcasting new ticket: {full_ticket.id}")
-            await manager.broadcast(full_ticket.json())
+        logging.info(f"Broadcasting new ticket: {full_ticket.id}")
+        await manager.broadcast(full_ticket.json())
         return full_ticket
 
+    async def _store_evidence_files(
+        self, files: List[UploadFile]
+    ) -> List[StoredEvidence]:
+        """
+        Writes and hashes the uploaded files in the thread pool, so large
+        uploads do not block the event loop.
+        """
+        return [
+            await run_in_threadpool(evidence_store.save, file.file, file.filename)
+            for file in files
+            if file.filename
+        ]
+
+    def _add_evidence(
+        self,
+        db: Session,
+        ticket_id: int,
+        stored_files: List[StoredEvidence],
+        user_id: int,
+    ) -> List[dict]:
+        """
+        Inserts the Evidence rows of stored files in one flush and commit, and
+        returns them as ticket detail `evidencia` items. Each row references
+        the content-addressed blob of its file (see EvidenceStore.store_blob).
+        """
+        if not stored_files:
+            return []
+        try:
+            evidence_records = [
+                Evidence(
+                    ticket_id=ticket_id,
+                    nombre_archivo=stored.nombre_archivo,
+                    ruta_almacenamiento=evidence_store.store_blob(db, stored),
+                    hash_sha256=stored.hash_sha256,
+                    subido_por_id=user_id,
+                )
+                for stored in stored_files
+            ]
+        except BaseException:
+            db.rollback()
+            for stored in stored_files:
+                evidence_store.discard(stored.ruta_temporal)
+            raise
+        db.add_all(evidence_records)
+        db.flush()  # Assigns the ids
+        items = [
+            {
+                "id": ev.id,
+                "nombre_archivo": ev.nombre_archivo,
+                "ruta_almacenamiento": ev.ruta_almacenamiento,
+            }
+            for ev in evidence_records
+        ]
+        db.commit()
+        return items
+
     def _check_ticket_update_permissions(
         self, current_user: User, db_ticket: Ticket, ticket_in: TicketUpdate
     ):
@@ -248,7 +467,9 @@ class TicketService:
         Helper method to enforce role-based permissions for updating a ticket.
         Raises HTTPException if the current user does not have permission to perform certain updates.
         """
-        is_admin_or_lider = current_user.role.name in ["Admin", "Lider"] if current_user.role else False
+        is_admin_or_lider = (
+            current_user.role.name in ["Admin", "Lider"] if current_user.role else False
+        )
         if not is_admin_or_lider:
             update_data = ticket_in.dict(exclude_unset=True)
             # Prevent non-admin/lider users from changing ticket status
@@ -267,7 +488,7 @@ class TicketService:
                     detail="No tienes permisos para reasignar el ticket.",
                 )
 
-    def update_ticket(
+    async def update_ticket(
         self,
         db: Session,
         ticket_id: int,
@@ -276,13 +497,19 @@ class TicketService:
         files: List[UploadFile],
     ) -> Optional[TicketInDB]:
         try:
-            # Retrieve the existing ticket from the database
-            db_ticket = ticket_repository.get(db, id=ticket_id)
-            if not db_ticket:
+            # Retrieve the existing ticket with its names and evidence
+            row = ticket_repository.get_ticket_detail(db, ticket_id=ticket_id)
+            if not row:
                 return None
+            db_ticket = row.Ticket
 
             # Enforce role-based permissions for updating the ticket
             self._check_ticket_update_permissions(current_user, db_ticket, ticket_in)
+            # Read before the commits below expire current_user
+            current_user_id = current_user.id
+
+            # Write the evidence files (in the thread pool) before changing the ticket
+            stored_files = await self._store_evidence_files(files)
 
             # Store old values of the ticket for audit logging purposes
             old_values = {
@@ -294,42 +521,40 @@ class TicketService:
                 db, db_obj=db_ticket, obj_in=ticket_in
             )
 
-            # Handle file uploads if any evidence files are provided
-            for file in files:
-                if file.filename:
-                    # Generate a unique filename to prevent collisions
-                    file_extension = file.filename.split(".")[-1]
-                    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-                    file_path = f"uploads/{unique_filename}"
-
-                    # Save the uploaded file to the specified path
-                    with open(file_path, "wb") as buffer:
-                        shutil.copyfileobj(file.file, buffer)
-
-                    # Calculate SHA256 hash of the uploaded file for integrity verification
-                    sha256_hash = hashlib.sha256()
-                    with open(file_path, "rb") as f:
-                        # Read file in chunks to handle large files efficiently
-                        for byte_block in iter(lambda: f.read(4096), b""):
-                            sha256_hash.update(byte_block)
-
-                    # Create an Evidence record in the database for the uploaded file
-                    evidence = Evidence(
-                        ticket_id=updated_ticket_db.id,
-                        nombre_archivo=file.filename,
-                        ruta_almacenamiento=file_path,
-                        hash_sha256=sha256_hash.hexdigest(),
-                        subido_por_id=current_user.id,
-                    )
-                    db.add(evidence)
-                    db.commit()  # Commit after adding each evidence to ensure it's linked
-                    db.refresh(evidence)  # Refresh to get the ID
-
-            # Create an audit log entry if there were significant changes
+            # Build the response and the audit diff from the refreshed ticket
+            # before the commits below expire it
             new_values = {
                 c.name: getattr(updated_ticket_db, c.name)
                 for c in updated_ticket_db.__table__.columns
             }
+            update_data = ticket_in.dict(exclude_unset=True)
+            if "raw_logs" in update_data:
+                raw_logs = update_data["raw_logs"]
+            elif row.has_raw_logs:
+                raw_logs = ticket_repository.get_raw_logs(db, ticket_id=ticket_id)
+            else:
+                raw_logs = None
+            full_ticket = self._ticket_detail(
+                updated_ticket_db,
+                reporter_names=(
+                    (row.reporter_first_name, row.reporter_last_name)
+                    if new_values["reportado_por_id"] == old_values["reportado_por_id"]
+                    else self._user_names(db, new_values["reportado_por_id"])
+                ),
+                assignee_names=(
+                    (row.assignee_first_name, row.assignee_last_name)
+                    if new_values["asignado_a_id"] == old_values["asignado_a_id"]
+                    else self._user_names(db, new_values["asignado_a_id"])
+                ),
+                evidencia=row.evidencia,
+                raw_logs=raw_logs,
+            )
+
+            full_ticket.evidencia.extend(
+                self._add_evidence(db, full_ticket.id, stored_files, current_user_id)
+            )
+
+            # Create an audit log entry if there were significant changes
             # Identify changes by comparing old and new values
             changes = {
                 k: {"old": str(old_values[k]), "new": str(new_values[k])}
@@ -347,23 +572,17 @@ class TicketService:
             if summary_of_changes:  # Only log if there are actual changes
                 audit_log_data = AuditLogBase(
                     entidad="Ticket",
-                    entidad_id=updated_ticket_db.id,
-                    actor_id=current_user.id,
+                    entidad_id=full_ticket.id,
+                    actor_id=current_user_id,
                     accion="Actualización de Ticket",
                     detalle=json.dumps({"cambios": changes}),
                 )
                 audit_log_repository.create(db, obj_in=audit_log_data)
 
-            # Retrieve the full updated ticket details
-            full_ticket = self.get_ticket(
-                db, ticket_id=updated_ticket_db.id, current_user_id=current_user.id
-            )
+            ticket_list_cache.invalidate()
 
             # Broadcast the updated ticket information via WebSocket for real-time updates
-            if full_ticket:
-                import asyncio
-
-                asyncio.create_task(manager.broadcast(full_ticket.json()))
+            await manager.broadcast(full_ticket.json())
             return full_ticket
         except Exception as e:
             import traceback
@@ -374,17 +593,155 @@ class TicketService:
                 detail=f"An unexpected error occurred in update_ticket: {e}",
             )
 
+    async def bulk_update_tickets(
+        self, db: Session, bulk_in: TicketBulkUpdate, current_user: User
+    ) -> TicketBulkUpdateResult:
+        """
+        Applies one patch to many tickets in a single transaction: the tickets
+        are locked with one SELECT, changed with one UPDATE, and their audit
+        rows and notifications are written with executemany INSERTs. Audit
+        entries, notifications and permission checks match those of updating
+        each ticket through PUT /tickets/{id}; clients get one aggregated
+        WebSocket event instead of one per ticket.
+        """
+        patch = bulk_in.patch.dict(exclude_unset=True)
+        ticket_ids = list(dict.fromkeys(bulk_in.ticket_ids))
+        new_assignee_id = patch.get("asignado_a_id")
+        if new_assignee_id is not None and db.get(User, new_assignee_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El usuario asignado no existe.",
+            )
+
+        rows = ticket_repository.lock_many(
+            db, ids=ticket_ids, columns=[*patch, "asignado_a_id", "actualizado_en"]
+        )
+        ticket_in = TicketUpdate(**patch)
+        now = datetime.utcnow()
+        changed_rows, audit_logs = [], []
+        result = TicketBulkUpdateResult(
+            not_found_ids=sorted(set(ticket_ids) - {row.id for row in rows})
+        )
+        for row in rows:
+            self._check_ticket_update_permissions(current_user, row, ticket_in)
+            changes = {
+                field: {"old": str(getattr(row, field)), "new": str(value)}
+                for field, value in patch.items()
+                if getattr(row, field) != value
+            }
+            if not changes:
+                result.unchanged_ids.append(row.id)
+                continue
+            changes["actualizado_en"] = {
+                "old": str(row.actualizado_en),
+                "new": str(now),
+            }
+            changed_rows.append(row)
+            audit_logs.append(
+                AuditLogBase(
+                    entidad="Ticket",
+                    entidad_id=row.id,
+                    actor_id=current_user.id,
+                    accion="Actualización de Ticket",
+                    detalle=json.dumps({"cambios": changes}),
+                )
+            )
+        result.updated_ids = [row.id for row in changed_rows]
+
+        ticket_repository.update_many(
+            db, ids=result.updated_ids, values={**patch, "actualizado_en": now}
+        )
+        audit_log_repository.create_many(db, objs_in=audit_logs)
+        notifications = self._bulk_update_notifications(changed_rows, patch)
+        notification_repository.create_many(
+            db,
+            objs_in=[notification for _, notification in notifications],
+            user_ids=[user_id for user_id, _ in notifications],
+        )
+        db.commit()
+        if not changed_rows:
+            return result
+        ticket_list_cache.invalidate()
+
+        await manager.broadcast(
+            json.dumps(
+                {
+                    "type": "tickets_bulk_update",
+                    "ticket_ids": result.updated_ids,
+                    "changes": patch,
+                    "actualizado_en": now.isoformat() + "Z",
+                }
+            )
+        )
+        # One WebSocket notification per user, however many rows they got
+        notifications_by_user = {}
+        for user_id, notification in notifications:
+            notifications_by_user.setdefault(user_id, []).append(notification)
+        for user_id, user_notifications in notifications_by_user.items():
+            notification = user_notifications[0]
+            if len(user_notifications) > 1:
+                notification = NotificationCreate(
+                    message=f"Se actualizaron {len(user_notifications)} tickets en los que participás.",
+                    link="/tickets",
+                )
+            notification_data = {
+                "type": "notification",
+                "data": {
+                    "message": notification.message,
+                    "link": notification.link,
+                    "read": False,
+                    "created_at": now.isoformat(),
+                },
+            }
+            await manager.send_to_user(json.dumps(notification_data), user_id)
+        return result
+
+    def _bulk_update_notifications(
+        self, rows: List, patch: dict
+    ) -> List[Tuple[int, NotificationCreate]]:
+        """
+        The (user_id, notification) pairs PUT /tickets/{id} would create for each
+        changed ticket: the new assignee on reassignment, and the reporter and
+        assignee on a status change.
+        """
+        notifications = []
+        for row in rows:
+            link = f"/tickets/{row.id}"
+            assignee_id = patch.get("asignado_a_id", row.asignado_a_id)
+            if assignee_id and assignee_id != row.asignado_a_id:
+                message = (
+                    f"Se te ha asignado el ticket: {row.resumen} (ID: {row.ticket_uid})"
+                )
+                notifications.append(
+                    (assignee_id, NotificationCreate(message=message, link=link))
+                )
+            if "estado" in patch and patch["estado"] != row.estado:
+                estado = patch["estado"]
+                if row.reportado_por_id:
+                    message = f"El estado de tu ticket '{row.resumen}' (ID: {row.ticket_uid}) ha cambiado a '{estado}'."
+                    notifications.append(
+                        (
+                            row.reportado_por_id,
+                            NotificationCreate(message=message, link=link),
+                        )
+                    )
+                if assignee_id and assignee_id != row.reportado_por_id:
+                    message = f"El estado del ticket '{row.resumen}' (ID: {row.ticket_uid}) asignado a ti ha cambiado a '{estado}'."
+                    notifications.append(
+                        (assignee_id, NotificationCreate(message=message, link=link))
+                    )
+        return notifications
+
     def delete_ticket(
         self, db: Session, ticket_id: int, current_user_id: int
     ) -> Optional[TicketInDB]:
         # Retrieve the ticket to be deleted to include its summary in the audit log
-        ticket_to_delete = self.get_ticket(
-            db, ticket_id=ticket_id, current_user_id=current_user_id
-        )
+        ticket_to_delete = self.get_ticket(db, ticket_id=ticket_id)
         if not ticket_to_delete:
             return None
 
-        # Create an audit log entry before actually deleting the ticket
+        # The audit entry, the rows that reference the ticket and the ticket
+        # itself are written in one transaction, committed by remove()
         audit_log_data = AuditLogBase(
             entidad="Ticket",
             entidad_id=ticket_id,
@@ -393,10 +750,19 @@ class TicketService:
             detalle=json.dumps({"resumen": ticket_to_delete.resumen}),
             timestamp=datetime.utcnow(),
         )
-        audit_log_repository.create(db, obj_in=audit_log_data)
+        audit_log_repository.create_many(db, objs_in=[audit_log_data])
 
-        # Proceed with deleting the ticket from the database
+        # Blobs left without references by the evidence rows are removed later
+        # by the evidence garbage collector
+        alert_repository.remove_for_ticket(db, ticket_id=ticket_id)
+        evidence_repository.remove_for_ticket(db, ticket_id=ticket_id)
+        upload_ids = evidence_repository.remove_uploads_for_ticket(
+            db, ticket_id=ticket_id
+        )
         ticket_repository.remove(db, id=ticket_id)
+        for upload_id in upload_ids:
+            evidence_store.discard(evidence_store.partial_path(upload_id))
+        ticket_list_cache.invalidate()
         # Return the object we fetched before deleting, as the actual deletion returns None
         return ticket_to_delete
 
@@ -0,0 +1,341 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import event
+
+# Set TESTING environment variable to True before importing db.session
+os.environ["TESTING"] = "True"
+
+from db.session import engine  # noqa: E402
+from db.models import Evidence, EvidenceBlob, EvidenceUpload, User  # noqa: E402
+from schemas.evidence_upload import EvidenceUploadCreate  # noqa: E402
+from schemas.ticket import TicketCreate  # noqa: E402
+from services.evidence_gc import EvidenceGarbageCollector  # noqa: E402
+from services.evidence_store import EvidenceStore, evidence_store  # noqa: E402
+from services.evidence_upload_service import (  # noqa: E402
+    EvidenceUploadService,
+    evidence_upload_service,
+)
+from services.ticket_service import ticket_service  # noqa: E402
+
+
+@pytest.fixture()
+def db_session(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(evidence_store, "upload_dir", str(tmp_path))
+
+    async def broadcast(message):
+        pass
+
+    monkeypatch.setattr("services.ticket_service.manager.broadcast", broadcast)
+    db_session.add(
+        User(
+            username="analyst",
+            first_name="Ana",
+            last_name="Pérez",
+            email="analyst@example.com",
+            password_hash="x",
+        )
+    )
+    db_session.commit()
+    return db_session
+
+
+def _create_ticket(db, files):
+    return asyncio.run(
+        ticket_service.create_ticket(
+            db,
+            TicketCreate(
+                estado="Nuevo",
+                severidad="Alta",
+                resumen="Malware",
+                reportado_por_id=1,
+            ),
+            files=files,
+            current_user_id=1,
+        )
+    )
+
+
+def test_save_hashes_while_writing(tmp_path):
+    data = os.urandom(10_000)
+    store = EvidenceStore(upload_dir=str(tmp_path), buffer_size=4096)
+
+    stored = store.save(io.BytesIO(data), "captura.pcap")
+
+    assert stored.hash_sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.size == len(data)
+    assert stored.ruta_almacenamiento == store.blob_path(stored.hash_sha256)
+    with open(stored.ruta_temporal, "rb") as f:
+        assert f.read() == data
+
+
+def test_save_removes_partial_file(tmp_path):
+    class FailingUpload(io.BytesIO):
+        def read(self, size=-1):
+            if self.tell():
+                raise OSError("connection reset")
+            return super().read(size)
+
+    store = EvidenceStore(upload_dir=str(tmp_path), buffer_size=4)
+    with pytest.raises(OSError):
+        store.save(FailingUpload(b"12345678"), "dump.mem")
+    assert os.listdir(tmp_path / "tmp") == []
+
+
+def test_create_ticket_stores_evidence_in_one_commit(db_session):
+    payloads = [b"pcap" * 1000, b"memoria"]
+    files = [
+        UploadFile(io.BytesIO(payload), filename=name)
+        for payload, name in zip(payloads, ["captura.pcap", "dump.mem"])
+    ]
+    commits = []
+
+    def record(conn):
+        commits.append(conn)
+
+    event.listen(engine, "commit", record)
+    try:
+        ticket = _create_ticket(db_session, files)
+    finally:
+        event.remove(engine, "commit", record)
+
+    # The ticket, all of its evidence rows, and the audit entry
+    assert len(commits) == 3
+    assert [item["nombre_archivo"] for item in ticket.evidencia] == [
+        "captura.pcap",
+        "dump.mem",
+    ]
+    evidence = db_session.query(Evidence).order_by(Evidence.id).all()
+    assert [item["id"] for item in ticket.evidencia] == [ev.id for ev in evidence]
+    assert [ev.hash_sha256 for ev in evidence] == [
+        hashlib.sha256(payload).hexdigest() for payload in payloads
+    ]
+
+
+def test_same_content_is_stored_once(db_session, tmp_path):
+    payload = b"MZ" + os.urandom(5000)
+    first = _create_ticket(
+        db_session, [UploadFile(io.BytesIO(payload), filename="a.exe")]
+    )
+    second = _create_ticket(
+        db_session, [UploadFile(io.BytesIO(payload), filename="copia.exe")]
+    )
+
+    digest = hashlib.sha256(payload).hexdigest()
+    paths = {item["ruta_almacenamiento"] for item in first.evidencia + second.evidencia}
+    assert paths == {evidence_store.blob_path(digest)}
+    blob = db_session.get(EvidenceBlob, digest)
+    assert blob.ref_count == 2
+    assert blob.tamano == len(payload)
+    assert os.listdir(tmp_path / "tmp") == []
+    with open(evidence_store.blob_path(digest), "rb") as f:
+        assert f.read() == payload
+
+
+def test_unreferenced_blobs_are_collected(db_session):
+    shared, unique = b"compartido", b"solo del primero"
+    first = _create_ticket(
+        db_session,
+        [
+            UploadFile(io.BytesIO(shared), filename="log.txt"),
+            UploadFile(io.BytesIO(unique), filename="dump.mem"),
+        ],
+    )
+    _create_ticket(db_session, [UploadFile(io.BytesIO(shared), filename="log.txt")])
+    shared_hash = hashlib.sha256(shared).hexdigest()
+    unique_hash = hashlib.sha256(unique).hexdigest()
+    gc = EvidenceGarbageCollector(grace_seconds=0)
+
+    ticket_service.delete_ticket(db_session, first.id, current_user_id=1)
+
+    assert db_session.query(Evidence).filter_by(ticket_id=first.id).count() == 0
+    assert gc.collect_once() == 1
+    db_session.expire_all()
+    assert db_session.get(EvidenceBlob, unique_hash) is None
+    assert not os.path.exists(evidence_store.blob_path(unique_hash))
+    assert db_session.get(EvidenceBlob, shared_hash).ref_count == 1
+    assert os.path.exists(evidence_store.blob_path(shared_hash))
+
+
+def test_legacy_evidence_does_not_release_blob(db_session):
+    payload = b"mismo contenido"
+    digest = hashlib.sha256(payload).hexdigest()
+    _create_ticket(db_session, [UploadFile(io.BytesIO(payload), filename="a.txt")])
+    legacy = _create_ticket(db_session, [])
+    # Saved before the blob store: same hash, but at its own path
+    db_session.add(
+        Evidence(
+            ticket_id=legacy.id,
+            nombre_archivo="a.txt",
+            ruta_almacenamiento=f"{evidence_store.upload_dir}/{legacy.id}_a.txt",
+            hash_sha256=digest,
+            subido_por_id=1,
+        )
+    )
+    db_session.commit()
+
+    ticket_service.delete_ticket(db_session, legacy.id, current_user_id=1)
+
+    db_session.expire_all()
+    assert db_session.query(Evidence).filter_by(ticket_id=legacy.id).count() == 0
+    assert db_session.get(EvidenceBlob, digest).ref_count == 1
+
+
+def test_orphan_blob_files_are_collected(db_session, tmp_path):
+    payload = b"registrado"
+    kept = hashlib.sha256(payload).hexdigest()
+    _create_ticket(db_session, [UploadFile(io.BytesIO(payload), filename="a.txt")])
+    # Moved into place by a transaction that was rolled back
+    orphan = evidence_store.blob_path(hashlib.sha256(b"huerfano").hexdigest())
+    os.makedirs(os.path.dirname(orphan))
+    with open(orphan, "wb") as f:
+        f.write(b"huerfano")
+    stale_upload = evidence_store.temp_path()
+    open(stale_upload, "wb").close()
+    an_hour_ago = os.stat(orphan).st_mtime - 3600
+    for path in (orphan, stale_upload, evidence_store.blob_path(kept)):
+        os.utime(path, (an_hour_ago, an_hour_ago))
+
+    assert EvidenceGarbageCollector(grace_seconds=60).collect_orphan_files() == 2
+    assert not os.path.exists(orphan)
+    assert not os.path.exists(stale_upload)
+    assert os.path.exists(evidence_store.blob_path(kept))
+
+    # Files younger than the grace period may still be waiting for their commit
+    open(orphan, "wb").close()
+    assert EvidenceGarbageCollector(grace_seconds=60).collect_orphan_files() == 0
+    assert os.path.exists(orphan)
+
+
+async def _body(*pieces):
+    for piece in pieces:
+        yield piece
+
+
+def test_resumable_upload(db_session, tmp_path):
+    ticket = _create_ticket(db_session, [])
+    data = os.urandom(25_000)
+    uploads = EvidenceUploadService(chunk_max_bytes=10_000, max_sessions_per_user=1)
+
+    upload = uploads.create_upload(
+        db_session,
+        ticket.id,
+        EvidenceUploadCreate(nombre_archivo="disco.img", tamano=len(data)),
+        current_user_id=1,
+    )
+    with pytest.raises(HTTPException) as exc:
+        uploads.create_upload(
+            db_session,
+            ticket.id,
+            EvidenceUploadCreate(nombre_archivo="otro.img", tamano=1),
+            current_user_id=1,
+        )
+    assert exc.value.status_code == 429
+
+    def put(offset, *pieces):
+        return asyncio.run(
+            uploads.write_chunk(
+                db_session, ticket.id, upload.id, offset, _body(*pieces), 1
+            )
+        )
+
+    assert put(0, data[:4_000], data[4_000:10_000]).recibido == 10_000
+    with pytest.raises(HTTPException) as exc:
+        put(0, data[:10_000])  # A retry of an acknowledged chunk
+    assert exc.value.status_code == 409
+    with pytest.raises(HTTPException) as exc:
+        put(10_000, data[10_000:20_001])
+    assert exc.value.status_code == 413
+    # Resuming after a restart rebuilds the running hash from disk
+    uploads._hashes.clear()
+    assert put(10_000, data[10_000:20_000]).recibido == 20_000
+    assert put(20_000, data[20_000:]).recibido == len(data)
+
+    digest = hashlib.sha256(data).hexdigest()
+    upload_id = upload.id
+    item = asyncio.run(
+        uploads.complete_upload(db_session, ticket.id, upload_id, digest, 1)
+    )
+
+    assert item["nombre_archivo"] == "disco.img"
+    assert item["ruta_almacenamiento"] == evidence_store.blob_path(digest)
+    with open(item["ruta_almacenamiento"], "rb") as f:
+        assert f.read() == data
+    assert db_session.get(Evidence, item["id"]).hash_sha256 == digest
+    assert db_session.get(EvidenceBlob, digest).ref_count == 1
+    assert db_session.query(EvidenceUpload).count() == 0
+    assert os.listdir(tmp_path / "partial") == []
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(uploads.complete_upload(db_session, ticket.id, upload_id, None, 1))
+    assert exc.value.status_code == 404
+
+
+def test_upload_session_serves_one_request_at_a_time(db_session, monkeypatch):
+    ticket = _create_ticket(db_session, [])
+    pieces = [os.urandom(1000) for _ in range(10)]
+    uploads = EvidenceUploadService()
+    upload = uploads.create_upload(
+        db_session,
+        ticket.id,
+        EvidenceUploadCreate(nombre_archivo="captura.pcap", tamano=10_000),
+        current_user_id=1,
+    )
+    blocks = []
+    write_block = uploads._write_block
+
+    def record(destination, sha256_hash, block):
+        blocks.append(len(block))
+        write_block(destination, sha256_hash, block)
+
+    monkeypatch.setattr(evidence_store, "buffer_size", 4096)
+    monkeypatch.setattr(uploads, "_write_block", record)
+
+    with uploads._lock(upload.id):
+        for request in (
+            uploads.write_chunk(db_session, ticket.id, upload.id, 0, _body(), 1),
+            uploads.complete_upload(db_session, ticket.id, upload.id, None, 1),
+        ):
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(request)
+            assert exc.value.status_code == 409
+
+    asyncio.run(
+        uploads.write_chunk(db_session, ticket.id, upload.id, 0, _body(*pieces), 1)
+    )
+    # Copied as it arrives, in blocks of about buffer_size
+    assert blocks == [5000, 5000]
+    item = asyncio.run(
+        uploads.complete_upload(db_session, ticket.id, upload.id, None, 1)
+    )
+    assert item["ruta_almacenamiento"] == evidence_store.blob_path(
+        hashlib.sha256(b"".join(pieces)).hexdigest()
+    )
+
+
+def test_expired_upload_sessions_are_forgotten(db_session, tmp_path):
+    ticket = _create_ticket(db_session, [])
+    upload = evidence_upload_service.create_upload(
+        db_session,
+        ticket.id,
+        EvidenceUploadCreate(nombre_archivo="dump.mem", tamano=10),
+        current_user_id=1,
+    )
+    upload_id = upload.id
+    asyncio.run(
+        evidence_upload_service.write_chunk(
+            db_session, ticket.id, upload_id, 0, _body(b"12345"), 1
+        )
+    )
+    assert upload_id in evidence_upload_service._hashes
+    assert upload_id in evidence_upload_service._locks
+
+    gc = EvidenceGarbageCollector(upload_ttl_seconds=-60)
+    assert gc.collect_expired_uploads() == 1
+
+    assert upload_id not in evidence_upload_service._hashes
+    assert upload_id not in evidence_upload_service._locks
+    assert os.listdir(tmp_path / "partial") == []
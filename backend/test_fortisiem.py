@@ -0,0 +1,370 @@
+import asyncio
+import json
+import os
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+# Set TESTING environment variable to True before importing app and db.session
+os.environ["TESTING"] = "True"
+
+from main import app  # noqa: E402
+from db.models import (  # noqa: E402
+    Alert,
+    AuditLog,
+    IngestQueueItem,
+    Ticket,
+    TicketRawLog,
+)
+from api.routers.fortisiem import get_db, _split_batch_payload  # noqa: E402
+from services.siem_ingest_service import (  # noqa: E402
+    _parse_fortigate_log,
+    _parse_fortisiem_xml,
+    _tokenize_fortigate_log,
+    create_tickets_from_raw_logs,
+)
+from repositories.ticket_repository import (  # noqa: E402
+    ticket_repository,
+)
+from services.ingest_service import IngestWorkerPool  # noqa: E402
+from services.correlation_service import incident_correlation_service  # noqa: E402
+from services.syslog_service import SyslogListener, strip_syslog_priority  # noqa: E402
+
+FORTIGATE_LOG = (
+    'date=2025-11-11 time=12:55:54 devname="PFA-cluster_FG10E0" logid="0720018432" '
+    'type="utm" subtype="anomaly" level="alert" srcip=186.57.15.218 '
+    'dstip=200.105.122.1 action="detected" policyid=3 msg="anomaly: udp_scan"'
+)
+
+FORTISIEM_XML = (
+    '<incident incidentId="1814704" severity="9" incidentCategory="Security/Execution">'
+    "<name>High Severity Inbound Permitted IPS Exploit</name>"
+    "<description>Detects a permitted high severity IPS exploit.</description>"
+    "<displayTime>Tue Nov 11 12:56:30 ART 2025</displayTime>"
+    "<rawEvents>[NonIPSHighSev] srcip=186.57.15.218</rawEvents>"
+    "</incident>"
+)
+
+
+@pytest.fixture()
+def db_session(db_session):
+    def _get_test_db():
+        yield db_session
+
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = _get_test_db
+    try:
+        yield db_session
+    finally:
+        if previous_override is not None:
+            app.dependency_overrides[get_db] = previous_override
+        else:
+            app.dependency_overrides.pop(get_db, None)
+
+
+def test_tokenize_fortigate_log_handles_both_syntaxes():
+    log = 'logid="0100" msg="" level=warning [hostName]=WS-01, hostName=ignored'
+    assert _tokenize_fortigate_log(log) == {
+        "logid": "0100",
+        "msg": "",
+        "level": "warning",
+        "hostName": "WS-01",
+    }
+
+
+def test_parse_fortigate_log_field_fallbacks():
+    parsed = _parse_fortigate_log(FORTIGATE_LOG)
+    assert parsed["incident_id"] == "0720018432"
+    assert parsed["rule_name"] == "anomaly: udp_scan"
+    assert parsed["source_host"] == "PFA-cluster_FG10E0"
+    assert parsed["url"] == "N/A"
+
+    parsed = _parse_fortigate_log("[phLogDetail]=Login failed,[hostname]=WS-02")
+    assert parsed["rule_name"] == "Login failed"
+    assert parsed["description"] == "Login failed"
+    assert parsed["source_host"] == "WS-02"
+
+
+def test_parse_fortigate_log_reads_pairs_inside_bracketed_values():
+    log = (
+        "[phCustId]=1,[rawEventMsg]=<185>date=2025-11-11 time=12:55:54 "
+        "devname=FG1 srcip=1.2.3.4 dstip=5.6.7.8 level=alert msg=hi,"
+        "[hostName]=WS1"
+    )
+    parsed = _parse_fortigate_log(log)
+    assert parsed["source_ip"] == "1.2.3.4"
+    assert parsed["destination_ip"] == "5.6.7.8"
+    assert parsed["source_host"] == "FG1"
+    assert parsed["severity_str"] == "alert"
+    assert parsed["rule_name"] == "hi"
+    assert parsed["description"] == "hi"
+    # Bracketed keys still win over pairs with the same key
+    assert _tokenize_fortigate_log("[level]=low,[raw]=level=alert")["level"] == "low"
+
+
+def test_parse_fortisiem_xml_extracts_fields_and_raw_events():
+    xml = (
+        '<incident incidentId="42" severity="7" incidentCategory="Security">'
+        "<name>Rule</name><remediation/>"
+        "<rawEvents> &lt;185&gt;devname=&quot;FG&quot; srcip=10.0.0.1 </rawEvents>"
+        '<incidentTarget><entry name="Host IP">10.0.0.9</entry>'
+        '<entry name="Host Name">srv-01</entry></incidentTarget>'
+        "</incident>"
+    )
+    parsed = _parse_fortisiem_xml(xml)
+    assert parsed["incident_id"] == "42"
+    assert parsed["rule_name"] == "Rule"
+    assert parsed["remediation"] == ""
+    assert parsed["description"] == "No description provided."
+    assert parsed["source_ip"] == "10.0.0.9"
+    assert parsed["source_host"] == "srv-01"
+    assert parsed["raw_log"] == '<185>devname="FG" srcip=10.0.0.1'
+
+
+def test_parse_fortisiem_xml_rejects_oversized_payload(monkeypatch):
+    monkeypatch.setattr("services.siem_ingest_service.SIEM_MAX_PAYLOAD_BYTES", 100)
+    with pytest.raises(HTTPException) as exc_info:
+        _parse_fortisiem_xml(FORTISIEM_XML)
+    assert exc_info.value.status_code == 413
+
+
+def test_split_batch_payload_ndjson():
+    payload = "\n".join(
+        [json.dumps(FORTIGATE_LOG), "", json.dumps({"raw_log": FORTISIEM_XML})]
+    )
+    assert _split_batch_payload(payload) == [FORTIGATE_LOG, FORTISIEM_XML]
+
+
+def test_split_batch_payload_xml_envelope():
+    payload = f"<incidents>{FORTISIEM_XML}{FORTISIEM_XML}</incidents>"
+    items = _split_batch_payload(payload)
+    assert len(items) == 2
+    assert all(item.startswith("<incident ") for item in items)
+
+
+def test_batch_ingestion_creates_tickets_and_audit_rows(db_session):
+    client = TestClient(app)
+    payload = "\n".join(
+        [
+            json.dumps(FORTIGATE_LOG),
+            json.dumps("<incident><broken"),
+            json.dumps(FORTISIEM_XML),
+        ]
+    )
+
+    response = client.post("/api/v1/fortisiem-incidents/batch", content=payload)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["received"] == 3
+    assert body["created"] == 2
+    assert [r["status"] for r in body["results"]] == ["created", "error", "created"]
+    assert db_session.query(Ticket).count() == 2
+    assert (
+        db_session.query(AuditLog)
+        .filter(AuditLog.accion == "Creación de Ticket (SIEM)")
+        .count()
+        == 2
+    )
+    uids = {r["ticket_uid"] for r in body["results"] if r["status"] == "created"}
+    assert len(uids) == 2
+
+    alerts = db_session.query(Alert).order_by(Alert.id).all()
+    assert [alert.ticket_id for alert in alerts] == [
+        body["results"][0]["ticket_id"],
+        body["results"][2]["ticket_id"],
+    ]
+    assert alerts[0].fuente == "FortiGate"
+    assert alerts[0].ip_origen == "186.57.15.218"
+    assert alerts[0].ip_destino == "200.105.122.1"
+    assert alerts[0].firma_id == "0720018432"
+    assert alerts[1].fuente == "FortiSIEM"
+    assert alerts[1].ip_origen is None
+
+
+def test_async_ingestion_queues_and_drains(db_session):
+    client = TestClient(app)
+    response = client.post("/api/v1/fortisiem-incident/async", content=FORTIGATE_LOG)
+    assert response.status_code == 202
+    assert response.json()["queued"] == 1
+
+    stats = client.get("/api/v1/fortisiem-incident/queue").json()
+    assert stats["pending"] == 1
+
+    assert IngestWorkerPool(batch_size=10).drain_once() == 1
+
+    db_session.expire_all()
+    assert db_session.query(Ticket).count() == 1
+    stats = client.get("/api/v1/fortisiem-incident/queue").json()
+    assert stats["pending"] == 0
+    assert stats["failed"] == 0
+
+
+def test_stale_claims_are_requeued(db_session):
+    now = datetime.utcnow()
+    abandoned, in_progress, exhausted = (
+        IngestQueueItem(
+            payload=FORTIGATE_LOG,
+            estado="procesando",
+            intentos=intentos,
+            reclamado_en=reclamado_en,
+        )
+        for intentos, reclamado_en in (
+            (1, now - timedelta(hours=1)),
+            (1, now),
+            (5, now - timedelta(hours=1)),
+        )
+    )
+    db_session.add_all([abandoned, in_progress, exhausted])
+    db_session.commit()
+    ids = [abandoned.id, in_progress.id, exhausted.id]
+
+    assert IngestWorkerPool(claim_timeout=600, max_attempts=5).drain_once() == 1
+
+    db_session.expire_all()
+    assert db_session.query(Ticket).count() == 1
+    abandoned, in_progress, exhausted = (
+        db_session.get(IngestQueueItem, item_id) for item_id in ids
+    )
+    assert abandoned is None
+    assert in_progress.estado == "procesando"
+    assert exhausted.estado == "error"
+
+
+def test_repeated_incidents_are_correlated_into_open_ticket(db_session):
+    client = TestClient(app)
+    payload = "\n".join([json.dumps(FORTIGATE_LOG), json.dumps(FORTIGATE_LOG)])
+
+    body = client.post("/api/v1/fortisiem-incidents/batch", content=payload).json()
+    assert body["created"] == 1
+    assert body["correlated"] == 1
+    ticket_id = body["results"][0]["ticket_id"]
+    assert body["results"][1]["ticket_id"] == ticket_id
+
+    # A later single incident is appended through the in-memory cache
+    response = client.post("/api/v1/fortisiem-incident", content=FORTIGATE_LOG)
+    assert response.status_code == 200
+    assert f"ticket {ticket_id}" in response.text
+
+    # After a cache miss the indexed fingerprint column is used
+    incident_correlation_service.clear()
+    client.post("/api/v1/fortisiem-incident", content=FORTIGATE_LOG)
+
+    ticket = db_session.query(Ticket).one()
+    db_session.refresh(ticket)
+    assert ticket.ocurrencias == 4
+    assert db_session.query(Alert).filter(Alert.ticket_id == ticket.id).count() == 4
+    raw_logs = ticket_repository.get_raw_logs(db_session, ticket_id=ticket.id)
+    assert raw_logs.count("udp_scan") == 4
+    assert db_session.query(TicketRawLog).count() == 4
+
+    # Closed tickets no longer absorb repeats
+    ticket.estado = "Cerrado"
+    db_session.commit()
+    client.post("/api/v1/fortisiem-incident", content=FORTIGATE_LOG)
+    assert db_session.query(Ticket).count() == 2
+
+
+def test_rolled_back_batch_is_not_remembered(db_session, monkeypatch):
+    incident_correlation_service.clear()
+    create_tickets_from_raw_logs(db_session, [FORTIGATE_LOG])
+    incident_correlation_service.clear()
+    new = FORTIGATE_LOG.replace("186.57.15.218", "10.0.0.9")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(
+        "services.siem_ingest_service.alert_repository.create_many", fail
+    )
+    with pytest.raises(RuntimeError):
+        create_tickets_from_raw_logs(db_session, [FORTIGATE_LOG, new])
+
+    # Neither the correlated ticket nor the rolled-back one is cached
+    assert not incident_correlation_service._recent
+    assert db_session.query(Ticket).count() == 1
+
+
+def _free_port(kind):
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_strip_syslog_priority_keeps_xml():
+    assert (
+        strip_syslog_priority("<185>logver=7 srcip=1.2.3.4") == "logver=7 srcip=1.2.3.4"
+    )
+    assert strip_syslog_priority(FORTISIEM_XML) == FORTISIEM_XML
+
+
+def test_syslog_listener_batches_udp_and_tcp_messages(db_session):
+    udp_port = _free_port(socket.SOCK_DGRAM)
+    tcp_port = _free_port(socket.SOCK_STREAM)
+    listener = SyslogListener(
+        host="127.0.0.1",
+        udp_port=udp_port,
+        tcp_port=tcp_port,
+        batch_size=10,
+        flush_interval_ms=50,
+        max_message_bytes=len(FORTIGATE_LOG) + 5,
+    )
+    octet_counted = FORTIGATE_LOG.replace("186.57.15.218", "10.0.0.2").encode()
+    newline_framed = FORTIGATE_LOG.replace("186.57.15.218", "10.0.0.3").encode()
+    oversized = octet_counted * 3
+
+    async def scenario():
+        await listener.start()
+        try:
+            loop = asyncio.get_running_loop()
+            transport, _ = await loop.create_datagram_endpoint(
+                asyncio.DatagramProtocol, remote_addr=("127.0.0.1", udp_port)
+            )
+            transport.sendto(b"<185>" + FORTIGATE_LOG.encode())
+            transport.close()
+
+            _, writer = await asyncio.open_connection("127.0.0.1", tcp_port)
+            # Dropped without closing the connection
+            writer.write(b"%d %s" % (len(oversized), oversized))
+            writer.write(b"%d %s" % (len(octet_counted), octet_counted))
+            writer.write(newline_framed + b"\n")
+            await writer.drain()
+            writer.close()
+
+            for _ in range(100):
+                if listener.counters["parsed"] >= 3:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await listener.stop()
+
+    asyncio.run(scenario())
+
+    stats = listener.get_stats()
+    assert stats["received"] == 4
+    assert stats["parsed"] == 3
+    assert stats["dropped"] == 1
+    assert db_session.query(Ticket).count() == 3
+
+
+def test_substring_search_matches_ioc_fragments(db_session):
+    sha256 = "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+    log = FORTIGATE_LOG + f' filehash="{sha256.upper()}"'
+    client = TestClient(app)
+    client.post("/api/v1/fortisiem-incident", content=log)
+
+    ticket = db_session.query(Ticket).one()
+    assert ticket.iocs == f"186.57.15.218 200.105.122.1 pfa-cluster_fg10e0 {sha256}"
+
+    for fragment in ("57.15.2", "FG10E0", "c55ad015a3"):
+        rows, total_count, _ = ticket_repository.get_tickets_with_details(
+            db_session, search=fragment, search_mode="substring"
+        )
+        assert [row[0].id for row in rows] == [ticket.id]
+    _, total_count, _ = ticket_repository.get_tickets_with_details(
+        db_session, search="10.9.9.9", search_mode="substring"
+    )
+    assert total_count == 0
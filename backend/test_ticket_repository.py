@@ -0,0 +1,394 @@
+import os
+from datetime import datetime, timedelta
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_mock_engine, event
+from sqlalchemy.dialects import postgresql
+
+# Set TESTING environment variable to True before importing db.session
+os.environ["TESTING"] = "True"
+
+from db.base import Base  # noqa: E402
+from db.session import engine  # noqa: E402
+from db.models import Evidence, Ticket, TicketRawLog  # noqa: E402
+from db.search import prefix_tsquery  # noqa: E402
+from repositories.report_repository import report_repository  # noqa: E402
+from repositories.ticket_repository import (  # noqa: E402
+    ticket_count_cache,
+    ticket_repository,
+)
+from schemas.ticket import TicketCreate  # noqa: E402
+from services.ticket_cache import ticket_list_cache  # noqa: E402
+
+
+def test_reserve_ticket_uids_is_contiguous_and_per_year(db_session):
+    first_block = ticket_repository.reserve_ticket_uids(db_session, count=3, year=2025)
+    second_block = ticket_repository.reserve_ticket_uids(db_session, count=2, year=2025)
+    other_year = ticket_repository.reserve_ticket_uids(db_session, count=1, year=2026)
+
+    assert first_block == ["TCK-2025-000001", "TCK-2025-000002", "TCK-2025-000003"]
+    assert second_block == ["TCK-2025-000004", "TCK-2025-000005"]
+    assert other_year == ["TCK-2026-000001"]
+
+
+def test_reserve_ticket_uids_continues_after_existing_tickets(db_session):
+    db_session.add(
+        Ticket(
+            ticket_uid="TCK-2025-000041",
+            estado="Nuevo",
+            severidad="Baja",
+            resumen="Legacy",
+        )
+    )
+    db_session.commit()
+
+    assert ticket_repository.reserve_ticket_uids(db_session, count=1, year=2025) == [
+        "TCK-2025-000042"
+    ]
+
+
+def test_create_many_with_owner_assigns_unique_uids(db_session):
+    tickets = ticket_repository.create_many_with_owner(
+        db_session,
+        objs_in=[
+            TicketCreate(estado="Nuevo", severidad="Baja", resumen=f"Ticket {i}")
+            for i in range(5)
+        ],
+    )
+    db_session.commit()
+
+    assert len({ticket.ticket_uid for ticket in tickets}) == 5
+    assert ticket_repository.create_with_owner(
+        db_session,
+        obj_in=TicketCreate(estado="Nuevo", severidad="Baja", resumen="Single"),
+    ).ticket_uid not in {ticket.ticket_uid for ticket in tickets}
+
+
+def test_raw_logs_are_stored_compressed_outside_the_ticket(db_session):
+    raw_logs = "\n".join(f"srcip=10.0.0.{i % 5} action=deny" for i in range(200))
+    ticket = ticket_repository.create_with_owner(
+        db_session,
+        obj_in=TicketCreate(
+            estado="Nuevo", severidad="Alta", resumen="SIEM", raw_logs=raw_logs
+        ),
+    )
+
+    segment = db_session.query(TicketRawLog).filter_by(ticket_id=ticket.id).one()
+    assert segment.tamano == len(raw_logs)
+    assert len(segment.contenido) < len(raw_logs) // 10
+    assert ticket_repository.get_raw_logs(db_session, ticket_id=ticket.id) == raw_logs
+    assert list(ticket_repository.iter_raw_logs(db_session)) == [(ticket.id, raw_logs)]
+
+    ticket_repository.update(db_session, db_obj=ticket, obj_in={"raw_logs": "nuevo"})
+    assert ticket_repository.get_raw_logs(db_session, ticket_id=ticket.id) == "nuevo"
+    assert db_session.query(TicketRawLog).count() == 1
+
+
+def _walk_pages(db_session, **kwargs):
+    ids, cursor = [], None
+    while True:
+        rows, total_count, cursor = ticket_repository.get_tickets_with_details(
+            db_session, limit=3, cursor=cursor, **kwargs
+        )
+        ids.extend(row[0].id for row in rows)
+        if cursor is None:
+            return ids, total_count
+
+
+def test_cursor_pagination_matches_offset_order(db_session):
+    created = datetime(2025, 1, 1)
+    for i in range(8):
+        db_session.add(
+            Ticket(
+                ticket_uid=f"TCK-2025-{i + 1:06d}",
+                estado="Nuevo",
+                severidad="Baja",
+                resumen=f"Ticket {i}",
+                # Ties on creado_en and NULL actualizado_en exercise the id tie-break
+                creado_en=created + timedelta(hours=i // 2),
+                actualizado_en=created + timedelta(days=i) if i % 3 else None,
+            )
+        )
+    db_session.commit()
+
+    for sort_by, sort_order in [
+        ("creado_en", "desc"),
+        ("creado_en", "asc"),
+        ("actualizado_en", "desc"),
+        (None, None),
+    ]:
+        offset_rows, _, _ = ticket_repository.get_tickets_with_details(
+            db_session, limit=100, sort_by=sort_by, sort_order=sort_order
+        )
+        ids, total_count = _walk_pages(
+            db_session, sort_by=sort_by, sort_order=sort_order
+        )
+        assert ids == [row[0].id for row in offset_rows]
+        assert total_count == 8
+
+
+def test_cursor_must_match_sort_order(db_session):
+    for i in range(2):
+        db_session.add(
+            Ticket(
+                ticket_uid=f"TCK-2025-{i + 1:06d}",
+                estado="Nuevo",
+                severidad="Baja",
+                resumen=f"Ticket {i}",
+            )
+        )
+    db_session.commit()
+    _, _, cursor = ticket_repository.get_tickets_with_details(
+        db_session, limit=1, sort_by="creado_en", sort_order="desc"
+    )
+
+    with pytest.raises(ValueError):
+        ticket_repository.get_tickets_with_details(
+            db_session, limit=1, sort_by="creado_en", sort_order="asc", cursor=cursor
+        )
+    with pytest.raises(ValueError):
+        ticket_repository.get_tickets_with_details(db_session, cursor="not-a-cursor")
+
+
+def test_count_modes(db_session):
+    def add_ticket(i):
+        db_session.add(
+            Ticket(
+                ticket_uid=f"TCK-2025-{i:06d}",
+                estado="Nuevo",
+                severidad="Alta",
+                resumen=f"Ticket {i}",
+            )
+        )
+        db_session.commit()
+
+    for i in range(1, 4):
+        add_ticket(i)
+
+    rows, total_count, next_cursor = ticket_repository.get_tickets_with_details(
+        db_session, limit=2, count_mode="none"
+    )
+    assert total_count is None
+    assert len(rows) == 2 and next_cursor is not None
+
+    _, total_count, _ = ticket_repository.get_tickets_with_details(
+        db_session, severity="Alta", count_mode="exact"
+    )
+    assert total_count == 3
+
+    # Exact counts are served from the short-lived cache for the same filters
+    add_ticket(4)
+    _, cached_count, _ = ticket_repository.get_tickets_with_details(
+        db_session, severity="Alta"
+    )
+    assert cached_count == 3
+    ticket_count_cache.clear()
+    ticket_list_cache.invalidate()
+    _, total_count, _ = ticket_repository.get_tickets_with_details(
+        db_session, severity="Alta", count_mode="estimate"
+    )
+    assert total_count == 4  # SQLite has no planner estimates: exact count
+
+    with pytest.raises(ValueError):
+        ticket_repository.get_tickets_with_details(db_session, count_mode="bogus")
+
+
+def test_prefix_tsquery_requires_every_word_as_prefix():
+    assert prefix_tsquery("Malware  WS-01!") == "malware:* & ws:* & 01:*"
+    assert prefix_tsquery("  ¿? ") == ""
+
+
+def test_search_uses_full_text_index_on_postgresql():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    search_filter, ts_query = ticket_repository._search_filter(db, "udp scan")
+
+    assert ts_query is not None
+    sql = str(search_filter.compile(dialect=postgresql.dialect()))
+    assert "tickets.search_vector @@ to_tsquery" in sql
+    assert "ILIKE" not in sql
+    # One index-backed arm per match, never OR-ed across tickets and alerts
+    assert sql.startswith("tickets.id IN (")
+    assert sql.count(" UNION SELECT ") == 2
+    assert "OR tickets." not in sql
+
+
+def test_search_falls_back_to_ilike_on_sqlite(db_session):
+    for i, resumen in enumerate(["Escaneo UDP detectado", "Phishing reportado"]):
+        db_session.add(
+            Ticket(
+                ticket_uid=f"TCK-2025-{i + 1:06d}",
+                estado="Nuevo",
+                severidad="Baja",
+                resumen=resumen,
+            )
+        )
+    db_session.commit()
+
+    rows, total_count, _ = ticket_repository.get_tickets_with_details(
+        db_session, search="udp"
+    )
+    assert [row[0].resumen for row in rows] == ["Escaneo UDP detectado"]
+    assert total_count == 1
+
+
+def test_ticket_list_defaults_to_summary_projection(db_session):
+    from fastapi import HTTPException
+
+    from services.ticket_service import ticket_service
+
+    ticket_repository.create_with_owner(
+        db_session,
+        obj_in=TicketCreate(
+            estado="Nuevo",
+            severidad="Alta",
+            resumen="Projected",
+            descripcion="x" * 5000,
+            rule_description="Long rule text",
+        ),
+    )
+    db_session.commit()
+    db_session.expire_all()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        tickets, _, _ = ticket_service.get_paginated_tickets(db_session)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    # Large text columns are deferred, not read and discarded
+    assert not any("tickets.descripcion" in statement for statement in statements)
+    assert tickets[0]["resumen"] == "Projected"
+    assert "descripcion" not in tickets[0]
+    assert "rule_description" not in tickets[0]
+    assert tickets[0]["has_raw_logs"] is False
+
+    db_session.expire_all()
+    tickets, _, _ = ticket_service.get_paginated_tickets(
+        db_session, fields="id,rule_description"
+    )
+    assert tickets == [{"id": tickets[0]["id"], "rule_description": "Long rule text"}]
+
+    tickets, _, _ = ticket_service.get_paginated_tickets(db_session, fields="all")
+    assert tickets[0]["descripcion"] == "x" * 5000
+    assert tickets[0]["reportado_por_nombre"] == "Sistema"
+
+    with pytest.raises(HTTPException) as exc_info:
+        ticket_service.get_paginated_tickets(db_session, fields="password")
+    assert exc_info.value.status_code == 400
+
+
+def _query_plans(db, run):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return [
+        " / ".join(
+            row[3]
+            for row in db.connection().exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+        )
+        for statement, parameters in statements
+    ]
+
+
+@pytest.mark.parametrize(
+    "run, index",
+    [
+        (
+            lambda db: report_repository.get_my_assigned_tickets_count(db, 1),
+            "COVERING INDEX ix_tickets_open_asignado_a_id",
+        ),
+        (
+            lambda db: ticket_repository.get_tickets_with_details(
+                db, status="Abierto", columns=["id", "resumen"]
+            ),
+            "ix_tickets_estado_creado_en",
+        ),
+        (
+            lambda db: ticket_repository.get_tickets_with_details(
+                db, status="Abierto", assigned_to_me_id=1, columns=["id"]
+            ),
+            "ix_tickets_",
+        ),
+        (
+            lambda db: ticket_repository.get_open_by_fingerprint(
+                db, fingerprint="f" * 64, since=datetime(2025, 1, 1)
+            ),
+            "ix_tickets_open_fingerprint",
+        ),
+    ],
+)
+def test_ticket_query_patterns_use_composite_indexes(db_session, run, index):
+    plans = _query_plans(db_session, lambda: run(db_session))
+
+    assert plans
+    for plan in plans:
+        assert "SCAN tickets" not in plan
+        assert "TEMP B-TREE" not in plan
+        assert index in plan
+
+
+def test_ticket_indexes_on_postgresql():
+    statements = []
+    mock_engine = create_mock_engine(
+        "postgresql://",
+        lambda sql, *args, **kwargs: statements.append(
+            str(sql.compile(dialect=mock_engine.dialect))
+        ),
+    )
+    Base.metadata.create_all(mock_engine, tables=[Ticket.__table__], checkfirst=False)
+
+    assert (
+        "CREATE INDEX ix_tickets_estado_creado_en "
+        "ON tickets (estado, creado_en DESC NULLS LAST, id DESC)"
+    ) in statements
+    assert (
+        "CREATE INDEX ix_tickets_open_fingerprint ON tickets (fingerprint, id DESC) "
+        "WHERE (estado NOT IN ('Cerrado', 'Resuelto'))"
+    ) in statements
+    assert (
+        "CREATE INDEX ix_tickets_open_asignado_a_id ON tickets (asignado_a_id, estado) "
+        "WHERE (estado NOT IN ('Cerrado', 'Resuelto'))"
+    ) in statements
+
+
+def test_ticket_detail_loads_in_one_query(db_session, sample_tickets, recorded_queries):
+    db_session.add_all(
+        Evidence(
+            ticket_id=1,
+            nombre_archivo=f"captura{i}.pcap",
+            ruta_almacenamiento=f"uploads/{i}.pcap",
+            hash_sha256="0" * 64,
+            subido_por_id=1,
+        )
+        for i in range(2)
+    )
+    db_session.get(Ticket, 1).asignado_a_id = 1
+    db_session.commit()
+
+    # Ticket, reporter and assignee names and evidence in one statement
+    with recorded_queries() as statements:
+        row = ticket_repository.get_ticket_detail(db_session, ticket_id=1)
+    assert len(statements) == 1
+    assert row.Ticket.id == 1
+    assert (row.assignee_first_name, row.assignee_last_name) == ("José", "Núñez")
+    assert [evidence["nombre_archivo"] for evidence in row.evidencia] == [
+        "captura0.pcap",
+        "captura1.pcap",
+    ]
+    assert not row.has_raw_logs
@@ -0,0 +1,113 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+# Set TESTING environment variable to True before importing db.session
+os.environ["TESTING"] = "True"
+
+from repositories.ticket_repository import (  # noqa: E402
+    ticket_repository,
+)
+from schemas.ticket import (  # noqa: E402
+    TicketInDB,
+    convert_to_utc_iso_z,
+)
+from services.ticket_serializer import ticket_serializer  # noqa: E402
+from services.ticket_service import ticket_service  # noqa: E402
+
+
+def _legacy_list_item(ticket, first_name, last_name, has_raw_logs, fields):
+    # Previous list path: ORM entity, hand-formatted datetimes, jsonable_encoder
+    values = {name: getattr(ticket, name, None) for name in fields}
+    for name, value in values.items():
+        if isinstance(value, datetime):
+            values[name] = (
+                value.isoformat() + "Z"
+                if name in ("creado_en", "actualizado_en", "cerrado_en")
+                else convert_to_utc_iso_z(value)
+            )
+    if "reportado_por_nombre" in fields:
+        values["reportado_por_nombre"] = (
+            f"{first_name} {last_name}"
+            if first_name and last_name
+            else "Sistema" if ticket.reportado_por_id is None else "Desconocido"
+        )
+    if "has_raw_logs" in fields:
+        values["has_raw_logs"] = bool(has_raw_logs)
+    return values
+
+
+@pytest.mark.parametrize("fields", [None, "all", "id,rule_description,cerrado_en"])
+def test_list_serialization_matches_jsonable_encoder(
+    db_session, sample_tickets, fields
+):
+    tickets, total_count, _ = ticket_service.get_paginated_tickets(
+        db_session, fields=fields
+    )
+    _, output_fields = ticket_service._resolve_list_fields(fields)
+    rows, _, _ = ticket_repository.get_tickets_with_details(db_session)
+    legacy = [_legacy_list_item(*row, output_fields) for row in rows]
+    page = {"total_count": total_count, "tickets": tickets, "next_cursor": None}
+
+    assert (
+        ORJSONResponse(content=page).body
+        == JSONResponse(content=jsonable_encoder({**page, "tickets": legacy})).body
+    )
+
+
+def test_detail_serialization_matches_response_model(db_session, sample_tickets):
+    field = create_response_field(name="ticket", type_=TicketInDB)
+    for ticket_id in (1, 2):
+        ticket = ticket_service.get_ticket(db_session, ticket_id)
+        expected = asyncio.run(serialize_response(field=field, response_content=ticket))
+
+        assert (
+            ORJSONResponse(content=ticket_serializer.ticket_detail(ticket)).body
+            == JSONResponse(content=expected).body
+        )
+
+
+def test_export_streams_csv_and_ndjson_in_batches(
+    db_session, sample_tickets, monkeypatch
+):
+    monkeypatch.setattr("services.ticket_service.TICKET_EXPORT_BATCH_SIZE", 1)
+    tickets, _, _ = ticket_service.get_paginated_tickets(
+        db_session, fields="all", sort_by="id", sort_order="asc"
+    )
+
+    chunks = list(ticket_service.export_tickets(db_session, export_format="ndjson"))
+    assert len(chunks) == 2  # One chunk per batch of one ticket
+    assert [json.loads(line) for line in b"".join(chunks).splitlines()] == tickets
+
+    chunks = ticket_service.export_tickets(
+        db_session, export_format="csv", fields="id,resumen", compress=True
+    )
+    rows = list(csv.reader(io.StringIO(gzip.decompress(b"".join(chunks)).decode())))
+    assert rows == [["id", "resumen"]] + [
+        [str(ticket["id"]), ticket["resumen"]] for ticket in tickets
+    ]
+
+    chunks = ticket_service.export_tickets(
+        db_session, export_format="csv", fields="id", status="Cerrado"
+    )
+    assert b"".join(chunks).decode().split() == ["id", "2"]
+
+
+@pytest.mark.parametrize("fields", ["id", None, "all"])
+def test_estimated_json_size_tracks_serialized_size(db_session, sample_tickets, fields):
+    tickets, _, _ = ticket_service.get_paginated_tickets(db_session, fields=fields)
+    _, output_fields = ticket_service._resolve_list_fields(fields)
+
+    estimated = ticket_serializer.estimated_json_size(tickets, output_fields)
+    actual = len(ORJSONResponse(content=tickets).body)
+    assert actual / 2 <= estimated <= actual * 2
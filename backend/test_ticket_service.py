@@ -1,11 +1,23 @@
+import asyncio
 import pytest
 from unittest.mock import MagicMock, patch
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 
 from services.ticket_service import TicketService
+from services.ticket_cache import ticket_list_cache
+from services.siem_ingest_service import create_tickets_from_raw_logs
+from db.session import engine
 from repositories.ticket_repository import ticket_repository
-from db.models import Ticket  # Import Ticket and User models
+from schemas.ticket import TicketCreate, TicketUpdate
+from db.models import (
+    Alert,
+    AuditLog,
+    Ticket,
+    TicketRawLog,
+    User,
+)  # Import Ticket and User models
 
 # Initialize the service
 ticket_service = TicketService()
@@ -28,7 +40,7 @@ def test_get_ticket_found(mock_repo, mock_db_session):
     """
     Test case for get_ticket when a ticket is found.
     """
-    # Mock the return value of get_ticket_with_details
+    # Mock the return value of get_ticket_detail
     mock_ticket_obj = MagicMock(spec=Ticket)
     mock_ticket_obj.id = 1
     mock_ticket_obj.resumen = "Test Ticket Summary"
@@ -47,34 +59,37 @@ def test_get_ticket_found(mock_repo, mock_db_session):
     mock_ticket_obj.impacto = "Alto"  # Added missing attribute
     mock_ticket_obj.causa_raiz = "Test Root Cause"  # Added missing attribute
     mock_ticket_obj.resolucion = "Test Resolution"  # Added missing attribute
-    mock_ticket_obj.raw_logs = "Test Raw Logs"  # Added missing attribute
     mock_ticket_obj.ticket_uid = "test-uid-123"  # Added missing attribute
     mock_ticket_obj.platform = "Test Platform"
     mock_reporter_first_name = "John"
     mock_reporter_last_name = "Doe"
 
-    mock_repo.get_ticket_with_details.return_value = (
-        mock_ticket_obj,
-        mock_reporter_first_name,
-        mock_reporter_last_name,
+    mock_repo.get_ticket_detail.return_value = MagicMock(
+        Ticket=mock_ticket_obj,
+        reporter_first_name=mock_reporter_first_name,
+        reporter_last_name=mock_reporter_last_name,
+        assignee_first_name=None,
+        assignee_last_name=None,
+        evidencia=[],
+        has_raw_logs=True,
     )
-    mock_repo.get_evidence_for_ticket.return_value = []
     mock_repo.get_alert_for_ticket.return_value = None
+    mock_repo.get_raw_logs.return_value = "Test Raw Logs"
 
     ticket_id = 1
-    result = ticket_service.get_ticket(mock_db_session, ticket_id, current_user_id=1)
+    result = ticket_service.get_ticket(mock_db_session, ticket_id)
 
     # Assertions
     assert result is not None
     assert result.id == ticket_id
     assert result.resumen == "Test Ticket Summary"
     assert result.reportado_por_nombre == "John Doe"
-    mock_repo.get_ticket_with_details.assert_called_once_with(
-        mock_db_session, ticket_id=ticket_id
-    )
-    mock_repo.get_evidence_for_ticket.assert_called_once_with(
+    assert result.raw_logs == "Test Raw Logs"
+    assert result.has_raw_logs is True
+    mock_repo.get_ticket_detail.assert_called_once_with(
         mock_db_session, ticket_id=ticket_id
     )
+    mock_repo.get_raw_logs.assert_called_once_with(mock_db_session, ticket_id=ticket_id)
 
 
 @patch("services.ticket_service.ticket_repository")
@@ -82,15 +97,137 @@ def test_get_ticket_not_found(mock_repo, mock_db_session):
     """
     Test case for get_ticket when no ticket is found.
     """
-    mock_repo.get_ticket_with_details.return_value = None
+    mock_repo.get_ticket_detail.return_value = None
 
     ticket_id = 999  # A non-existent ticket ID
-    result = ticket_service.get_ticket(mock_db_session, ticket_id, current_user_id=1)
+    result = ticket_service.get_ticket(mock_db_session, ticket_id)
 
     # Assertions
     assert result is None
-    mock_repo.get_ticket_with_details.assert_called_once_with(
+    mock_repo.get_ticket_detail.assert_called_once_with(
         mock_db_session, ticket_id=ticket_id
     )
-    mock_repo.get_evidence_for_ticket.assert_not_called()
+    mock_repo.get_raw_logs.assert_not_called()
     mock_repo.get_alert_for_ticket.assert_not_called()
+
+
+def test_ticket_list_cache_is_invalidated_by_writes(
+    db_session, sample_tickets, monkeypatch
+):
+    page = ticket_service.get_paginated_tickets(db_session, fields="id")
+    assert ticket_service.get_paginated_tickets(db_session, fields="id") is page
+    assert ticket_list_cache.get_stats()["hits"] == 1
+
+    ticket_service.delete_ticket(db_session, ticket_id=2, current_user_id=1)
+    tickets, total_count, _ = ticket_service.get_paginated_tickets(
+        db_session, fields="id"
+    )
+    assert (tickets, total_count) == ([{"id": 1}], 1)
+
+    # A page computed across a write is not stored
+    generation = ticket_list_cache.generation
+    ticket_list_cache.invalidate()
+    ticket_list_cache.set(("stale",), page, 10, generation)
+    assert ticket_list_cache.get(("stale",)) is None
+
+    monkeypatch.setattr(ticket_list_cache, "max_entry_bytes", 1)
+    ticket_service.get_paginated_tickets(db_session, fields="all")
+    stats = ticket_list_cache.get_stats()
+    assert stats["oversized"] == 1
+    assert stats["entries"] == 0
+
+
+def test_write_responses_are_built_in_session(
+    db_session, sample_tickets, recorded_queries, monkeypatch
+):
+    async def broadcast(message):
+        pass
+
+    monkeypatch.setattr("services.ticket_service.manager.broadcast", broadcast)
+    user = db_session.get(User, 1)
+    user.first_name  # Loaded, as by get_current_user
+
+    # Create and update build their response from the session instead of
+    # reloading the ticket. Create: UID seed, ticket refresh, audit refresh;
+    # update: detail load, ticket refresh, audit refresh
+    with recorded_queries() as statements:
+        created = asyncio.run(
+            ticket_service.create_ticket(
+                db_session,
+                TicketCreate(
+                    estado="Nuevo",
+                    severidad="Media",
+                    resumen="Creado",
+                    reportado_por_id=1,
+                    raw_logs="log 1",
+                ),
+                files=[],
+                current_user_id=1,
+            )
+        )
+    assert sum(statement.startswith("SELECT") for statement in statements) == 3
+    assert created == ticket_service.get_ticket(db_session, created.id)
+
+    db_session.refresh(user)
+    with recorded_queries() as statements:
+        updated = asyncio.run(
+            ticket_service.update_ticket(
+                db_session,
+                ticket_id=1,
+                ticket_in=TicketUpdate(severidad="Media"),
+                current_user=user,
+                files=[],
+            )
+        )
+    assert sum(statement.startswith("SELECT") for statement in statements) == 3
+    assert updated == ticket_service.get_ticket(db_session, 1)
+
+
+@pytest.fixture
+def foreign_keys(db_session):
+    """Enforces foreign keys on SQLite, as PostgreSQL does."""
+
+    def enable(dbapi_connection, connection_record, connection_proxy):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    db_session.close()  # Return its connection so the next checkout enables them
+    event.listen(engine, "checkout", enable)
+    try:
+        yield
+    finally:
+        event.remove(engine, "checkout", enable)
+        db_session.close()
+        engine.dispose()
+
+
+def test_delete_ingested_ticket(db_session, foreign_keys):
+    fortigate_log = (
+        'date=2025-11-11 time=12:55:54 devname="FG1" logid="0720018432" '
+        'level="alert" srcip=10.0.0.1 dstip=10.0.0.2 msg="anomaly: udp_scan"'
+    )
+    db_session.add(
+        User(
+            username="admin",
+            first_name="Admin",
+            last_name="SIEM",
+            email="admin@example.com",
+            password_hash="x",
+        )
+    )
+    db_session.commit()
+    (result,) = create_tickets_from_raw_logs(db_session, [fortigate_log])
+    ticket_id = result["ticket_id"]
+    assert db_session.query(Alert).filter_by(ticket_id=ticket_id).count() == 1
+
+    deleted = ticket_service.delete_ticket(db_session, ticket_id, current_user_id=1)
+
+    assert deleted.id == ticket_id
+    assert db_session.get(Ticket, ticket_id) is None
+    assert db_session.query(Alert).count() == 0
+    assert db_session.query(TicketRawLog).count() == 0
+    assert (
+        db_session.query(AuditLog)
+        .filter_by(accion="Eliminación de Ticket", entidad_id=ticket_id)
+        .count()
+        == 1
+    )
@@ -0,0 +1,174 @@
+import json
+import os
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+# Set TESTING environment variable to True before importing db.session
+os.environ["TESTING"] = "True"
+
+from db.session import engine  # noqa: E402
+from db.models import AuditLog, Notification, Role, Ticket, User  # noqa: E402
+from services.ticket_cache import ticket_list_cache  # noqa: E402
+from services.ticket_service import ticket_service  # noqa: E402
+
+
+def test_export_endpoint(db_session, client):
+    with pytest.raises(HTTPException) as exc_info:
+        ticket_service.export_tickets(db_session, export_format="xlsx")
+    assert exc_info.value.status_code == 400
+
+    response = client.get(
+        "/api/v1/tickets/export", params={"format": "ndjson", "fields": "id"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"].endswith('.ndjson"')
+    assert response.text == '{"id":1}\n{"id":2}\n'
+
+
+def test_ticket_detail_conditional_get(db_session, client, monkeypatch):
+    response = client.get("/api/v1/tickets/1")
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+
+    # A matching If-None-Match skips loading and serializing the ticket
+    monkeypatch.setattr(ticket_service, "get_ticket", None)
+    response = client.get("/api/v1/tickets/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    monkeypatch.undo()
+
+    ticket = db_session.get(Ticket, 1)
+    ticket.resumen = "Actualizado"
+    db_session.commit()
+    response = client.get("/api/v1/tickets/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["resumen"] == "Actualizado"
+    assert response.headers["etag"] != etag
+
+
+def test_ticket_detail_is_read_only_until_acknowledged(db_session, client):
+    ticket = db_session.get(Ticket, 1)
+    ticket.asignado_a_id = 1
+    db_session.commit()
+    response = client.get("/api/v1/tickets/1")
+    etag = response.headers["etag"]
+
+    # Viewing a 'Nuevo' ticket, even as its assignee, does not change it
+    assert response.json()["estado"] == "Nuevo"
+    response = client.get("/api/v1/tickets/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert db_session.query(AuditLog).count() == 0
+
+    # Only the assignee's acknowledgement opens it
+    assert ticket_service.acknowledge_ticket(db_session, 1, current_user_id=2)
+    assert db_session.get(Ticket, 1).estado == "Nuevo"
+
+    response = client.post("/api/v1/tickets/1/acknowledge")
+    assert response.json()["estado"] == "Abierto"
+    assert db_session.query(AuditLog).one().accion == "Cambio de Estado Automático"
+    response = client.get("/api/v1/tickets/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert client.post("/api/v1/tickets/99/acknowledge").status_code == 404
+
+
+def test_ticket_list_conditional_get(db_session, client, recorded_queries):
+    params = {"status": "Nuevo", "fields": "id"}
+    response = client.get("/api/v1/tickets/", params=params)
+    etag = response.headers["etag"]
+    headers = {"If-None-Match": f'"other", {etag}'}
+
+    # Revalidating is answered from the list cache version, without querying
+    # tickets (only the current user is loaded)
+    with recorded_queries() as statements:
+        response = client.get("/api/v1/tickets/", params=params, headers=headers)
+    assert response.status_code == 304
+    assert not [statement for statement in statements if "tickets" in statement]
+    # Other parameters are another representation
+    assert (
+        client.get(
+            "/api/v1/tickets/", params={**params, "limit": 1}, headers=headers
+        ).status_code
+        == 200
+    )
+
+    db_session.add(
+        Ticket(
+            ticket_uid="TCK-2025-000003",
+            estado="Nuevo",
+            severidad="Baja",
+            resumen="Nuevo",
+        )
+    )
+    db_session.commit()
+    ticket_list_cache.invalidate()  # Written outside the ticket service
+    response = client.get("/api/v1/tickets/", params=params, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["tickets"]) == 2
+
+
+def test_bulk_update_tickets(db_session, client, monkeypatch):
+    broadcasts = []
+
+    async def broadcast(message):
+        broadcasts.append(json.loads(message))
+
+    monkeypatch.setattr("services.ticket_service.manager.broadcast", broadcast)
+    body = {"ticket_ids": [1, 2, 99], "patch": {"estado": "Cerrado"}}
+
+    # Analysts without the Admin/Lider role cannot change the status
+    assert client.post("/api/v1/tickets/bulk", json=body).status_code == 403
+    assert (
+        client.post(
+            "/api/v1/tickets/bulk", json={"ticket_ids": [1], "patch": {}}
+        ).status_code
+        == 422
+    )
+
+    db_session.get(User, 1).role = Role(name="Lider")
+    db_session.commit()
+    body["patch"]["asignado_a_id"] = 1
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0:3])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post("/api/v1/tickets/bulk", json=body)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.json() == {
+        "updated_ids": [1, 2],
+        "unchanged_ids": [],
+        "not_found_ids": [99],
+    }
+    assert statements.count(["UPDATE", "tickets", "SET"]) == 1
+    assert statements.count(["INSERT", "INTO", "audit_logs"]) == 1
+    assert statements.count(["INSERT", "INTO", "notifications"]) == 1
+    assert [
+        (ticket.estado, ticket.asignado_a_id)
+        for ticket in db_session.query(Ticket).order_by(Ticket.id)
+    ] == [("Cerrado", 1), ("Cerrado", 1)]
+    # Ticket 1: assignment and status change (the reporter is the assignee);
+    # ticket 2 was already closed, so only the assignment
+    assert db_session.query(Notification).count() == 3
+    assert db_session.query(AuditLog).count() == 2
+    assert broadcasts == [
+        {
+            "type": "tickets_bulk_update",
+            "ticket_ids": [1, 2],
+            "changes": {"estado": "Cerrado", "asignado_a_id": 1},
+            "actualizado_en": broadcasts[0]["actualizado_en"],
+        }
+    ]
+
+    response = client.post("/api/v1/tickets/bulk", json=body)
+    assert response.json()["unchanged_ids"] == [1, 2]
+    assert db_session.query(AuditLog).count() == 2
+    assert len(broadcasts) == 1
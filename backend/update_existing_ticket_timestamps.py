@@ -6,6 +6,7 @@ import logging
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from db.models import Ticket  # Asegúrate de que la ruta de importación sea correcta
+from repositories.ticket_repository import ticket_repository
 
 # Configuración de logging
 logging.basicConfig(
@@ -60,13 +61,15 @@ def update_existing_ticket_timestamps():
     db = SessionLocal()
     updated_count = 0
     try:
-        tickets_to_update = db.query(Ticket).filter(Ticket.raw_logs.isnot(None)).all()
+        # Los raw_logs se guardan comprimidos fuera de la tabla de tickets
+        raw_logs_by_ticket = dict(ticket_repository.iter_raw_logs(db))
         logger.info(
-            f"Encontrados {len(tickets_to_update)} tickets con raw_logs para procesar."
+            f"Encontrados {len(raw_logs_by_ticket)} tickets con raw_logs para procesar."
         )
 
-        for ticket in tickets_to_update:
-            new_created_at = parse_datetime_from_raw_log(ticket.raw_logs)
+        for ticket_id, raw_logs in raw_logs_by_ticket.items():
+            ticket = db.get(Ticket, ticket_id)
+            new_created_at = parse_datetime_from_raw_log(raw_logs)
             if new_created_at:
                 if ticket.creado_en != new_created_at:
                     logger.info(
@@ -9,7 +9,8 @@ export const apiFetch = async (endpoint, options = {}) => {
     };
 
     // Don't set Content-Type for FormData or URLSearchParams, browser does it with boundary
-    if (!(options.body instanceof FormData) && !(options.body instanceof URLSearchParams)) {
+    // (nor for raw Blob chunks of resumable uploads)
+    if (!(options.body instanceof FormData) && !(options.body instanceof URLSearchParams) && !(options.body instanceof Blob)) {
         headers['Content-Type'] = 'application/json';
     }
 
@@ -89,6 +90,10 @@ export const markNotificationAsRead = async (notificationId) => {
     });
 };
 
+// Ticket list columns used by the UI: the summary projection plus the rule texts
+// shown by 'Ver Regla'. Other large text columns are never sent for lists.
+export const TICKET_LIST_FIELDS = 'summary,rule_description,rule_remediation';
+
 export const readTickets = async (filters = {}) => {
     const params = new URLSearchParams();
     if (filters.status) {
@@ -103,6 +108,12 @@ export const readTickets = async (filters = {}) => {
     if (filters.limit) {
         params.append('limit', filters.limit);
     }
+    if (filters.cursor) { // Keyset pagination: next_cursor from the previous page
+        params.append('cursor', filters.cursor);
+    }
+    if (filters.count_mode) { // 'exact' (default), 'estimate' or 'none'
+        params.append('count_mode', filters.count_mode);
+    }
     if (filters.severity) {
         params.append('severity', filters.severity);
     }
@@ -115,6 +126,9 @@ export const readTickets = async (filters = {}) => {
     if (filters.search) { // Add search filter
         params.append('search', filters.search);
     }
+    if (filters.search_mode) { // 'fulltext' (default) or 'substring' for IOC fragments
+        params.append('search_mode', filters.search_mode);
+    }
     if (filters.start_date) {
         params.append('start_date', filters.start_date);
     }
@@ -127,6 +141,9 @@ export const readTickets = async (filters = {}) => {
     if (filters.sort_order) { // Add sort_order filter
         params.append('sort_order', filters.sort_order);
     }
+    if (filters.fields) { // Sparse fieldset; the API defaults to the summary projection
+        params.append('fields', filters.fields);
+    }
 
     const queryString = params.toString();
     return apiFetch(`/tickets/${queryString ? `?${queryString}` : ''}`);
@@ -145,10 +162,30 @@ export const fetchDashboardStats = async () => {
     return apiFetch('/dashboard/stats');
 };
 
+// GET /tickets/{id} is read-only; see acknowledgeIfAssignee
+export const getTicket = async (ticketId) => {
+    return apiFetch(`/tickets/${ticketId}`);
+};
+
+// The assignee's first view of a 'Nuevo' ticket is recorded explicitly
+// (Nuevo -> Abierto) by /acknowledge; anyone else just reads it. Returns the
+// ticket as it stands afterwards.
+export const acknowledgeIfAssignee = async (ticket, currentUserId) => {
+    if (ticket.estado !== 'Nuevo' || currentUserId == null || ticket.asignado_a_id !== currentUserId) {
+        return ticket;
+    }
+    return apiFetch(`/tickets/${ticket.id}/acknowledge`, { method: 'POST' });
+};
+
 export const getTicketComments = async (ticketId) => {
     return apiFetch(`/tickets/${ticketId}/comments`);
 };
 
+// Raw logs are not included in ticket lists (only has_raw_logs); load them on demand
+export const getTicketRawLogs = async (ticketId) => {
+    return apiFetch(`/tickets/${ticketId}/raw-logs`);
+};
+
 export const createTicketComment = async (ticketId, commentContent) => {
     return apiFetch(`/tickets/${ticketId}/comments`, {
         method: 'POST',
@@ -156,6 +193,49 @@ export const createTicketComment = async (ticketId, commentContent) => {
     });
 };
 
+// Applies one patch ({ estado, severidad, asignado_a_id, ... }) to many tickets
+export const bulkUpdateTickets = async (ticketIds, patch) => {
+    return apiFetch('/tickets/bulk', {
+        method: 'POST',
+        body: JSON.stringify({ ticket_ids: ticketIds, patch }),
+    });
+};
+
+// Uploads a (large) evidence file in chunks through a resumable upload session.
+// A failed chunk is retried from the offset the server has acknowledged.
+const EVIDENCE_CHUNK_SIZE = 8 * 1024 * 1024;
+
+export const uploadEvidence = async (ticketId, file, { onProgress, retries = 3 } = {}) => {
+    const base = `/tickets/${ticketId}/uploads`;
+    let upload = await apiFetch(base, {
+        method: 'POST',
+        body: JSON.stringify({ nombre_archivo: file.name, tamano: file.size }),
+    });
+    let failures = 0;
+    while (upload.recibido < upload.tamano) {
+        const chunk = file.slice(upload.recibido, upload.recibido + EVIDENCE_CHUNK_SIZE);
+        try {
+            upload = await apiFetch(`${base}/${upload.id}?offset=${upload.recibido}`, {
+                method: 'PUT',
+                body: chunk,
+            });
+            failures = 0;
+        } catch (error) {
+            if (++failures > retries) {
+                throw error;
+            }
+            upload = await apiFetch(`${base}/${upload.id}`);
+        }
+        if (onProgress) {
+            onProgress(upload.recibido / upload.tamano);
+        }
+    }
+    return apiFetch(`${base}/${upload.id}/complete`, {
+        method: 'POST',
+        body: JSON.stringify({}),
+    });
+};
+
 export const getSessionExpiration = async () => {
     return apiFetch('/auth/session-expires');
 };
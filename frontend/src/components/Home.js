@@ -8,7 +8,9 @@ import {
   readFormSubmissions,
   fetchDashboardStats, // Consolidated endpoint
   remediateTicket,
-  getFortiSIEMStatus
+  getFortiSIEMStatus,
+  getTicketRawLogs,
+  TICKET_LIST_FIELDS
 } from '../api';
 import DashboardSkeleton from './Dashboard/DashboardSkeleton'; // Import the skeleton component
 import './Dashboard/Dashboard.css'; // Importa los estilos del nuevo dashboard
@@ -126,6 +128,15 @@ const Home = () => {
   const { latestMessage, consumeMessage } = useWebSocketContext(); // Get latest message and consumer from WebSocket context
   const { openTicketModal, openInfoModal } = useModal(); // Use modal context
 
+  const showRawLogs = async (ticket) => {
+    try {
+      const rawLogs = ticket.raw_logs || (await getTicketRawLogs(ticket.id)).raw_logs;
+      openInfoModal('Raw Logs', rawLogs);
+    } catch (err) {
+      toast.error(`Error al cargar los raw logs: ${err.message}`);
+    }
+  };
+
   const [myCreatedTickets, setMyCreatedTickets] = useState([]);
   const [myAssignedTickets, setMyAssignedTickets] = useState([]);
   const [allTickets, setAllTickets] = useState([]); // New state for all tickets
@@ -243,6 +254,7 @@ const Home = () => {
         const baseParams = {
           sort_by: 'id',
           sort_order: 'desc',
+          fields: TICKET_LIST_FIELDS,
         };
 
         if (activeTab === 'total') {
@@ -302,7 +314,7 @@ const Home = () => {
       try {
         const skip = (allTicketsCurrentPage - 1) * allTicketsPageSize;
         const limit = allTicketsPageSize;
-        const { tickets, total_count } = await readTickets({ skip, limit, start_date: startDate, end_date: endDate, sort_by: 'id', sort_order: 'desc' });
+        const { tickets, total_count } = await readTickets({ skip, limit, start_date: startDate, end_date: endDate, sort_by: 'id', sort_order: 'desc', fields: TICKET_LIST_FIELDS });
         setAllTickets(tickets);
         setTotalAllTickets(total_count);
       } catch (err) {
@@ -1003,8 +1015,8 @@ const Home = () => {
                                       <button onClick={() => handleEditClick(ticket)} className="btn btn-sm btn-warning me-1">Editar</button>
                                     )}
                                     <button onClick={() => openTicketModal(ticket.id)} className="btn btn-sm btn-info me-1">Ver</button>
-                                    {ticket.raw_logs && (
-                                      <button onClick={() => openInfoModal('Raw Logs', ticket.raw_logs)} className="btn btn-sm btn-secondary me-1">
+                                    {(ticket.has_raw_logs || ticket.raw_logs) && (
+                                      <button onClick={() => showRawLogs(ticket)} className="btn btn-sm btn-secondary me-1">
                                         Ver Raw Logs
                                       </button>
                                     )}
@@ -1089,8 +1101,8 @@ const Home = () => {
                                 <button onClick={() => openTicketModal(ticket.id)} className="btn btn-sm btn-info me-1">Ver</button>
                                 <button onClick={() => handleEditClick(ticket)} className="btn btn-sm btn-warning me-1">Editar</button>
                                 <button onClick={() => handleRemediate(ticket.id)} className="btn btn-sm btn-success me-1">Remediar</button>
-                                {ticket.raw_logs && (
-                                  <button onClick={() => openInfoModal('Raw Logs', ticket.raw_logs)} className="btn btn-sm btn-secondary me-1">
+                                {(ticket.has_raw_logs || ticket.raw_logs) && (
+                                  <button onClick={() => showRawLogs(ticket)} className="btn btn-sm btn-secondary me-1">
                                     Ver Raw Logs
                                   </button>
                                 )}
@@ -1174,8 +1186,8 @@ const Home = () => {
                                 <button onClick={() => openTicketModal(ticket.id)} className="btn btn-sm btn-info me-1">Ver</button>
                                 <button onClick={() => handleEditClick(ticket)} className="btn btn-sm btn-warning me-1">Editar</button>
                                 <button onClick={() => handleRemediate(ticket.id)} className="btn btn-sm btn-success me-1">Remediar</button>
-                                {ticket.raw_logs && (
-                                  <button onClick={() => openInfoModal('Raw Logs', ticket.raw_logs)} className="btn btn-sm btn-secondary me-1">
+                                {(ticket.has_raw_logs || ticket.raw_logs) && (
+                                  <button onClick={() => showRawLogs(ticket)} className="btn btn-sm btn-secondary me-1">
                                     Ver Raw Logs
                                   </button>
                                 )}
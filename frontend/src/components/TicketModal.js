@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { apiFetch } from '../api';
+import { apiFetch, getTicket, acknowledgeIfAssignee } from '../api';
 import './TicketModal.css'; // Import the CSS file
 
 const TicketModal = ({ ticketId, onClose }) => {
@@ -15,8 +15,11 @@ const TicketModal = ({ ticketId, onClose }) => {
       }
       try {
         setLoading(true);
-        const data = await apiFetch(`/tickets/${ticketId}`);
-        setTicket(data);
+        const [data, currentUser] = await Promise.all([
+          getTicket(ticketId),
+          apiFetch('/auth/me').catch(() => null),
+        ]);
+        setTicket(currentUser ? await acknowledgeIfAssignee(data, currentUser.id) : data);
       } catch (err) {
         setError(err.message);
       } finally {
@@ -2,7 +2,7 @@ import React, { useState, useEffect, useCallback } from 'react';
 import { useParams, useNavigate, useLocation } from 'react-router-dom';
 import { useWebSocketContext } from '../context/WebSocketContext';
 import { toast } from 'react-toastify';
-import { apiFetch, readTickets, getTicketComments, createTicketComment, remediateTicket } from '../api';
+import { apiFetch, readTickets, getTicket, acknowledgeIfAssignee, getTicketComments, createTicketComment, remediateTicket, getTicketRawLogs, TICKET_LIST_FIELDS } from '../api';
 import Avatar from './Avatar';
 import './Tickets.css';
 import { useModal } from '../context/ModalContext'; // Import useModal
@@ -30,6 +30,15 @@ const Tickets = () => {
     const latestMessage = useWebSocketContext();
     const { openTicketModal, closeTicketModal, openInfoModal } = useModal(); // Use modal context
 
+    const showRawLogs = async (ticket) => {
+        try {
+            const rawLogs = ticket.raw_logs || (await getTicketRawLogs(ticket.id)).raw_logs;
+            openInfoModal('Raw Logs', rawLogs);
+        } catch (err) {
+            toast.error(`Error al cargar los raw logs: ${err.message}`);
+        }
+    };
+
     const [singleTicket, setSingleTicket] = useState(null);
     const [tickets, setTickets] = useState([]);
     const [users, setUsers] = useState([]);
@@ -83,7 +92,7 @@ const Tickets = () => {
     const fetchSingleTicket = useCallback(async (id) => {
         setIsLoading(true);
         try {
-            const data = await apiFetch(`/tickets/${id}`);
+            const data = await getTicket(id);
             setSingleTicket(data);
             setResolutionText(data.resolucion || '');
             setEvidenceFiles(data.evidencia || []);
@@ -121,6 +130,7 @@ const Tickets = () => {
                 start_date: filterStartDate,
                 end_date: filterEndDate,
                 assignedToMe: queryParams.get('assignedToMe') === 'true',
+                fields: TICKET_LIST_FIELDS,
             };
 
             const data = await readTickets(apiParams);
@@ -162,16 +172,30 @@ const Tickets = () => {
             fetchFilteredTickets();
         }
     }, [ticketId, fetchSingleTicket, fetchTicketComments, fetchFilteredTickets]);
+
+    // Opening a 'Nuevo' ticket assigned to the current user acknowledges it
+    useEffect(() => {
+        if (!singleTicket || !currentUser) return;
+        acknowledgeIfAssignee(singleTicket, currentUser.id)
+            .then(ticket => {
+                if (ticket !== singleTicket) setSingleTicket(ticket);
+            })
+            .catch(error => setError(error.message));
+    }, [singleTicket, currentUser]);
     
     useEffect(() => {
         if (latestMessage) {
-            if (ticketId && latestMessage.id === parseInt(ticketId)) {
+            if (ticketId && latestMessage.type === 'tickets_bulk_update') {
+                if (latestMessage.ticket_ids.includes(parseInt(ticketId))) {
+                    fetchSingleTicket(ticketId);
+                }
+            } else if (ticketId && latestMessage.id === parseInt(ticketId)) {
                 setSingleTicket(prevTicket => ({ ...prevTicket, ...latestMessage }));
             } else if (!ticketId) {
                 fetchFilteredTickets();
             }
         }
-    }, [latestMessage, ticketId, fetchFilteredTickets]);
+    }, [latestMessage, ticketId, fetchSingleTicket, fetchFilteredTickets]);
 
     const handleEditClick = (ticket) => {
         setEditingTicketId(ticket.id);
@@ -443,7 +467,7 @@ const Tickets = () => {
                                                             <button onClick={() => navigate(`/tickets/${ticket.id}`)} className="btn btn-sm btn-primary">Continuar Trabajo</button>
                                                             : !ticket.asignado_a_id && <button onClick={() => remediateTicket(ticket.id)} className="btn btn-sm btn-success">Remediar</button>
                                                         }
-                                                        {ticket.raw_logs && <button onClick={() => openInfoModal('Raw Logs', ticket.raw_logs)} className="btn btn-sm btn-secondary">Ver Raw</button>}
+                                                        {(ticket.has_raw_logs || ticket.raw_logs) && <button onClick={() => showRawLogs(ticket)} className="btn btn-sm btn-secondary">Ver Raw</button>}
                                                         {ticket.rule_name && <button onClick={() => openInfoModal({ nombre: ticket.rule_name, descripcion: ticket.rule_description, remediacion: ticket.rule_remediation })} className="btn btn-sm btn-secondary">Ver Regla</button>}
                                                     </div>
                                                 )}